@@ -0,0 +1,49 @@
+"""
+Helpers shared by the benchmarks. They run against the simulated camera
+unless PYZWOASI_LIBRARY points to the real ASICamera2 library, in which case
+camera 0 is measured.
+"""
+import json, os, platform, statistics, sys, time
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.pyzwoasi import ASIImageType, libraryPathVariable, simulatorPath
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+imageTypeNames = {imageType: imageType.name.replace("ASI_IMG_", "") for imageType in ASIImageType}
+
+def useSimulator(**cameraOptions):
+    """
+    Installs a simulated camera with the given options, unless the real
+    library was asked for. Returns True if the simulator is used.
+    """
+    if os.environ.get(libraryPathVariable, simulatorPath) != simulatorPath:
+        pyzwoasi.setBackend(None)
+        return False
+    pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(**cameraOptions)))
+    return True
+
+def perCall(function, number=1000, repeat=5):
+    """
+    Median over repeat runs of the time of one call, in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+def metadata():
+    return {
+        "python"  : platform.python_version(),
+        "numpy"   : np.__version__,
+        "platform": platform.platform(),
+        "backend" : os.environ.get(libraryPathVariable, simulatorPath),
+    }
+
+def dump(results):
+    json.dump(results, sys.stdout, indent=2)
+    print()
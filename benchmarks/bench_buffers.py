@@ -0,0 +1,50 @@
+"""
+Cost of turning SDK buffers into NumPy frames, per frame size and type:
+ - frombufferReshapeTime: np.frombuffer(...).reshape(...) view on bytes
+ - frombufferCopyTime   : same, followed by a copy to get a writable frame
+ - bytesTime            : bytes(bytearray), paid by getVideoData and
+                          getDataAfterExp on each frame
+ - emptyTime            : np.empty of a frame, paid by emptyFrame()
+ - asCBufferTime        : exposing a NumPy frame to ctypes, paid by the
+                          *Into functions on each frame
+Prints one JSON document.
+
+    PYTHONPATH=. python benchmarks/bench_buffers.py --number 200
+"""
+import argparse
+
+import numpy as np
+
+from pyzwoasi.pyzwoasi import ASIImageType, _asCBuffer
+
+from _common import dump, imageTypeNames, perCall
+
+sizes      = [(640, 480), (1920, 1080), (4144, 2822)]
+imageTypes = [ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_RAW16, ASIImageType.ASI_IMG_RGB24]
+
+def run(number=200, repeat=5):
+    results = []
+    for width, height in sizes:
+        for imageType in imageTypes:
+            shape = (height, width, 3) if imageType == ASIImageType.ASI_IMG_RGB24 else (height, width)
+            dtype = np.uint16 if imageType == ASIImageType.ASI_IMG_RAW16 else np.uint8
+            frame = np.zeros(shape, dtype=dtype)
+            data  = bytearray(frame.nbytes)
+            raw   = bytes(data)
+
+            results.append({
+                "name"                 : f"{width}x{height}/{imageTypeNames[imageType]}",
+                "frombufferReshapeTime": perCall(lambda: np.frombuffer(raw, dtype=dtype).reshape(shape), number, repeat),
+                "frombufferCopyTime"   : perCall(lambda: np.frombuffer(raw, dtype=dtype).reshape(shape).copy(), max(number // 10, 1), repeat),
+                "bytesTime"            : perCall(lambda: bytes(data), max(number // 10, 1), repeat),
+                "emptyTime"            : perCall(lambda: np.empty(shape, dtype=dtype), number, repeat),
+                "asCBufferTime"        : perCall(lambda: _asCBuffer(frame), number, repeat),
+            })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    dump(run(args.number, args.repeat))
@@ -0,0 +1,155 @@
+"""
+Per-call cost of the wrappers of pyzwoasi.py. Each wrapper is timed along
+with the bare backend call it makes, with arguments built beforehand: their
+difference is the overhead of the wrapper itself (argument conversion,
+byref, structure allocation, error checks). Prints one JSON document.
+
+Trigger and GPS calls are measured when the camera supports them, as the
+simulated one does. Wrappers left out, and why:
+  - getVideoData, getVideoDataInto, getVideoDataGPS, getVideoDataGPSInto,
+    getDataAfterExp, getDataAfterExpInto, getDataAfterExpGPS and
+    getDataAfterExpGPSInto transfer a frame, their cost is the one of the
+    transfer, measured by bench_capture, bench_shot and bench_buffers
+  - openCamera, initCamera, closeCamera, startVideoCapture and
+    stopVideoCapture change the camera state, they are part of the setup
+    of the other benchmarks
+  - enableDarkSubtract reads a dark frame file, its cost is file I/O
+  - pulseGuideOn/Off and setID are only measured against the simulator,
+    as they would move the mount or write the camera flash memory
+  - loadLibrary, setBackend and defaultLibraryPath make no SDK call
+
+    PYTHONPATH=. python benchmarks/bench_calls.py --number 2000
+"""
+import argparse, ctypes
+
+from pyzwoasi import pyzwoasi
+from pyzwoasi.pyzwoasi import ASICameraMode, ASIError, ASIExposureStatus, ASITrigOutputPin, lib
+from pyzwoasi.wait     import FixedIntervalWait
+
+from _common import dump, perCall, useSimulator
+
+def hasGPS(cameraID, properties):
+    # GPS lines are only known once a frame was exposed
+    pyzwoasi.startExposure(cameraID, False)
+    if FixedIntervalWait(interval=0.001).wait(cameraID, 0) != ASIExposureStatus.ASI_EXP_SUCCESS:
+        return False
+    buffer = bytearray(properties.MaxWidth * properties.MaxHeight * 6)
+    try:
+        pyzwoasi.getDataAfterExpGPSInto(cameraID, buffer)
+        pyzwoasi.gpsGetData(cameraID)
+        return True
+    except ASIError:
+        return False
+
+def calls(cameraID, simulated=True):
+    # Arguments of the bare calls, built once
+    value, auto            = ctypes.c_long(), ctypes.c_int()
+    pValue, pAuto          = ctypes.byref(value), ctypes.byref(auto)
+    ints                   = [ctypes.c_int() for _ in range(4)]
+    pInts                  = [ctypes.byref(integer) for integer in ints]
+    cameraInfo             = pyzwoasi.CameraInfo()
+    properties             = pyzwoasi.getCameraProperty(cameraID)
+    controlCaps            = pyzwoasi.ControlCaps()
+    cameraIDStruct         = pyzwoasi.ID()
+    serialNumber           = pyzwoasi.SN()
+    supportedMode          = pyzwoasi.SupportedMode()
+    width, height, binning, imageType = pyzwoasi.getROIFormat(cameraID)
+    controlTypes           = [0, 1, 5, 6]
+    gpsLines               = (pyzwoasi.GPSData(), pyzwoasi.GPSData())
+
+    def bareGetControlValues():
+        for controlType in controlTypes:
+            lib.ASIGetControlValue(cameraID, controlType, pValue, pAuto)
+
+    def bareSetControlValues():
+        for controlType in controlTypes[:2]:
+            lib.ASISetControlValue(cameraID, controlType, 100, 0)
+
+    def startStopExposure():
+        pyzwoasi.startExposure(cameraID, False)
+        pyzwoasi.stopExposure(cameraID)
+
+    def bareStartStopExposure():
+        lib.ASIStartExposure(cameraID, 0)
+        lib.ASIStopExposure(cameraID)
+
+    # name, wrapper call, bare backend call
+    results = [
+        ("getNumOfConnectedCameras", lambda: pyzwoasi.getNumOfConnectedCameras()                     , lambda: lib.ASIGetNumOfConnectedCameras()),
+        ("getProductIDs"           , lambda: pyzwoasi.getProductIDs()                                , lambda: lib.ASIGetProductIDs(None)),
+        ("cameraCheck"             , lambda: pyzwoasi.cameraCheck(0x03C3, 0x120A)                    , lambda: lib.ASICameraCheck(0x03C3, 0x120A)),
+        ("getCameraProperty"       , lambda: pyzwoasi.getCameraProperty(cameraID)                    , lambda: lib.ASIGetCameraProperty(cameraInfo, cameraID)),
+        ("getCameraPropertyByID"   , lambda: pyzwoasi.getCameraPropertyByID(cameraID)                , lambda: lib.ASIGetCameraPropertyByID(cameraID, cameraInfo)),
+        ("getNumOfControls"        , lambda: pyzwoasi.getNumOfControls(cameraID)                     , lambda: lib.ASIGetNumOfControls(cameraID, pInts[0])),
+        ("getControlCaps"          , lambda: pyzwoasi.getControlCaps(cameraID, 0)                    , lambda: lib.ASIGetControlCaps(cameraID, 0, controlCaps)),
+        ("getControlValue"         , lambda: pyzwoasi.getControlValue(cameraID, 0)                   , lambda: lib.ASIGetControlValue(cameraID, 0, pValue, pAuto)),
+        ("setControlValue"         , lambda: pyzwoasi.setControlValue(cameraID, 0, 100, False)       , lambda: lib.ASISetControlValue(cameraID, 0, 100, 0)),
+        ("getControlValues"        , lambda: pyzwoasi.getControlValues(cameraID, controlTypes)       , bareGetControlValues),
+        ("setControlValues"        , lambda: pyzwoasi.setControlValues(cameraID, [(0, 100, False), (1, 100, False)]), bareSetControlValues),
+        ("getROIFormat"            , lambda: pyzwoasi.getROIFormat(cameraID)                         , lambda: lib.ASIGetROIFormat(cameraID, *pInts)),
+        ("setROIFormat"            , lambda: pyzwoasi.setROIFormat(cameraID, width, height, binning, imageType), lambda: lib.ASISetROIFormat(cameraID, width, height, binning, imageType)),
+        ("getStartPos"             , lambda: pyzwoasi.getStartPos(cameraID)                          , lambda: lib.ASIGetStartPos(cameraID, pInts[0], pInts[1])),
+        ("setStartPos"             , lambda: pyzwoasi.setStartPos(cameraID, 0, 0)                    , lambda: lib.ASISetStartPos(cameraID, 0, 0)),
+        ("getDroppedFrames"        , lambda: pyzwoasi.getDroppedFrames(cameraID)                     , lambda: lib.ASIGetDroppedFrames(cameraID, pInts[0])),
+        ("disableDarkSubtract"     , lambda: pyzwoasi.disableDarkSubtract(cameraID)                  , lambda: lib.ASIDisableDarkSubtract(cameraID)),
+        ("startStopExposure"       , startStopExposure                                               , bareStartStopExposure),
+        ("getExpStatus"            , lambda: pyzwoasi.getExpStatus(cameraID)                         , lambda: lib.ASIGetExpStatus(cameraID, pInts[0])),
+        ("getID"                   , lambda: pyzwoasi.getID(cameraID)                                , lambda: lib.ASIGetID(cameraID, ctypes.byref(cameraIDStruct))),
+        ("getGainOffset"           , lambda: pyzwoasi.getGainOffset(cameraID)                        , lambda: lib.ASIGetGainOffset(cameraID, *pInts)),
+        ("getLMHGainOffset"        , lambda: pyzwoasi.getLMHGainOffset(cameraID)                     , lambda: lib.ASIGetLMHGainOffset(cameraID, *pInts)),
+        ("getSDKVersion"           , lambda: pyzwoasi.getSDKVersion()                                , lambda: lib.ASIGetSDKVersion()),
+        ("getCameraSupportMode"    , lambda: pyzwoasi.getCameraSupportMode(cameraID)                 , lambda: lib.ASIGetCameraSupportMode(cameraID, ctypes.byref(supportedMode))),
+        ("getSerialNumber"         , lambda: pyzwoasi.getSerialNumber(cameraID)                      , lambda: lib.ASIGetSerialNumber(cameraID, ctypes.byref(serialNumber))),
+    ]
+
+    if simulated:
+        results += [
+            ("pulseGuideOn"        , lambda: pyzwoasi.pulseGuideOn(cameraID, 0)                      , lambda: lib.ASIPulseGuideOn(cameraID, 0)),
+            ("pulseGuideOff"       , lambda: pyzwoasi.pulseGuideOff(cameraID, 0)                     , lambda: lib.ASIPulseGuideOff(cameraID, 0)),
+            ("setID"               , lambda: pyzwoasi.setID(cameraID, cameraIDStruct)                , lambda: lib.ASISetID(cameraID, cameraIDStruct)),
+        ]
+
+    if properties.IsTriggerCam:
+        # Measured in soft edge mode, in which sendSoftTrigger is valid
+        softEdge = ASICameraMode.ASI_MODE_TRIG_SOFT_EDGE
+        pin      = ASITrigOutputPin.ASI_TRIG_OUTPUT_PINA
+        results += [
+            ("getCameraMode"         , lambda: pyzwoasi.getCameraMode(cameraID)                      , lambda: lib.ASIGetCameraMode(cameraID, pInts[0])),
+            ("setCameraMode"         , lambda: pyzwoasi.setCameraMode(cameraID, softEdge)            , lambda: lib.ASISetCameraMode(cameraID, softEdge)),
+            ("sendSoftTrigger"       , lambda: pyzwoasi.sendSoftTrigger(cameraID, False)             , lambda: lib.ASISendSoftTrigger(cameraID, 0)),
+            ("setTriggerOutputIOConf", lambda: pyzwoasi.setTriggerOutputIOConf(cameraID, pin, True, 0, 10), lambda: lib.ASISetTriggerOutputIOConf(cameraID, pin, 1, 0, 10)),
+            ("getTriggerOutputIOConf", lambda: pyzwoasi.getTriggerOutputIOConf(cameraID, pin)        , lambda: lib.ASIGetTriggerOutputIOConf(cameraID, pin, *pInts[:3])),
+        ]
+
+    if hasGPS(cameraID, properties):
+        results.append(("gpsGetData", lambda: pyzwoasi.gpsGetData(cameraID), lambda: lib.ASIGPSGetData(cameraID, *(ctypes.byref(line) for line in gpsLines))))
+    return results
+
+def run(number=1000, repeat=5):
+    simulated = useSimulator(isTriggerCam=True, gps=(45.5, -73.25, 120.0, 9))
+    cameraID  = 0
+    pyzwoasi.openCamera(cameraID)
+    pyzwoasi.initCamera(cameraID)
+    try:
+        results = []
+        for name, wrapperCall, bareCall in calls(cameraID, simulated):
+            callTime    = perCall(wrapperCall, number, repeat)
+            backendTime = perCall(bareCall   , number, repeat)
+            results.append({
+                "name"        : name,
+                "callTime"    : callTime,
+                "backendTime" : backendTime,
+                "overheadTime": callTime - backendTime,
+            })
+        return results
+    finally:
+        if pyzwoasi.getCameraProperty(cameraID).IsTriggerCam:
+            pyzwoasi.setCameraMode(cameraID, ASICameraMode.ASI_MODE_NORMAL)
+        pyzwoasi.closeCamera(cameraID)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    dump(run(args.number, args.repeat))
@@ -0,0 +1,85 @@
+"""
+Frame acquisition throughput of getVideoData and getDataAfterExp, for
+several ROI sizes and image types. Each is measured both allocating a new
+bytes object per frame and writing into a reused NumPy array (*Into). The
+simulated camera is set with no frame rate nor USB limit, so that the cost
+of the acquisition path itself is measured. Prints one JSON document.
+
+    PYTHONPATH=. python benchmarks/bench_capture.py --frames 50
+"""
+import argparse, time
+
+import numpy as np
+
+from pyzwoasi import pyzwoasi
+from pyzwoasi.pyzwoasi import ASIExposureStatus, ASIImageType
+
+from _common import dump, imageTypeNames, useSimulator
+
+sizes      = [(640, 480), (1280, 720), (1920, 1080)]
+imageTypes = [ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_RAW16, ASIImageType.ASI_IMG_RGB24]
+channels   = {ASIImageType.ASI_IMG_RAW8: 1, ASIImageType.ASI_IMG_RAW16: 2, ASIImageType.ASI_IMG_RGB24: 3, ASIImageType.ASI_IMG_Y8: 1}
+
+def record(name, width, height, imageType, frameTime):
+    frameBytes = width * height * channels[imageType]
+    return {
+        "name"         : f"{name}/{width}x{height}/{imageTypeNames[imageType]}",
+        "frameTime"    : frameTime,
+        "framesPerS"   : 1 / frameTime,
+        "megabytesPerS": frameBytes / frameTime / 1e6,
+    }
+
+def videoFrameTime(cameraID, frames, fetch):
+    fetch() # First frame of a format may be slower
+    start = time.perf_counter()
+    for _ in range(frames):
+        fetch()
+    return (time.perf_counter() - start) / frames
+
+def snapshotFrameTime(cameraID, frames, fetch):
+    # Only the download is timed, not the exposure
+    elapsed = 0.0
+    for frame in range(frames + 1):
+        pyzwoasi.startExposure(cameraID, False)
+        while pyzwoasi.getExpStatus(cameraID) == ASIExposureStatus.ASI_EXP_WORKING:
+            pass
+        start = time.perf_counter()
+        fetch()
+        if frame > 0:
+            elapsed += time.perf_counter() - start
+    return elapsed / frames
+
+def run(frames=50):
+    useSimulator(width=max(width for width, _ in sizes), height=max(height for _, height in sizes),
+                 fps=1e6, usbRate=float("inf"))
+    cameraID = 0
+    pyzwoasi.openCamera(cameraID)
+    pyzwoasi.initCamera(cameraID)
+    pyzwoasi.setControlValue(cameraID, 1, 32, False) # Shortest exposure
+    results = []
+    try:
+        for width, height in sizes:
+            for imageType in imageTypes:
+                pyzwoasi.setROIFormat(cameraID, width, height, 1, imageType)
+                shape  = (height, width, 3) if imageType == ASIImageType.ASI_IMG_RGB24 else (height, width)
+                buffer = np.empty(shape, dtype=np.uint16 if imageType == ASIImageType.ASI_IMG_RAW16 else np.uint8)
+                bufferSize = buffer.nbytes
+
+                pyzwoasi.startVideoCapture(cameraID)
+                try:
+                    results.append(record("getVideoData"    , width, height, imageType, videoFrameTime(cameraID, frames, lambda: pyzwoasi.getVideoData(cameraID, bufferSize, 1000))))
+                    results.append(record("getVideoDataInto", width, height, imageType, videoFrameTime(cameraID, frames, lambda: pyzwoasi.getVideoDataInto(cameraID, buffer, 1000))))
+                finally:
+                    pyzwoasi.stopVideoCapture(cameraID)
+
+                results.append(record("getDataAfterExp"    , width, height, imageType, snapshotFrameTime(cameraID, frames, lambda: pyzwoasi.getDataAfterExp(cameraID, bufferSize))))
+                results.append(record("getDataAfterExpInto", width, height, imageType, snapshotFrameTime(cameraID, frames, lambda: pyzwoasi.getDataAfterExpInto(cameraID, buffer))))
+        return results
+    finally:
+        pyzwoasi.closeCamera(cameraID)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+    dump(run(args.frames))
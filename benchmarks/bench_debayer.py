@@ -0,0 +1,45 @@
+"""
+Throughput of the debayering stage, in megapixels per second, for each
+mode and raw bit depth. Prints one JSON document on stdout.
+
+    PYTHONPATH=. python benchmarks/bench_debayer.py --width 4144 --height 2822
+"""
+import argparse, json, time
+
+import numpy as np
+
+from pyzwoasi.pyzwoasi import ASIBayerPattern
+from pyzwoasi.processing import Debayer
+
+def benchmark(width, height, dtype, mode, repeat):
+    raw = np.random.default_rng(0).integers(0, np.iinfo(dtype).max, size=(height, width), dtype=dtype)
+    debayer = Debayer(ASIBayerPattern.ASI_BAYER_RG, mode)
+    debayer(raw) # Buffers are allocated on the first call
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        debayer(raw)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "name"           : f"{mode}/{np.dtype(dtype).name}",
+        "mode"           : mode,
+        "dtype"          : np.dtype(dtype).name,
+        "width"          : width,
+        "height"         : height,
+        "frameTime"      : elapsed / repeat,
+        "megapixelsPerS" : width * height * repeat / elapsed / 1e6,
+    }
+
+def run(width=1920, height=1080, repeat=20):
+    return [benchmark(width, height, dtype, mode, repeat)
+            for dtype in (np.uint8, np.uint16)
+            for mode  in (Debayer.SUPERPIXEL, Debayer.BILINEAR)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width" , type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.width, args.height, args.repeat), indent=2))
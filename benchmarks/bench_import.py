@@ -0,0 +1,52 @@
+"""
+Cost of importing pyzwoasi, now that the ASICamera2 library is loaded on
+first use, compared to the cost of loading the library and setting up all
+the function prototypes, which used to be paid at import. Each sample runs
+in a fresh interpreter. Prints one JSON document on stdout.
+
+    PYTHONPATH=. python benchmarks/bench_import.py --repeat 10
+"""
+import argparse, json, math, statistics, subprocess, sys
+
+_sample = """
+import time
+start = time.perf_counter()
+import pyzwoasi
+imported = time.perf_counter()
+try:
+    from pyzwoasi.pyzwoasi import _prototypes, lib
+    lib.load()
+    loaded = time.perf_counter()
+    for name in _prototypes:
+        getattr(lib, name, None)
+    prototyped = time.perf_counter()
+except OSError:
+    loaded = prototyped = float("nan")
+print(imported - start, loaded - imported, prototyped - loaded)
+"""
+
+def sample():
+    output = subprocess.run([sys.executable, "-c", _sample], check=True, capture_output=True, text=True).stdout
+    return [float(value) for value in output.split()]
+
+def run(repeat=10):
+    samples = [sample() for _ in range(repeat)]
+    importTime, loadTime, prototypeTime = (statistics.median(column) for column in zip(*samples))
+
+    # Library may not be loadable on this host, its timings are then None
+    def valid(value):
+        return None if math.isnan(value) else value
+
+    return [{
+        "name"           : "import",
+        "importTime"     : importTime,                # What `import pyzwoasi` costs now
+        "loadTime"       : valid(loadTime),           # Deferred to the first SDK call
+        "prototypeTime"  : valid(prototypeTime),      # Deferred to the first use of each function
+        "eagerImportTime": valid(importTime + loadTime + prototypeTime),
+    }]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
@@ -0,0 +1,77 @@
+"""
+End-to-end latency of ZWOCamera.shot, split into its steps:
+ - expose    : requested exposure time
+ - poll      : from the end of the exposure until the status is read as
+               successful (sensor readout plus polling latency)
+ - readout   : download of the picture with getDataAfterExpInto
+ - conversion: processing by a ColorProcessor
+The steps replicate what shot() does, and shotTime times shot() itself for
+comparison. Prints one JSON document.
+
+    PYTHONPATH=. python benchmarks/bench_shot.py --shots 10
+"""
+import argparse, statistics, time
+
+from pyzwoasi import pyzwoasi
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.pyzwoasi import ASIImageType
+
+from _common import dump, imageTypeNames, useSimulator
+
+exposures  = [1000, 10000, 100000]
+imageTypes = [ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_RAW16]
+
+def breakdown(camera, processor):
+    cameraID = camera._cameraIndex
+    exposure = camera.exposure
+
+    start = time.perf_counter()
+    pyzwoasi.startExposure(cameraID, True)
+    camera.waitStrategy.wait(cameraID, exposure)
+    exposed = time.perf_counter()
+    pyzwoasi.getDroppedFrames(cameraID)
+    pyzwoasi.stopExposure(cameraID)
+    img = camera.emptyFrame()
+    pyzwoasi.getDataAfterExpInto(cameraID, img)
+    downloaded = time.perf_counter()
+    processor(img, camera.imageType)
+    converted = time.perf_counter()
+
+    return {
+        "exposeTime"    : exposure / 1e6,
+        "pollTime"      : exposed - start - exposure / 1e6,
+        "readoutTime"   : downloaded - exposed,
+        "conversionTime": converted - downloaded,
+        "totalTime"     : converted - start,
+    }
+
+def run(shots=10):
+    useSimulator()
+    results = []
+    with ZWOCamera(0) as camera:
+        processor = camera.colorProcessor()
+        for imageType in imageTypes:
+            camera.imageType = imageType
+            for exposure in exposures:
+                camera.exposure = exposure
+                camera.shot() # Warm up for this format
+
+                steps = [breakdown(camera, processor) for _ in range(shots)]
+                record = {"name": f"shot/{exposure}us/{imageTypeNames[imageType]}"}
+                for step in steps[0]:
+                    record[step] = statistics.median(sample[step] for sample in steps)
+
+                shotTimes = []
+                for _ in range(shots):
+                    start = time.perf_counter()
+                    camera.shot(processor=processor)
+                    shotTimes.append(time.perf_counter() - start)
+                record["shotTime"] = statistics.median(shotTimes)
+                results.append(record)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shots", type=int, default=10)
+    args = parser.parse_args()
+    dump(run(args.shots))
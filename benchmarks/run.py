@@ -0,0 +1,76 @@
+"""
+Runs every benchmark and writes a single JSON document, for regression
+tracking. Given a previous document with --compare, metrics which got worse
+by more than the tolerance are listed and the exit code is 1. Metrics ending
+in "Time" are better when lower, the ones ending in "PerS" when higher.
+
+    PYTHONPATH=. python benchmarks/run.py --output baseline.json
+    PYTHONPATH=. python benchmarks/run.py --compare baseline.json --tolerance 0.25
+"""
+import argparse, json, sys
+
+import bench_buffers, bench_calls, bench_capture, bench_debayer, bench_import, bench_shot
+from _common import metadata
+
+# Suite name, full run, quick run
+suites = [
+    ("calls"  , lambda: bench_calls.run()        , lambda: bench_calls.run(number=200, repeat=3)),
+    ("capture", lambda: bench_capture.run()      , lambda: bench_capture.run(frames=10)),
+    ("shot"   , lambda: bench_shot.run()         , lambda: bench_shot.run(shots=3)),
+    ("buffers", lambda: bench_buffers.run()      , lambda: bench_buffers.run(number=20, repeat=3)),
+    ("debayer", lambda: bench_debayer.run()      , lambda: bench_debayer.run(repeat=3)),
+    ("import" , lambda: bench_import.run()       , lambda: bench_import.run(repeat=3)),
+]
+
+def flatten(document):
+    metrics = {}
+    for suite, records in document["results"].items():
+        for record in records:
+            for metric, value in record.items():
+                if isinstance(value, (int, float)) and (metric.endswith("Time") or metric.endswith("PerS")):
+                    metrics[f"{suite}/{record['name']}/{metric}"] = value
+    return metrics
+
+def compare(baseline, current, tolerance):
+    regressions = []
+    currentMetrics = flatten(current)
+    for key, before in flatten(baseline).items():
+        after = currentMetrics.get(key)
+        if after is None or before <= 0:
+            continue
+        ratio = after / before if key.endswith("Time") else before / after if after > 0 else float("inf")
+        if ratio > 1 + tolerance:
+            regressions.append({"metric": key, "baseline": before, "current": after, "slowdown": ratio})
+    return sorted(regressions, key=lambda regression: -regression["slowdown"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output"   , help="File to write the results to, stdout otherwise")
+    parser.add_argument("--compare"  , help="Previous results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Accepted relative slowdown")
+    parser.add_argument("--quick"    , action="store_true", help="Fewer iterations, for smoke tests")
+    parser.add_argument("--only"     , nargs="+", choices=[name for name, _, _ in suites])
+    args = parser.parse_args()
+
+    document = {"metadata": metadata(), "results": {}}
+    for name, full, quick in suites:
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        document["results"][name] = (quick if args.quick else full)()
+
+    if args.compare:
+        with open(args.compare) as file:
+            document["regressions"] = compare(json.load(file), document, args.tolerance)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    if document.get("regressions"):
+        for regression in document["regressions"]:
+            print(f"Regression: {regression['metric']} {regression['slowdown']:.2f}x slower", file=sys.stderr)
+        sys.exit(1)
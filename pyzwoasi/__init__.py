@@ -1,6 +1,10 @@
 from .pyzwoasi import (
-    ASIError, ASIErrorCode, ASIExposureStatus,
+    ASIError, ASIErrorCode, ASIExposureStatus, ASIImageType, ASIBayerPattern, ASIControlType,
+    ASICameraMode, ASITrigOutputPin,
     CameraInfo, ControlCaps, DateTime, GPSData, ID, SN,
+    loadLibrary,
+    setBackend,
+    defaultLibraryPath,
     getNumOfConnectedCameras,
     getProductIDs,
     cameraCheck,
@@ -13,6 +17,8 @@ from .pyzwoasi import (
     getControlCaps,
     getControlValue,
     setControlValue,
+    getControlValues,
+    setControlValues,
     getROIFormat,
     setROIFormat,
     getStartPos,
@@ -22,10 +28,16 @@ from .pyzwoasi import (
     startVideoCapture,
     stopVideoCapture,
     getVideoData,
+    getVideoDataInto,
+    getVideoDataGPS,
+    getVideoDataGPSInto,
     startExposure,
     stopExposure,
     getExpStatus,
     getDataAfterExp,
+    getDataAfterExpInto,
+    getDataAfterExpGPS,
+    getDataAfterExpGPSInto,
     getID,
     setID,
     getGainOffset,
@@ -35,11 +47,37 @@ from .pyzwoasi import (
     getCameraMode,
     getSerialNumber,
     getTriggerOutputIOConf,
-    getTriggerOutputIOConf
+    getTriggerOutputIOConf,
+    gpsGetData
 )
 
 # High-level convenience class
 from .camera import ZWOCamera
+from .stream import Frame, VideoStream
+from .gps import GPSTable, gpsTimes
+from .framemeta import FrameMeta, FrameMetaTable, frameMetaDtype
+from .wait import WaitStrategy, FixedIntervalWait, BackoffWait
+from .cameraarray import CameraArray
+from .recording import Recorder, SERWriter, FITSWriter
+from .stacking import Stacker
+from .calibration import CalibrationLibrary, Calibrator
+from .tracking import ROITracker, centroid
+from .autoexposure import AutoExposure
+from .trigger import TriggeredCapture
+from .sequence import SequenceRun, SequenceStep, SequenceFrame
+from .governor import FrameRateGovernor, measureFrameRate
+from .simulator import SimulatedCamera, SimulatedLibrary, SimulatedTriggerSource
+from .metrics import MetricsRegistry
+from . import metrics
+
+# AsyncZWOCamera is imported on first use, so that asyncio is only loaded
+# by the programs which need it
+def __getattr__(name):
+    if name == "AsyncZWOCamera":
+        from .asynccamera import AsyncZWOCamera
+        globals()[name] = AsyncZWOCamera
+        return AsyncZWOCamera
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 from importlib.metadata import version, PackageNotFoundError
 try:
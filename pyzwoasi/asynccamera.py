@@ -0,0 +1,159 @@
+import asyncio, concurrent.futures, time
+
+from . import metrics, pyzwoasi
+from .camera     import ZWOCamera
+from .pyzwoasi   import ASIExposureStatus
+from .stream     import VideoStream
+
+class AsyncZWOCamera:
+    """
+    @brief asyncio front-end of ZWOCamera
+
+    @note Every SDK call of a camera runs on its own single worker thread,
+          so that calls to one camera stay ordered while several cameras
+          expose at the same time from a single event loop. Exposures are
+          awaited with asyncio.sleep following the camera waitStrategy,
+          never busy-waited.
+
+          async with await AsyncZWOCamera.open(0) as camera:
+              image = await camera.ashot(exposureTime_us = 100_000)
+    """
+
+    def __init__(self, camera, executor=None):
+        """
+        @param camera   Opened ZWOCamera to drive
+        @param executor Executor running the SDK calls. Defaults to a
+                        dedicated single thread executor
+        """
+        self._camera      = camera
+        self._ownExecutor = executor is None
+        self._executor    = executor or concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ZWOCamera-{camera._cameraIndex}")
+
+    @classmethod
+    async def open(cls, cameraIndex, executor=None):
+        """
+        @brief Opens and initializes a camera without blocking the event loop
+
+        @param cameraIndex Index of the camera, 0 being the first
+        @param executor    See AsyncZWOCamera.__init__
+
+        @return AsyncZWOCamera
+        """
+        ownExecutor = executor is None
+        executor = executor or concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ZWOCamera-{cameraIndex}")
+        camera = await asyncio.get_running_loop().run_in_executor(executor, ZWOCamera, cameraIndex)
+        asyncCamera = cls(camera, executor)
+        asyncCamera._ownExecutor = ownExecutor
+        return asyncCamera
+
+    @property
+    def camera(self):
+        return self._camera
+
+    async def call(self, function, *args):
+        """
+        @brief Runs a blocking function on the camera worker thread
+
+        @param function Callable, for example a pyzwoasi function
+        @param args     Arguments given to the function
+
+        @return Result of the function
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _configure(self, exposureTime_us, imageType):
+        if exposureTime_us is not None:
+            self._camera.exposure  = exposureTime_us
+        if imageType is not None:
+            self._camera.imageType = imageType
+        return self._camera.exposure
+
+    async def _awaitExposure(self, exposureTime_us):
+        # Same schedule as ZWOCamera.shot, with asyncio sleeps in between
+        cameraID = self._camera._cameraIndex
+        polling  = self._camera.waitStrategy.polling(exposureTime_us)
+        try:
+            delay = next(polling)
+            while True:
+                await asyncio.sleep(delay)
+                delay = polling.send(await self.call(pyzwoasi.getExpStatus, cameraID))
+        except StopIteration as stop:
+            return stop.value
+
+    async def ashot(self, exposureTime_us = None, imageType = None, maxFailedRuns = 3):
+        """
+        @brief Takes a single picture, awaiting the exposure end
+
+        @note Cancelling the task stops the running exposure.
+
+        @param exposureTime_us exposure time in microseconds
+        @param imageType       image type, as in ZWOCamera.shot
+        @param maxFailedRuns   number of restarts allowed for failed exposures
+
+        @return NumPy array of the picture
+        """
+        cameraID = self._camera._cameraIndex
+        exposure_us = await self.call(self._configure, exposureTime_us, imageType)
+
+        start      = time.perf_counter()
+        failedRuns = 0
+        await self.call(pyzwoasi.startExposure, cameraID, True)
+        try:
+            while await self._awaitExposure(exposure_us) != ASIExposureStatus.ASI_EXP_SUCCESS:
+                failedRuns = await self.call(self._camera._restartExposure, failedRuns, maxFailedRuns)
+        except BaseException:
+            await asyncio.shield(self.call(pyzwoasi.stopExposure, cameraID))
+            raise
+        metrics.observe("exposure", cameraID, time.perf_counter() - start)
+
+        return await self.call(self._camera._download)
+
+    async def aframes(self, slots=8, policy=VideoStream.BLOCK, waitms=None, pollInterval=0.1):
+        """
+        @brief Asynchronous iterator over video frames
+
+        @note With the default VideoStream.BLOCK policy a slow consumer pauses
+              the capture thread instead of losing frames. Frames are views on
+              the ring buffer, valid until the next frame is requested. Leaving
+              the loop, or cancelling the task, stops the video capture.
+
+              async for frame in camera.aframes():
+                  process(frame.image)
+
+        @param slots        Number of frames held by the ring buffer
+        @param policy       VideoStream.BLOCK or VideoStream.OVERWRITE
+        @param waitms       Timeout of each SDK call in milliseconds
+        @param pollInterval Longest time, in seconds, a worker thread waits
+                            for a frame before checking for cancellation
+
+        @return Asynchronous generator of Frame(image, sequence, timestamp)
+        """
+        loop   = asyncio.get_running_loop()
+        stream = await self.call(self._camera.stream, slots, policy, waitms)
+        await self.call(stream.start)
+        try:
+            while True:
+                # Frames are awaited outside of the camera worker, so that
+                # controls can still be changed while streaming
+                frame = await loop.run_in_executor(None, stream.read, pollInterval)
+                if frame is None:
+                    if not stream.running:
+                        return
+                    continue
+                yield frame
+        finally:
+            await asyncio.shield(self.call(stream.stop))
+
+    async def close(self):
+        """
+        @brief Closes the camera and releases the worker thread
+        """
+        await self.call(self._camera.close)
+        if self._ownExecutor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exceptionType, exceptionValue, traceback):
+        await self.close()
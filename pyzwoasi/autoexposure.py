@@ -0,0 +1,248 @@
+import math, time
+
+import numpy as np
+
+from .stream import VideoStream
+
+def histogram(image, step=3):
+    """
+    @brief 256 bins histogram of a subsampled frame
+
+    @note 16 bits frames are binned on their most significant byte, which
+          holds the full scale as the SDK aligns RAW16 data on the MSB. Odd
+          steps sample every color of a Bayer pattern.
+
+    @param image Integer frame, 2D or (H, W, 3)
+    @param step  Subsampling step, 1 to use every pixel
+
+    @return Array of 256 counts
+    """
+    if not np.issubdtype(image.dtype, np.integer):
+        raise ValueError(f"Histogram needs integer frames, got {image.dtype}")
+    view = image[::step, ::step] if step > 1 else image
+    values = view.ravel()
+    if image.itemsize > 1:
+        values = values >> (8 * image.itemsize - 8)
+    return np.bincount(values, minlength=256)
+
+def brightness(counts, percentile=None):
+    """
+    @brief Brightness of a frame from its histogram, see histogram
+
+    @param counts     Histogram of 256 bins
+    @param percentile Percentile to measure, between 0 and 100, None for the
+                      mean
+
+    @return Brightness as a fraction of the full scale, between 0 and 1
+    """
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    if percentile is None:
+        return float(counts @ np.arange(0.5, 256)) / total / 256
+    index = int(np.searchsorted(np.cumsum(counts), total * percentile / 100))
+    return (min(index, 255) + 0.5) / 256
+
+class AutoExposure:
+    """
+    @brief Video stream whose exposure and gain are adjusted in software to
+           keep the frames at a target brightness
+
+    @note Each frame read is measured on a subsampled histogram. When its
+          brightness is off target by more than tolerance, the exposure and
+          gain product is scaled by the brightness ratio: exposure is raised
+          first, up to maxExposure_us, then gain, and gain is lowered first.
+          Gain is taken in 0.1 dB steps, as on most ZWO cameras. Both are set
+          with a single setControls call while the capture keeps running,
+          the frames exposed before a change are not measured.
+    """
+    def __init__(self, camera, target=0.45, percentile=None, tolerance=0.1, slots=8, policy=VideoStream.OVERWRITE,
+                 waitms=None, processor=None, maxExposure_us=100_000, maxGain=None, autoGain=True, step=3, settleFrames=1):
+        """
+        @param camera         ZWOCamera
+        @param target         Brightness to reach, as a fraction of the full
+                              scale
+        @param percentile     Percentile of the frame brought to target,
+                              e.g. 99 not to saturate stars, None for the
+                              mean
+        @param tolerance      Relative brightness error under which the
+                              settings are not changed
+        @param slots          Number of frames of the ring buffer
+        @param policy         VideoStream.OVERWRITE or VideoStream.BLOCK
+        @param waitms         Timeout of each SDK call in milliseconds,
+                              defaults to fit maxExposure_us
+        @param processor      Optional processor applied to each frame read,
+                              its output must be an integer frame
+        @param maxExposure_us Longest exposure set, clamped to the exposure
+                              limits of the camera
+        @param maxGain        Highest gain set, the camera maximum if None
+        @param autoGain       False to only adjust the exposure
+        @param step           Subsampling step of the histograms
+        @param settleFrames   Frames skipped after a change, as the SDK may
+                              deliver frames already exposed
+        """
+        self._camera       = camera
+        self._target       = target
+        self._percentile   = percentile
+        self._tolerance    = tolerance
+        self._slots        = slots
+        self._policy       = policy
+        self._processor    = processor
+        self._autoGain     = autoGain
+        self._step         = step
+        self._settleFrames = settleFrames
+
+        exposure = camera._controls["Exposure"]
+        gain     = camera._controls.get("Gain")
+        self._exposureLimits = (exposure.minValue, min(maxExposure_us, exposure.maxValue))
+        self._gainLimits     = (gain.minValue, gain.maxValue if maxGain is None else min(maxGain, gain.maxValue)) if gain is not None else (0, 0)
+        self._waitms         = waitms if waitms is not None else int(2 * self._exposureLimits[1] / 1000 + 500)
+        self._stream         = None
+
+        self._exposure       = None
+        self._gain           = None
+        self._changedAt      = 0.0
+        self._settle         = 0
+        self._level          = None
+        self._adjustments    = 0
+        self._limited        = False
+        self._converged      = False
+        self._framesMeasured = 0
+        self._convergeFrames = None
+        self._convergeTime   = None
+        self._startTime      = None
+
+    def start(self):
+        """
+        @brief Starts the stream from the current exposure and gain
+        """
+        if self._stream is not None and self._stream.running:
+            return self
+        controls = self._camera.getControls(["Exposure", "Gain"] if "Gain" in self._camera._controls else ["Exposure"])
+        self._exposure  = controls["Exposure"]
+        self._gain      = controls.get("Gain", 0)
+        self._startTime = time.perf_counter()
+        self._stream    = self._camera.stream(self._slots, self._policy, self._waitms, self._processor)
+        self._stream.start()
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+
+    def _settings(self, ratio):
+        # Exposure and gain giving ratio times the current signal
+        gainMin, gainMax = self._gainLimits if self._autoGain else (self._gain, self._gain)
+        exposureMin, exposureMax = self._exposureLimits
+        signal   = self._exposure * 10 ** (self._gain / 200) * ratio
+        exposure = min(max(signal / 10 ** (gainMin / 200), exposureMin), exposureMax)
+        gain     = min(max(200 * math.log10(signal / exposure), gainMin), gainMax) if signal > 0 else gainMin
+        return int(round(exposure)), int(round(gain))
+
+    def update(self, frame):
+        """
+        @brief Measures a frame and adjusts exposure and gain if needed
+
+        @note Called by read for every frame, only needed when frames are
+              read from the underlying stream directly
+
+        @param frame Frame of the stream
+
+        @return True if the settings were changed
+        """
+        if frame.timestamp <= self._changedAt:
+            return False
+        if self._settle > 0:
+            self._settle -= 1
+            return False
+
+        self._framesMeasured += 1
+        level = self._level = brightness(histogram(frame.image, self._step), self._percentile)
+        if abs(level - self._target) <= self._tolerance * self._target:
+            if self._convergeTime is None:
+                self._convergeFrames = self._framesMeasured
+                self._convergeTime   = time.perf_counter() - self._startTime
+            self._converged = True
+            return False
+        self._converged = False
+
+        # Saturated or black frames do not tell how far off they are, the
+        # signal is then changed by a bounded factor
+        ratio = self._target / max(level, 1 / 256) if level < 0.98 else 0.25
+        ratio = min(max(ratio, 1 / 16), 16)
+        exposure, gain = self._settings(ratio)
+        self._limited = (exposure, gain) == (self._exposure, self._gain)
+        if self._limited:
+            return False
+
+        controls = {"Exposure": exposure}
+        if self._autoGain and "Gain" in self._camera._controls:
+            controls["Gain"] = gain
+        self._camera.setControls(controls)
+        self._exposure, self._gain = exposure, gain
+        self._changedAt    = time.time()
+        self._settle       = self._settleFrames
+        self._adjustments += 1
+        return True
+
+    def read(self, timeout=None):
+        """
+        @brief Waits for the next frame and adjusts the settings on it, see
+               VideoStream.read
+        """
+        frame = self._stream.read(timeout)
+        if frame is not None:
+            self.update(frame)
+        return frame
+
+    @property
+    def converged(self):
+        """
+        @brief True if the last frame measured was on target
+        """
+        return self._converged
+
+    @property
+    def statistics(self):
+        """
+        @brief Snapshot of the auto exposure statistics
+
+        @return Dictionary with the VideoStream statistics, plus:
+                 - brightness     : brightness of the last frame measured
+                 - exposure       : current exposure in us
+                 - gain           : current gain
+                 - converged      : last frame measured was on target
+                 - limited        : target out of reach within the limits
+                 - adjustments    : settings changes
+                 - framesMeasured : frames measured
+                 - convergeFrames : frames measured until the first frame on
+                                    target, None if not reached yet
+                 - convergeTime   : seconds from start to the first frame on
+                                    target, None if not reached yet
+        """
+        statistics = self._stream.statistics if self._stream is not None else {}
+        statistics.update({
+            "brightness"     : self._level,
+            "exposure"       : self._exposure,
+            "gain"           : self._gain,
+            "converged"      : self._converged,
+            "limited"        : self._limited,
+            "adjustments"    : self._adjustments,
+            "framesMeasured" : self._framesMeasured,
+            "convergeFrames" : self._convergeFrames,
+            "convergeTime"   : self._convergeTime,
+        })
+        return statistics
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.stop()
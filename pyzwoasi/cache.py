@@ -0,0 +1,81 @@
+import json, os, platform, threading
+
+# Environment variable overriding the directory of the on-disk caches
+cacheDirectoryVariable = "PYZWOASI_CACHE"
+
+def cacheDirectory():
+    """
+    @brief Gets the directory where pyzwoasi keeps its on-disk caches
+
+    @note Set by the PYZWOASI_CACHE environment variable, otherwise the user
+          cache directory of the system
+
+    @return Path of the directory, which may not exist yet
+    """
+    directory = os.environ.get(cacheDirectoryVariable)
+    if directory:
+        return directory
+    system = platform.system()
+    if   system == 'Windows':
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif system == 'Darwin':
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pyzwoasi")
+
+class JSONCache:
+    """
+    @brief Small key-value store kept in a JSON file
+
+    @note The file is read on first access and rewritten atomically on each
+          change, so that a crash never leaves a truncated cache. An
+          unreadable file is treated as an empty cache.
+    """
+    def __init__(self, name, directory=None):
+        """
+        @param name      File name of the cache
+        @param directory Directory of the file, see cacheDirectory by default
+        """
+        self._path    = os.path.join(directory or cacheDirectory(), name)
+        self._lock    = threading.Lock()
+        self._entries = None
+
+    @property
+    def path(self):
+        return self._path
+
+    def _load(self):
+        # Called with the lock held
+        if self._entries is None:
+            try:
+                with open(self._path) as file:
+                    self._entries = json.load(file)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        with open(self._path + ".tmp", "w") as file:
+            json.dump(self._entries, file, indent=2)
+        os.replace(self._path + ".tmp", self._path)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._load()[key] = value
+            self._save()
+
+    def remove(self, key):
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
@@ -0,0 +1,275 @@
+import json, os, threading, time
+
+import numpy as np
+
+from . import pyzwoasi
+
+def cameraState(camera):
+    """
+    @brief Reads the settings which calibration masters depend on
+
+    @param camera ZWOCamera
+
+    @return Dictionary with exposure (us), gain, temperature (degrees
+            Celsius, None without sensor), binning, roi (width, height,
+            startX, startY) and imageType
+    """
+    width, height, binning, imageType = camera.roi
+    startX, startY = pyzwoasi.getStartPos(camera._cameraIndex)
+    temperature = None
+    if "Temperature" in camera._controls:
+        # Tenths of degree Celsius
+        temperature = camera.getControls(["Temperature"])["Temperature"] / 10
+    return {
+        "exposure"   : camera.exposure,
+        "gain"       : camera.gain,
+        "temperature": temperature,
+        "binning"    : binning,
+        "roi"        : [width, height, startX, startY],
+        "imageType"  : int(imageType),
+    }
+
+class CalibrationLibrary:
+    """
+    @brief Master bias, dark and flat frames, indexed by the camera settings
+           they were taken with and stored in a directory
+
+    @note Masters are float32 .npy files listed in an index.json file. They
+          are opened memory-mapped and kept open, so that switching between
+          settings does not read them again and that several processes can
+          share them through the page cache.
+
+    Matching rules of find():
+      - every master must have the same binning, ROI and image type
+      - bias and dark must have the same gain, and a temperature within
+        temperatureTolerance of the requested one (the closest wins)
+      - dark must have the same exposure
+      - flat is the most recent one
+    """
+
+    BIAS = "bias"
+    DARK = "dark"
+    FLAT = "flat"
+
+    def __init__(self, directory):
+        """
+        @param directory Directory of the masters, created if needed
+        """
+        self._directory = directory
+        self._lock      = threading.Lock()
+        self._maps      = {}
+        os.makedirs(directory, exist_ok=True)
+
+        self._indexPath = os.path.join(directory, "index.json")
+        self._entries   = []
+        if os.path.exists(self._indexPath):
+            with open(self._indexPath) as file:
+                self._entries = json.load(file)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def masters(self, kind=None):
+        """
+        @brief Lists the masters of the library
+
+        @param kind CalibrationLibrary.BIAS, DARK or FLAT, None for all
+
+        @return List of entries (kind, file, created and the camera state)
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._entries if kind is None or entry["kind"] == kind]
+
+    def add(self, kind, master, state):
+        """
+        @brief Stores a master frame
+
+        @param kind   CalibrationLibrary.BIAS, DARK or FLAT
+        @param master Master frame, stored as float32
+        @param state  Camera settings of the master, see cameraState
+
+        @return Entry of the master
+        """
+        if kind not in (self.BIAS, self.DARK, self.FLAT):
+            raise ValueError(f"Unknown master kind {kind}")
+
+        with self._lock:
+            entry = dict(state, kind=kind, created=time.time(), file=f"{kind}-{len(self._entries):04d}-{int(time.time())}.npy")
+            stored = np.lib.format.open_memmap(os.path.join(self._directory, entry["file"]), mode="w+", dtype=np.float32, shape=master.shape)
+            np.copyto(stored, master, casting="unsafe")
+            stored.flush()
+            del stored
+
+            self._entries.append(entry)
+            with open(self._indexPath + ".tmp", "w") as file:
+                json.dump(self._entries, file, indent=2)
+            os.replace(self._indexPath + ".tmp", self._indexPath)
+        return dict(entry)
+
+    def load(self, entry):
+        """
+        @brief Opens a master, memory-mapped and read-only
+
+        @param entry Entry as returned by masters, add or find
+        """
+        with self._lock:
+            master = self._maps.get(entry["file"])
+            if master is None:
+                master = self._maps[entry["file"]] = np.load(os.path.join(self._directory, entry["file"]), mmap_mode="r")
+            return master
+
+    def find(self, kind, state, temperatureTolerance=2.0):
+        """
+        @brief Finds the master matching camera settings
+
+        @param kind                 CalibrationLibrary.BIAS, DARK or FLAT
+        @param state                Camera settings, see cameraState
+        @param temperatureTolerance Accepted temperature difference in
+                                    degrees Celsius
+
+        @return Entry of the best master, None if none matches
+        """
+        candidates = [entry for entry in self.masters(kind)
+                      if entry["binning"] == state["binning"] and list(entry["roi"]) == list(state["roi"])
+                      and entry["imageType"] == int(state["imageType"])]
+
+        if kind == self.FLAT:
+            return max(candidates, key=lambda entry: entry["created"], default=None)
+
+        candidates = [entry for entry in candidates if entry["gain"] == state["gain"]]
+        if kind == self.DARK:
+            candidates = [entry for entry in candidates if entry["exposure"] == state["exposure"]]
+
+        def temperatureGap(entry):
+            if entry["temperature"] is None or state["temperature"] is None:
+                return 0.0
+            return abs(entry["temperature"] - state["temperature"])
+        candidates = [entry for entry in candidates if temperatureGap(entry) <= temperatureTolerance]
+        return min(candidates, key=lambda entry: (temperatureGap(entry), -entry["created"]), default=None)
+
+    def build(self, camera, kind, frames=32, sigmaClip=3.0, video=False):
+        """
+        @brief Captures a stack with the current camera settings and stores
+               its master
+
+        @note The user is in charge of the light: covered for bias and dark,
+              evenly lit for flat. Flats are reduced by the matching dark, or
+              bias, then normalized to a mean of 1.
+
+        @param camera    ZWOCamera
+        @param kind      CalibrationLibrary.BIAS, DARK or FLAT
+        @param frames    Number of frames to stack
+        @param sigmaClip Rejection threshold of the stack, None for a plain mean
+        @param video     Stacks video frames if True, snapshots otherwise
+
+        @return Entry of the master
+        """
+        state  = cameraState(camera)
+        master = camera.stack(frames, video=video, sigmaClip=sigmaClip).mean.copy()
+
+        if kind == self.FLAT:
+            offset = self.find(self.DARK, state) or self.find(self.BIAS, state)
+            if offset is not None:
+                np.subtract(master, self.load(offset), out=master)
+            level = float(master.mean())
+            if level <= 0:
+                raise ValueError(f"Flat frame has a mean level of {level}, is the light on?")
+            master /= level
+
+        return self.add(kind, master, state)
+
+    def calibrator(self, state, processor=None, keepType=True, temperatureTolerance=2.0):
+        """
+        @brief Calibrator using the masters matching camera settings
+
+        @note The dark is subtracted if one matches, otherwise the bias.
+              Without any master the frames go through unchanged.
+
+        @param state     Camera settings, see cameraState
+        @param processor Optional processor applied after calibration
+        @param keepType  See Calibrator
+
+        @return Calibrator
+        """
+        dark = self.find(self.DARK, state, temperatureTolerance) or self.find(self.BIAS, state, temperatureTolerance)
+        flat = self.find(self.FLAT, state)
+        return Calibrator(self.load(dark) if dark is not None else None,
+                          self.load(flat) if flat is not None else None,
+                          keepType, processor)
+
+class Calibrator:
+    """
+    @brief Applies (frame - dark) / flat to every frame, as a processor of
+           ZWOCamera.shot or VideoStream
+
+    @note The flat reciprocal is computed once, then every frame costs one
+          subtraction and one multiplication into buffers reused from frame
+          to frame. The returned image is overwritten by the next call.
+    """
+    def __init__(self, dark=None, flat=None, keepType=True, processor=None, pedestal=0):
+        """
+        @param dark      Master dark (or bias) to subtract, None for none
+        @param flat      Master flat normalized to 1, None for none
+        @param keepType  Returns frames of the input type, clipped and
+                         rounded, so that they can go through a
+                         ColorProcessor. Returns float32 frames otherwise
+        @param processor Optional processor, e.g. ColorProcessor, applied
+                         to the calibrated frame
+        @param pedestal  Value added after calibration, to keep the noise
+                         of dark pixels above 0 when keepType is set
+        """
+        self._dark      = dark
+        self._gain      = None
+        self._keepType  = keepType
+        self._processor = processor
+        self._pedestal  = pedestal
+        self._key       = None
+
+        if flat is not None:
+            # Dead pixels of the flat are left uncorrected instead of blown up
+            flat = np.asarray(flat, dtype=np.float32)
+            self._gain = np.ones(flat.shape, dtype=np.float32)
+            np.divide(1.0, flat, out=self._gain, where=flat > 1e-3)
+
+    def _prepare(self, frame):
+        key = (frame.shape, frame.dtype)
+        if key == self._key:
+            return
+        for master in (self._dark, self._gain):
+            if master is not None and master.shape != frame.shape:
+                raise ValueError(f"Master shape {master.shape} does not match the frame shape {frame.shape}")
+        self._buffer = np.empty(frame.shape, dtype=np.float32)
+        self._output = np.empty(frame.shape, dtype=frame.dtype) if self._keepType else None
+        self._limit  = np.iinfo(frame.dtype).max if frame.dtype.kind == "u" else None
+        self._key    = key
+
+    def __call__(self, frame, imageType=None):
+        """
+        @param frame     Frame as returned by ZWOCamera.shot or a video stream
+        @param imageType ASIImageType of the frame, given to the processor
+
+        @return Calibrated frame, reused buffer
+        """
+        self._prepare(frame)
+        buffer = self._buffer
+        if self._dark is not None:
+            np.subtract(frame, self._dark, out=buffer)
+        else:
+            np.copyto(buffer, frame)
+        if self._gain is not None:
+            np.multiply(buffer, self._gain, out=buffer)
+
+        if self._keepType and self._limit is not None:
+            np.add(buffer, self._pedestal + 0.5, out=buffer) # Rounds on truncation
+            np.clip(buffer, 0, self._limit, out=buffer)
+            np.copyto(self._output, buffer, casting="unsafe")
+            image = self._output
+        else:
+            if self._pedestal:
+                np.add(buffer, self._pedestal, out=buffer)
+            image = buffer
+
+        if self._processor is not None:
+            return self._processor(image, imageType)
+        return image
@@ -1,19 +1,68 @@
-import ctypes
+import collections, ctypes
 import numpy as np, time
 
-from . import pyzwoasi
-from .pyzwoasi import ASIExposureStatus, ASIError, ASIImageType
+from . import metrics, pyzwoasi
+from .pyzwoasi import ASICameraMode, ASIControlType, ASIExposureStatus, ASIError, ASIErrorCode, ASIImageType, ASITrigOutputPin
+from .stream   import VideoStream
+from .wait     import BackoffWait
+from .processing import BitDepthConverter, ColorProcessor, Debayer
+from .recording  import Recorder
+from .stacking   import Stacker
+from .calibration import cameraState
+from .tracking    import ROITracker
+from .autoexposure import AutoExposure
+from .trigger      import TriggeredCapture
+from .sequence     import SequenceRun
+from .framemeta    import FrameMeta
+from .governor    import FrameRateGovernor
+from .capabilities import defaultCapabilityCache, enumerateControlCaps
+
+class Control(collections.namedtuple("Control", "name controlType minValue maxValue defaultValue isWritable isAutoSupported description")):
+    """
+    @brief Capabilities of one camera control, see ZWOCamera.controls
+    """
+    __slots__ = ()
+
+    @classmethod
+    def fromCaps(cls, controlCaps):
+        try:
+            controlType = ASIControlType(controlCaps.ControlType)
+        except ValueError:
+            # Control added by a newer SDK
+            controlType = controlCaps.ControlType
+        return cls(controlCaps.Name.decode('utf-8'), controlType, controlCaps.MinValue, controlCaps.MaxValue,
+                   controlCaps.DefaultValue, bool(controlCaps.IsWritable), bool(controlCaps.IsAutoSupported),
+                   controlCaps.Description.decode('utf-8'))
 
 class ZWOCamera:
-    def __init__(self, cameraIndex):
+    def __init__(self, cameraIndex, checkConsistency=False, useCache=True, capabilityCache=None):
+        """
+        @param cameraIndex      Index of the camera, from 0 to the number of
+                                connected cameras - 1
+        @param checkConsistency Checks every cached ROI format read against
+                                the SDK
+        @param useCache         Takes the control capabilities of known
+                                cameras from the on-disk cache
+        @param capabilityCache  CapabilityCache to use instead of the
+                                default one
+        """
         self._cameraIndex = cameraIndex
 
+        # ROI format is cached and only updated by this class setters. When
+        # checkConsistency is set, every cached read is checked against the
+        # SDK, which helps finding code changing the format behind our back.
+        self.checkConsistency = checkConsistency
+
         # Opening and initializing camera
         pyzwoasi.openCamera(self._cameraIndex)
         pyzwoasi.initCamera(self._cameraIndex)
 
         self._isClosed = False
 
+        # Engine used by shot() to wait for the end of exposures. Can be
+        # replaced by any pyzwoasi.wait.WaitStrategy.
+        self.waitStrategy = BackoffWait()
+
         # Let's get some information about the chosen camera
         cameraInfo = pyzwoasi.getCameraProperty(self._cameraIndex)
 
@@ -35,95 +84,200 @@ class ZWOCamera:
         self._bitDepth             = cameraInfo.BitDepth
         self._isTriggerCam         = bool(cameraInfo.IsTriggerCam)
 
-        # Read and save all camera controls for the getters/setters.
-        numOfControls = pyzwoasi.getNumOfControls(self._cameraIndex)
-        self._dictControlID = {}
-        self._dictControlIDMin = {}
-        self._dictControlIDMax = {}
-        for controlIndex in range(numOfControls):
-            controlCaps = pyzwoasi.getControlCaps(self._cameraIndex, controlIndex)
-            controlName = controlCaps.Name.decode('utf-8')
-            self._dictControlID[controlName] = controlIndex
-            self._dictControlIDMin[controlName] = controlCaps.MinValue
-            self._dictControlIDMax[controlName] = controlCaps.MaxValue
+        # Current ROI format, kept in sync by the setters below
+        self.refresh()
+
+        # Last known control values, used by setControls to skip writes which
+        # would not change anything
+        self._lastControlValues = {}
+        self._updateMetaState()
 
-            # Initialize both the exposure time and image type with default values
+        # Read and save all camera controls for the getters/setters. Known
+        # cameras get them from the on-disk cache instead of one USB request
+        # per control, they are checked against the camera on first mismatch.
+        self._capabilityCache = capabilityCache if capabilityCache is not None else (defaultCapabilityCache() if useCache else None)
+        if self._capabilityCache is not None:
+            controls, self._capabilityKey, self._capabilitiesCached = self._capabilityCache.load(self._cameraIndex, self._name)
+        else:
+            controls, self._capabilityKey, self._capabilitiesCached = enumerateControlCaps(self._cameraIndex), None, False
+        self._setControlCaps(controls)
+
+        # Initialize both the exposure time and image type with default values
+        for controlCaps in controls:
+            controlName = controlCaps.Name.decode('utf-8')
             if controlName == "Exposure"  : self.exposure  = controlCaps.DefaultValue
             if controlName == "Image Type": self.imageType = controlCaps.DefaultValue
+        self.resetControlStatistics()
 
-    @property
-    def imageType(self):
-        _, _, _, imageType = pyzwoasi.getROIFormat(self._cameraIndex)
-        return   imageType
+    def _setControlCaps(self, controls):
+        # Table of the controls by name, so that every access is a single
+        # SDK call with the right control type and no capability query
+        self._controlCaps = controls
+        self._controls    = {}
+        for controlCaps in controls:
+            control = Control.fromCaps(controlCaps)
+            self._controls[control.name] = control
+
+        # Layout of the control snapshots
+        self._snapshotDtype = np.dtype([("timestamp", np.float64)] + [(controlName, np.int64) for controlName in self._controls])
 
     @property
-    def bufferSize(self):
-        width, height, _, imageType = pyzwoasi.getROIFormat(self._cameraIndex)
+    def controls(self):
+        """
+        @brief Capabilities of the camera controls
+
+        @return Dictionary mapping control names to Control(name, controlType,
+                minValue, maxValue, defaultValue, isWritable, isAutoSupported,
+                description)
+        """
+        return dict(self._controls)
+
+    def _getControlValue(self, controlName, label):
+        control = self._controls.get(controlName)
+        if control is None:
+            print(f"{label} control not available for this camera.")
+            return None
+        return pyzwoasi.getControlValue(self._cameraIndex, control.controlType)[0]
+
+    def _setControlValue(self, controlName, value, label, valueLabel):
+        control = self._controls.get(controlName)
+        if control is None:
+            print(f"{label} control not available for this camera.")
+            return
+        if not control.minValue <= value <= control.maxValue:
+            raise ValueError(f"{valueLabel} out of range. Selected value is {value} and range "
+                             f"is [{control.minValue}, {control.maxValue}].")
+        if not control.isWritable:
+            print(f"{label} control not writable for this camera.")
+            return
+        pyzwoasi.setControlValue(self._cameraIndex, control.controlType, value, auto=False)
+        self._lastControlValues[controlName] = value
+        self._updateMetaState()
+
+    def _updateMetaState(self):
+        # Exposure, gain and temperature tagged on the next frames. The tuple
+        # is replaced as a whole, so that capture threads read a consistent
+        # state without touching the control cache
+        cached = self._lastControlValues
+        self._metaState = (cached.get("Exposure", 0), cached.get("Gain", 0), cached.get("Temperature"))
+
+    def _controlLimits(self, controlName, label):
+        control = self._controls.get(controlName)
+        if control is None:
+            print(f"{label} control not available for this camera.")
+            return (None, None)
+        return (control.minValue, control.maxValue)
+
+    def validateCapabilities(self):
+        """
+        @brief Checks the control capabilities taken from the cache against
+               the camera, and replaces them if they differ
+
+        @note Done automatically the first time a control name is unknown or
+              the SDK rejects a control, only needed to force the check
+
+        @return True if the cached capabilities were right
+        """
+        controls = enumerateControlCaps(self._cameraIndex)
+        valid    = [bytes(controlCaps) for controlCaps in controls] == [bytes(controlCaps) for controlCaps in self._controlCaps]
+        if not valid:
+            self._setControlCaps(controls)
+            if self._capabilityCache is not None:
+                self._capabilityCache.set(self._capabilityKey, controls)
+        self._capabilitiesCached = False
+        return valid
+
+    def refresh(self):
+        """
+        @brief Reads the ROI format back from the SDK into the cache
+
+        @note Only needed if the format has been changed without using this
+              class, for example by calling pyzwoasi.setROIFormat directly
+        """
+        self._cacheROIFormat(*pyzwoasi.getROIFormat(self._cameraIndex))
+
+    def _cacheROIFormat(self, width, height, binning, imageType):
+        # Frame geometry is computed once here instead of once per frame
+        imageType = ASIImageType(imageType)
         if   imageType == ASIImageType.ASI_IMG_RAW8 or imageType == ASIImageType.ASI_IMG_Y8:
-            bytesPerPixel = 1
+            shape, dtype = (height, width), np.dtype(np.uint8)
         elif imageType == ASIImageType.ASI_IMG_RAW16:
-            bytesPerPixel = 2
+            shape, dtype = (height, width), np.dtype(np.uint16)
         elif imageType == ASIImageType.ASI_IMG_RGB24:
-            bytesPerPixel = 3
+            shape, dtype = (height, width, 3), np.dtype(np.uint8)
         else:
             raise ValueError('Unsupported image type')
 
-        return width * height * bytesPerPixel
+        self._roiFormat  = (width, height, binning, imageType)
+        self._frameShape = shape
+        self._frameDtype = dtype
+        self._bufferSize = int(np.prod(shape)) * dtype.itemsize
+
+    def _setROIFormat(self, width, height, binning, imageType):
+        # Write-through: the cache is only updated once the SDK accepted it
+        pyzwoasi.setROIFormat(self._cameraIndex, width, height, binning, imageType)
+        self._cacheROIFormat(width, height, binning, imageType)
+
+    def _getROIFormat(self):
+        if self.checkConsistency:
+            roiFormat = pyzwoasi.getROIFormat(self._cameraIndex)
+            if roiFormat != self._roiFormat:
+                raise ValueError(f"Cached ROI format {self._roiFormat} differs from camera ROI format {roiFormat}. "
+                                 f"Use refresh() after changing the format outside of ZWOCamera.")
+        return self._roiFormat
+
+    @property
+    def imageType(self):
+        _, _, _, imageType = self._getROIFormat()
+        return   imageType
+
+    @property
+    def bufferSize(self):
+        self._getROIFormat()
+        return self._bufferSize
+
+    @property
+    def frameShape(self):
+        self._getROIFormat()
+        return self._frameShape
+
+    @property
+    def frameDtype(self):
+        self._getROIFormat()
+        return self._frameDtype
 
     @imageType.setter
     def imageType(self, imageType):
-        wd, ht, binning, _ = pyzwoasi.getROIFormat(self._cameraIndex)
-        pyzwoasi.setROIFormat(self._cameraIndex, wd, ht, binning, imageType)
+        wd, ht, binning, _ = self._getROIFormat()
+        self._setROIFormat(wd, ht, binning, imageType)
 
     @property
     def exposure(self):
-        try:
-            return pyzwoasi.getControlValue(self._cameraIndex, self._dictControlID["Exposure"])[0]
-        except KeyError:
-            print("Exposure control not available for this camera.")
-            return None
+        return self._getControlValue("Exposure", "Exposure")
 
     @exposure.setter
     def exposure(self, exposureTime_us):
-        if self._dictControlIDMin["Exposure"] <= exposureTime_us <= self._dictControlIDMax["Exposure"]:
-            try:
-                pyzwoasi.setControlValue(self._cameraIndex, self._dictControlID["Exposure"], exposureTime_us, auto=False)
-            except KeyError:
-                print("Exposure control not available for this camera.")
-        else:
-            raise ValueError(f"Exposure time out of range. Selected value is {exposureTime_us} and range "
-                       f"is [{self._dictControlIDMin["Exposure"]}, {self._dictControlIDMax["Exposure"]}].")
+        self._setControlValue("Exposure", exposureTime_us, "Exposure", "Exposure time")
 
     @property
     def exposureLimits(self):
-        try:
-            return (self._dictControlIDMin["Exposure"], self._dictControlIDMax["Exposure"])
-        except KeyError:
-            print("Exposure control not available for this camera.")
-            return (None, None)
+        return self._controlLimits("Exposure", "Exposure")
 
     @property
     def gain(self):
-        try:
-            return pyzwoasi.getControlValue(self._cameraIndex, self._dictControlID["Gain"])[0]
-        except KeyError:
-            print("Gain control not available for this camera.")
-            return None
+        return self._getControlValue("Gain", "Gain")
 
     @gain.setter
     def gain(self, gainValue):
-        if self._dictControlIDMin["Gain"] <= gainValue <= self._dictControlIDMax["Gain"]:
-            try:
-                pyzwoasi.setControlValue(self._cameraIndex, self._dictControlID["Gain"], gainValue, auto=False)
-            except KeyError:
-                print("Gain control not available for this camera.")
-        else:
-            raise ValueError(f"Gain value out of range. Selected value is {gainValue} and range "
-                      f"is [{self._dictControlIDMin["Gain"]}, {self._dictControlIDMax["Gain"]}].")
+        self._setControlValue("Gain", gainValue, "Gain", "Gain value")
+
+    @property
+    def gainLimits(self):
+        return self._controlLimits("Gain", "Gain")
 
     @property
     def softwareBinning(self):
-        _, _, binning, _ = pyzwoasi.getROIFormat(self._cameraIndex)
+        _, _, binning, _ = self._getROIFormat()
         return binning
 
     @softwareBinning.setter
@@ -131,96 +285,233 @@ class ZWOCamera:
         if binning not in self._supportedBins:
             raise ValueError(f"Binning value {binning} is not supported. Supported values are: {self._supportedBins}")
 
-        width, height, _, imageType = pyzwoasi.getROIFormat(self._cameraIndex)
-        pyzwoasi.setROIFormat(self._cameraIndex, int(width / binning), int(height / binning), binning, imageType)
+        width, height, _, imageType = self._getROIFormat()
+        self._setROIFormat(int(width / binning), int(height / binning), binning, imageType)
 
     @property
     def hardwareBinning(self):
-        try:
-            return pyzwoasi.getControlValue(self._cameraIndex, self._dictControlID["HardwareBin"])[0]
-        except KeyError:
-            print("Hardware binning control not available for this camera.")
-            return None
+        return self._getControlValue("HardwareBin", "Hardware binning")
 
     @hardwareBinning.setter
     def hardwareBinning(self, hardwareBinningArg):
-        if self._dictControlIDMin["HardwareBin"] <= hardwareBinningArg <= self._dictControlIDMax["HardwareBin"]:
-            try:
-                controlCaps = pyzwoasi.getControlCaps(self._cameraIndex, self._dictControlID["HardwareBin"])
-                if controlCaps.IsWritable == False:
-                    print("Hardware binning control not writable for this camera.")
-                    return
-
-                pyzwoasi.setControlValue(self._cameraIndex, self._dictControlID["HardwareBin"], hardwareBinningArg, auto=False)
-
-            except KeyError:
-                print("Hardware binning control not available for this camera.")
-        else:
-            raise ValueError(f"Hardware binning value out of range. Selected value is {hardwareBinningArg} and range "
-                             f"is [{self._dictControlIDMin["HardwareBin"]}, {self._dictControlIDMax["HardwareBin"]}].")
+        self._setControlValue("HardwareBin", hardwareBinningArg, "Hardware binning", "Hardware binning value")
 
     @property
     def hardwareBinningLimits(self):
-        try:
-            return (self._dictControlIDMin["HardwareBin"], self._dictControlIDMax["HardwareBin"])
-        except KeyError:
-            print("Hardware binning control not available for this camera.")
-            return (None, None)
+        return self._controlLimits("HardwareBin", "Hardware binning")
 
     @property
     def roi(self):
-        width, height, binning, imageType = pyzwoasi.getROIFormat(self._cameraIndex)
-        return (width, height, binning, imageType)
+        return self._getROIFormat()
 
     def setROI(self, width, height, binning=None, imageType=None):
-        if binning   is None: binning   = self.softwareBinning
-        if imageType is None: imageType = self.imageType
+        _, _, currentBinning, currentImageType = self._getROIFormat()
+        if binning   is None: binning   = currentBinning
+        if imageType is None: imageType = currentImageType
 
         if width  % 8 != 0:
             raise ValueError("Width must be a multiple of 8")
         if height % 2 != 0:
             raise ValueError("Height must be a multiple of 2")
 
-        pyzwoasi.setROIFormat(self._cameraIndex, width, height, binning, imageType)
+        self._setROIFormat(width, height, binning, imageType)
+
+    @property
+    def startPosition(self):
+        return pyzwoasi.getStartPos(self._cameraIndex)
+
+    @startPosition.setter
+    def startPosition(self, position):
+        # Position of the ROI top-left corner, in binned pixels. The SDK
+        # centers the ROI again each time the ROI format is set.
+        startX, startY = position
+        width, height, binning, _ = self._getROIFormat()
+        if not (0 <= startX <= self._maxWidth // binning - width and 0 <= startY <= self._maxHeight // binning - height):
+            raise ValueError(f"Start position {position} puts the {width}x{height} ROI out of the "
+                             f"{self._maxWidth // binning}x{self._maxHeight // binning} sensor.")
+        pyzwoasi.setStartPos(self._cameraIndex, startX, startY)
 
     @property
     def highSpeedMode(self):
-        try:
-            return pyzwoasi.getControlValue(self._cameraIndex, self._dictControlID["HighSpeedMode"])[0]
-        except KeyError:
-            print("High Speed Mode control not available for this camera.")
-            return None
+        return self._getControlValue("HighSpeedMode", "High Speed Mode")
 
     @highSpeedMode.setter
     def highSpeedMode(self, mode):
-        try:
-            pyzwoasi.setControlValue(self._cameraIndex, self._dictControlID["HighSpeedMode"], mode, auto=False)
-        except KeyError:
-            print("High Speed Mode control not available for this camera.")
+        self._setControlValue("HighSpeedMode", mode, "High Speed Mode", "High Speed Mode value")
 
     @property
     def bandwidth(self):
-        try:
-            return pyzwoasi.getControlValue(self._cameraIndex, self._dictControlID["BandWidth"])[0]
-        except KeyError:
-            print("Bandwidth control not available for this camera.")
-            return None
+        return self._getControlValue("BandWidth", "Bandwidth")
 
     @bandwidth.setter
     def bandwidth(self, bandwidthValue):
+        self._setControlValue("BandWidth", bandwidthValue, "Bandwidth", "Bandwidth value")
+
+    def _checkCapabilities(self, error):
+        # A control rejected by the SDK may come from stale cached capabilities
+        if self._capabilitiesCached and error.args[1] == ASIErrorCode.ASI_ERROR_INVALID_CONTROL_TYPE:
+            self.validateCapabilities()
+
+    def _controlTypes(self, controlNames):
+        try:
+            return [self._controls[controlName].controlType for controlName in controlNames]
+        except KeyError as e:
+            # Cached capabilities may be stale, e.g. after a firmware update
+            if self._capabilitiesCached and not self.validateCapabilities():
+                return self._controlTypes(controlNames)
+            raise ValueError(f"Control {e.args[0]} not available for this camera. "
+                             f"Available controls are: {list(self._controls)}") from None
+
+    def getControls(self, controlNames=None):
+        """
+        @brief Reads several controls in one go
+
+        @param controlNames Iterable of control names, as listed by the
+                            camera (e.g. "Gain", "Exposure", "Temperature").
+                            Defaults to every control of the camera.
+
+        @return Dictionary mapping each control name to its value
+        """
+        if controlNames is None:
+            controlNames = self._controls
+        controlNames = list(controlNames)
+        controlTypes = self._controlTypes(controlNames)
+
+        start  = time.perf_counter()
         try:
-            controlCaps = pyzwoasi.getControlCaps(self._cameraIndex, self._dictControlID["BandWidth"])
-            if controlCaps.IsWritable == False:
-                print("Bandwidth control not writable for this camera.")
-                return
-
-            if self._dictControlIDMin["BandWidth"] <= bandwidthValue <= self._dictControlIDMax["BandWidth"]:
-                    pyzwoasi.setControlValue(self._cameraIndex, self._dictControlID["BandWidth"], bandwidthValue, auto=False)
-            else:
-                raise ValueError(f"Bandwidth value out of range. Selected value is {bandwidthValue} and range "
-                          f"is [{self._dictControlIDMin["BandWidth"]}, {self._dictControlIDMax["BandWidth"]}].")
-        except KeyError:
-            print("Bandwidth control not available for this camera.")
+            values = pyzwoasi.getControlValues(self._cameraIndex, controlTypes)
+        except ASIError as e:
+            self._checkCapabilities(e)
+            raise
+        self._controlStatistics["getTime"]  += time.perf_counter() - start
+        self._controlStatistics["getCalls"] += len(controlTypes)
+
+        controls = {controlName: value for controlName, (value, _) in zip(controlNames, values)}
+        self._lastControlValues.update(controls)
+        self._updateMetaState()
+        return controls
+
+    def setControls(self, controls, force=False):
+        """
+        @brief Writes several controls in one go, skipping the ones which
+               already hold the requested value
+
+        @note A control is considered unchanged when its value is the last
+              one read or written through getControls / setControls / snapshot.
+              Use force=True if the camera may have changed it on its own.
+
+        @param controls Dictionary mapping control names to their new value
+        @param force    Writes every control, even the unchanged ones
+        """
+        controlTypes = self._controlTypes(controls)
+
+        writes = []
+        for (controlName, value), controlType in zip(controls.items(), controlTypes):
+            control = self._controls[controlName]
+            if not control.isWritable:
+                raise ValueError(f"{controlName} control not writable for this camera.")
+            if not control.minValue <= value <= control.maxValue:
+                raise ValueError(f"{controlName} value out of range. Selected value is {value} and range "
+                                 f"is [{control.minValue}, {control.maxValue}].")
+            if not force and self._lastControlValues.get(controlName) == value:
+                self._controlStatistics["skippedWrites"] += 1
+                continue
+            writes.append((controlName, controlType, value))
+
+        start = time.perf_counter()
+        try:
+            pyzwoasi.setControlValues(self._cameraIndex, ((controlType, value, False) for _, controlType, value in writes))
+        except ASIError as e:
+            # Partial writes may have happened, the values are unknown now
+            for controlName, _, _ in writes:
+                self._lastControlValues.pop(controlName, None)
+            self._updateMetaState()
+            self._checkCapabilities(e)
+            raise
+        self._controlStatistics["setTime"]  += time.perf_counter() - start
+        self._controlStatistics["setCalls"] += len(writes)
+
+        for controlName, _, value in writes:
+            self._lastControlValues[controlName] = value
+        self._updateMetaState()
+
+    def snapshot(self, out=None):
+        """
+        @brief Reads every control of the camera into a compact record
+
+        @note Records of consecutive snapshots can be stored in a structured
+              array, for example for per-frame telemetry:
+
+              table = np.zeros(numOfFrames, dtype=camera.snapshotDtype)
+              camera.snapshot(out=table[frameIndex])
+
+        @param out Optional record of dtype snapshotDtype to fill in place
+
+        @return Record with a "timestamp" field (seconds since epoch) and
+                one int64 field per control name
+        """
+        controlNames = list(self._controls)
+        timestamp = time.time()
+        controls = self.getControls(controlNames)
+
+        if out is None:
+            return np.array((timestamp, *controls.values()), dtype=self._snapshotDtype)[()]
+
+        out["timestamp"] = timestamp
+        for controlName, value in controls.items():
+            out[controlName] = value
+        return out
+
+    def frameMeta(self, sequence=-1, hostTime=None, droppedFrames=0, state=None):
+        """
+        @brief Metadata of a frame, from the cached camera state
+
+        @note No SDK call is made once exposure and gain are known: they are
+              the last values read or written through this class, as for
+              setControls. Temperature is the last one read, NaN until then,
+              video streams filling a FrameMetaTable read it once per second
+              from the consumer side.
+
+        @param sequence      Sequence number of the frame, -1 if none
+        @param hostTime      time.time() of the frame, now if None
+        @param droppedFrames Dropped frames count of the SDK
+        @param state         Exposure, gain and temperature as taken from
+                             _metaState when the frame was requested. No SDK
+                             call is made then. Defaults to the current ones
+
+        @return FrameMeta
+        """
+        if state is None:
+            missing = [controlName for controlName in ("Exposure", "Gain") if controlName in self._controls and controlName not in self._lastControlValues]
+            if missing:
+                self.getControls(missing)
+            state = self._metaState
+
+        width, height, binning, imageType = self._roiFormat
+        exposure, gain, temperature = state
+        return FrameMeta(sequence, time.time() if hostTime is None else hostTime, exposure, gain,
+                         temperature / 10 if temperature is not None else np.nan, width, height, binning, int(imageType), droppedFrames)
+
+    @property
+    def snapshotDtype(self):
+        return self._snapshotDtype
+
+    def resetControlStatistics(self):
+        self._controlStatistics = {"getCalls": 0, "getTime": 0.0, "setCalls": 0, "setTime": 0.0, "skippedWrites": 0}
+
+    @property
+    def controlStatistics(self):
+        """
+        @brief Statistics of the batched control accesses
+
+        @return Dictionary containing the number of SDK reads and writes, the
+                time spent in them, their mean latency in seconds and the
+                number of writes skipped because the value was unchanged
+        """
+        statistics = dict(self._controlStatistics)
+        statistics["getLatency"] = statistics["getTime"] / statistics["getCalls"] if statistics["getCalls"] else None
+        statistics["setLatency"] = statistics["setTime"] / statistics["setCalls"] if statistics["setCalls"] else None
+        return statistics
 
     """
     @brief Take a single picture with the camera.
@@ -236,8 +527,13 @@ class ZWOCamera:
       - ASIImageType.ASI_IMG_RGB24 = 1
       - ASIImageType.ASI_IMG_RAW16 = 2
       - ASIImageType.ASI_IMG_Y8    = 3
+    @param processor       : optional ColorProcessor (see colorProcessor)
+                             applied to the raw picture
+    @param depth           : optional BitDepthConverter (see
+                             bitDepthConverter) applied to the raw picture
+                             before the processor
     """
-    def shot(self, exposureTime_us = None, imageType = None):
+    def shot(self, exposureTime_us = None, imageType = None, processor = None, depth = None):
         # Setting exposure and image type
         if exposureTime_us is not None:
             self.exposure  = exposureTime_us
@@ -245,27 +541,44 @@ class ZWOCamera:
         if imageType is not None:
             self.imageType = imageType
 
-        # Let's start exposure
+        # Let's start exposure, the wait strategy sleeps during the exposure
+        # then polls the status once per iteration until readout is over
+        exposureTime_us = self.exposure
+        start = time.perf_counter()
         pyzwoasi.startExposure(self._cameraIndex, True)
-        time.sleep(self.exposure / 1_000_000) # seconds 
+        img = self._completeExposure(exposureTime_us)
+
+        if processor is not None or depth is not None:
+            processed = time.perf_counter()
+            if depth is not None:
+                img = depth(img, self.imageType)
+            if processor is not None:
+                img = processor(img, self.imageType)
+            metrics.observe("processing", self._cameraIndex, time.perf_counter() - processed)
+        metrics.observe("shot", self._cameraIndex, time.perf_counter() - start)
+        return img
 
+    def _completeExposure(self, exposureTime_us, maxFailedRuns=3):
+        # Waits for an already started exposure and downloads its picture
+        start      = time.perf_counter()
         failedRuns = 0
-        while  pyzwoasi.getExpStatus(self._cameraIndex) != ASIExposureStatus.ASI_EXP_SUCCESS:
-            if pyzwoasi.getExpStatus(self._cameraIndex) == ASIExposureStatus.ASI_EXP_WORKING:
-                pass
-            elif pyzwoasi.getExpStatus(self._cameraIndex) == ASIExposureStatus.ASI_EXP_FAILED:
-                if failedRuns >= 3:
-                    print("Exposure failed 3 times. Aborting...")
-                    exit()
-
-                # Exposure has failed (that may happen for various reasons)
-                # Let's restart the process and watch if it happens again.
-                failedRuns += 1
-
-                pyzwoasi.stopExposure(self._cameraIndex)
+        while self.waitStrategy.wait(self._cameraIndex, exposureTime_us) != ASIExposureStatus.ASI_EXP_SUCCESS:
+            failedRuns = self._restartExposure(failedRuns, maxFailedRuns)
+        metrics.observe("exposure", self._cameraIndex, time.perf_counter() - start)
+        return self._download()
+
+    def _restartExposure(self, failedRuns, maxFailedRuns):
+        # Exposure has failed (that may happen for various reasons)
+        # Let's restart the process and watch if it happens again.
+        pyzwoasi.stopExposure(self._cameraIndex)
+        if failedRuns >= maxFailedRuns:
+            raise ASIError(f"Exposure failed {failedRuns} times for cameraID {self._cameraIndex}", ASIErrorCode.ASI_ERROR_GENERAL_ERROR)
+        pyzwoasi.startExposure(self._cameraIndex, True)
+        return failedRuns + 1
 
-                pyzwoasi.startExposure(self._cameraIndex, True)
-                time.sleep(self.exposure / 1_000_000) # seconds  
+    def _download(self):
+        # Downloads the picture of a successful exposure
+        start = time.perf_counter()
 
         # Always check dropped frames before ending the capture
         droppedFrames = pyzwoasi.getDroppedFrames(self._cameraIndex)
@@ -275,31 +588,291 @@ class ZWOCamera:
         # Stopping exposure and start conversion
         pyzwoasi.stopExposure(self._cameraIndex)
 
-        width, height, _, _ = pyzwoasi.getROIFormat(self._cameraIndex)
-        if   self.imageType == ASIImageType.ASI_IMG_RAW8 or self.imageType == ASIImageType.ASI_IMG_Y8:
-            bytesPerPixel = 1
-        elif self.imageType == ASIImageType.ASI_IMG_RAW16:
-            bytesPerPixel = 2
-        elif self.imageType == ASIImageType.ASI_IMG_RGB24:
-            bytesPerPixel = 3
-        else:
-            raise ValueError('Unsupported image type')
-        
-        bufferSize = width * height * bytesPerPixel
-        imageData = pyzwoasi.getDataAfterExp(self._cameraIndex, bufferSize)
-
-        shape = [height, width]
-        if   self.imageType == ASIImageType.ASI_IMG_RAW8 or self.imageType == ASIImageType.ASI_IMG_Y8:
-            img = np.frombuffer(imageData, dtype=np.uint8)
-        elif self.imageType == ASIImageType.ASI_IMG_RAW16:
-            img = np.frombuffer(imageData, dtype=np.uint16)
-        elif self.imageType == ASIImageType.ASI_IMG_RGB24:
-            img = np.frombuffer(imageData, dtype=np.uint8)
-            shape.append(3)
-        
-        img  = img.reshape(shape)
+        # The SDK writes straight into the returned array, no copy involved
+        img = self.emptyFrame()
+        pyzwoasi.getDataAfterExpInto(self._cameraIndex, img)
+        metrics.observe("download", self._cameraIndex, time.perf_counter() - start)
         return img
 
+    def emptyFrame(self):
+        """
+        @brief Allocates an uninitialized array matching the current ROI
+               format, suitable as target buffer for the *Into functions
+
+        @return NumPy array of shape (height, width) for RAW8, Y8, RAW16
+                or (height, width, 3) for RGB24
+        """
+        self._getROIFormat()
+        return np.empty(self._frameShape, dtype=self._frameDtype)
+
+    def colorProcessor(self, mode=Debayer.BILINEAR, order="RGB"):
+        """
+        @brief Creates a processing stage turning frames of this camera into
+               color images (or mono ones for mono cameras)
+
+        @param mode  Debayer.BILINEAR or Debayer.SUPERPIXEL
+        @param order Channel order of color outputs, "RGB" or "BGR"
+
+        @return ColorProcessor, to be given to shot() or stream()
+        """
+        return ColorProcessor(self._isColorCam, self._bayerPattern, mode, order)
+
+    def bitDepthConverter(self, mode=BitDepthConverter.PREVIEW, inPlace=True, black=0, white=None, gamma=1.0):
+        """
+        @brief Creates a processing stage handling the bit depth of the RAW16
+               frames of this camera, which the SDK aligns on 16 bits
+
+        @param mode    BitDepthConverter.KEEP, NATIVE to shift the frames to
+                       the sensor bit depth, or PREVIEW to turn them into
+                       8 bits through a lookup table
+        @param inPlace Shifts the frames themselves in native mode
+        @param black   Native value shown black in preview mode
+        @param white   Native value shown white in preview mode, the full
+                       scale if None
+        @param gamma   Gamma of the preview mode
+
+        @return BitDepthConverter, to be given to shot() or stream() as depth
+        """
+        return BitDepthConverter(self._bitDepth, mode, inPlace, black, white, gamma)
+
+    def stream(self, slots=8, policy=VideoStream.OVERWRITE, waitms=None, processor=None, gps=None, meta=None, depth=None):
+        """
+        @brief Creates a video stream capturing frames on a dedicated thread
+               into a preallocated ring buffer
+
+        @note Use it as a context manager, or call start() and stop():
+
+              with camera.stream(slots=16) as stream:
+                  for frame in stream:
+                      process(frame.image)
+
+        @param slots     Number of frames held by the ring buffer
+        @param policy    VideoStream.OVERWRITE drops the oldest unread frame
+                         when the ring is full, VideoStream.BLOCK pauses
+                         the capture until the consumer catches up
+        @param waitms    Timeout of each SDK call in milliseconds
+        @param processor Optional ColorProcessor applied by the consumer
+                         to each frame it reads
+        @param gps       Optional GPSTable receiving the GPS record of each
+                         frame, for cameras with GPS
+        @param meta      Optional FrameMetaTable receiving the metadata of
+                         each frame
+        @param depth     Optional BitDepthConverter applied by the consumer
+                         to each frame it reads, before the processor
+
+        @return VideoStream, not started
+        """
+        return VideoStream(self, slots, policy, waitms, processor, gps, meta, depth)
+
+    def record(self, path, format=Recorder.SER, frames=None, duration=None, slots=16, waitms=None, block=True, gps=None):
+        """
+        @brief Records a video to a SER or FITS file with bounded memory
+
+        @note Frames go from the acquisition ring to a memory-mapped file on
+              a writer thread, with their host or GPS timestamps. With block=False
+              the recording runs in background: poll its statistics, then
+              call join() or stop().
+
+        @param path     Output file path
+        @param format   Recorder.SER ("ser") or Recorder.FITS ("fits")
+        @param frames   Number of frames to record
+        @param duration Recording duration in seconds, if frames is not given
+        @param slots    Number of frames of the acquisition ring buffer
+        @param waitms   Timeout of each SDK call in milliseconds
+        @param block    Waits for the end of the recording if True
+        @param gps      Optional GPSTable, frames are then time stamped with
+                        their GPS time when valid
+
+        @return Recorder, whose statistics report write throughput and backlog
+        """
+        recorder = Recorder(self, path, format, frames, duration, slots, waitms, gps).start()
+        if block:
+            recorder.join()
+        return recorder
+
+    def stack(self, frames, video=True, dtype=np.float32, sigmaClip=None, slots=8, waitms=None):
+        """
+        @brief Accumulates frames into running statistics (sum, mean,
+               variance, min, max), for lucky imaging or calibration masters
+
+        @note Video frames are stacked straight from the acquisition ring,
+              without any per-frame allocation. Snapshots go through shot(),
+              with the current exposure.
+
+        @param frames    Number of frames to stack
+        @param video     Stacks video frames if True, snapshots otherwise
+        @param dtype     Type of the accumulators, float32 or float64
+        @param sigmaClip Rejection threshold in standard deviations, None to
+                         keep every pixel
+        @param slots     Number of frames of the acquisition ring buffer
+        @param waitms    Timeout of each SDK call in milliseconds
+
+        @return Stacker, see its mean, variance and statistics
+        """
+        stacker = Stacker.forCamera(self, dtype=dtype, sigmaClip=sigmaClip)
+        if not video:
+            for _ in range(frames):
+                stacker.add(self.shot())
+            return stacker
+
+        with self.stream(slots, VideoStream.BLOCK, waitms) as stream:
+            while stacker.frames < frames:
+                frame = stream.read()
+                if frame is None:
+                    raise ASIError(f"Video stream of cameraID {self._cameraIndex} stopped after {stacker.frames} frames", ASIErrorCode.ASI_ERROR_GENERAL_ERROR)
+                stacker.add(frame.image)
+        return stacker
+
+    def calibrator(self, library, processor=None, keepType=True, temperatureTolerance=2.0):
+        """
+        @brief Calibrator using the masters of a library which match the
+               current settings (exposure, gain, temperature, binning, ROI)
+
+        @note Pass it as the processor of shot() or stream() to calibrate
+              every frame. It is picked for the current settings: get a new
+              one after changing them.
+
+        @param library              CalibrationLibrary
+        @param processor            Optional processor applied after
+                                    calibration, e.g. colorProcessor()
+        @param keepType             Returns frames of the input type if True,
+                                    float32 frames otherwise
+        @param temperatureTolerance Accepted temperature difference in
+                                    degrees Celsius
+
+        @return Calibrator
+        """
+        return library.calibrator(cameraState(self), processor, keepType, temperatureTolerance)
+
+    def track(self, width, height, slots=8, policy=VideoStream.OVERWRITE, waitms=None, processor=None,
+              deadband=4, minInterval=0.2, baselineFrames=10):
+        """
+        @brief Video stream through a small ROI following the brightest
+               target, for planetary and solar imaging
+
+        @note The ROI format is changed to width x height. Use it as a
+              context manager and iterate over it like a VideoStream, its
+              statistics report the frame rate gained over full-frame
+              capture (fpsGain).
+
+        @param width          Width of the tracking ROI, multiple of 8
+        @param height         Height of the tracking ROI, multiple of 2
+        @param slots          Number of frames of the ring buffer
+        @param policy         VideoStream.OVERWRITE or VideoStream.BLOCK
+        @param waitms         Timeout of each SDK call in milliseconds
+        @param processor      Optional processor applied to each frame read
+        @param deadband       Offset from the ROI center, in pixels, under
+                              which the ROI is not moved
+        @param minInterval    Minimum time between two moves in seconds
+        @param baselineFrames Number of full-frame frames measured to
+                              locate the target and the baseline frame rate
+
+        @return ROITracker, not started
+        """
+        return ROITracker(self, width, height, slots, policy, waitms, processor, deadband, minInterval,
+                          baselineFrames=baselineFrames)
+
+    def autoExposure(self, target=0.45, percentile=None, tolerance=0.1, slots=8, policy=VideoStream.OVERWRITE, waitms=None,
+                     processor=None, maxExposure_us=100_000, maxGain=None, autoGain=True):
+        """
+        @brief Video stream with software auto exposure and auto gain
+
+        @note Exposure and gain are adjusted from a subsampled histogram of
+              each frame read, within the limits of the camera, without
+              restarting the capture. Use it as a context manager and
+              iterate over it like a VideoStream, its statistics report the
+              convergence.
+
+        @param target         Brightness to reach, as a fraction of the full
+                              scale
+        @param percentile     Percentile of the frame brought to target, None
+                              for the mean
+        @param tolerance      Relative brightness error accepted
+        @param slots          Number of frames of the ring buffer
+        @param policy         VideoStream.OVERWRITE or VideoStream.BLOCK
+        @param waitms         Timeout of each SDK call in milliseconds
+        @param processor      Optional processor applied to each frame read
+        @param maxExposure_us Longest exposure set
+        @param maxGain        Highest gain set, the camera maximum if None
+        @param autoGain       False to only adjust the exposure
+
+        @return AutoExposure, not started
+        """
+        return AutoExposure(self, target, percentile, tolerance, slots, policy, waitms, processor, maxExposure_us, maxGain, autoGain)
+
+    def triggered(self, mode=ASICameraMode.ASI_MODE_TRIG_RISE_EDGE, frames=100, waitms=None,
+                  outputPin=ASITrigOutputPin.ASI_TRIG_OUTPUT_NONE, outputHigh=True, outputDelay_us=0, outputDuration_us=10):
+        """
+        @brief Triggered capture collecting one frame per trigger into
+               preallocated buffers, for trigger cameras
+
+        @note The camera is armed once, on start, and put back in its
+              previous mode on stop. Use it as a context manager, its
+              statistics report trigger to frame latency and missed
+              triggers.
+
+        @param mode              ASICameraMode trigger mode
+        @param frames            Number of frames collected
+        @param waitms            Timeout of each SDK call in milliseconds
+        @param outputPin         ASITrigOutputPin signalling the exposures
+        @param outputHigh        Output pin level while active
+        @param outputDelay_us    Delay between the trigger and the output
+        @param outputDuration_us Duration of the output signal
+
+        @return TriggeredCapture, not started
+        """
+        return TriggeredCapture(self, mode, frames, waitms, outputPin, outputHigh, outputDelay_us, outputDuration_us)
+
+    def runSequence(self, plan, processor=None, save=None, workers=2, reorder=False, maxPending=4, meta=None):
+        """
+        @brief Captures a plan of exposures, overlapping the conversion and
+               saving of each frame with the exposure of the next one
+
+        @note Iterate over the returned SequenceRun to get the frames, in
+              capture order. Only the settings which change between steps
+              are written, and reorder=True groups the steps by binning,
+              image type and gain. Its statistics report the duty cycle,
+              shutter time over wall time.
+
+              for frame in camera.runSequence([(1_000_000, 100), (1_000_000, 200, 2)], save=writeFits):
+                  ...
+
+        @param plan       Iterable of SequenceStep or (exposure, gain,
+                          binning, imageType), None keeps the value
+        @param processor  Optional processor applied to each frame by the
+                          workers
+        @param save       Optional function called by the workers with each
+                          SequenceFrame
+        @param workers    Number of worker threads
+        @param reorder    Allows reordering the steps to limit setting
+                          changes
+        @param maxPending Maximum number of frames held before being yielded
+        @param meta       Optional FrameMetaTable receiving the metadata of
+                          each frame, its sequence is the plan index
+
+        @return SequenceRun, not started
+        """
+        return SequenceRun(self, plan, processor, save, workers, reorder, maxPending, meta)
+
+    def optimizeForFrameRate(self, targetFps, constraints=None, useCache=True):
+        """
+        @brief Tunes BandWidth, HighSpeedMode, image type, ROI and binning to
+               reach a target video frame rate with the least loss of quality
+
+        @note Each candidate is measured over a short video capture, counting
+              dropped frames. The result is cached on disk per camera model,
+              so that later sessions apply it without measuring. See
+              FrameRateGovernor for the order in which settings are changed.
+
+        @param targetFps   Frame rate to reach
+        @param constraints Limits of the search, see FrameRateGovernor.optimize
+        @param useCache    Reuses the result of a previous session if any
+
+        @return Dictionary with settings, fps, droppedFrames, met, cached
+                and trials
+        """
+        return FrameRateGovernor(self).optimize(targetFps, constraints, useCache)
+
     def startVideoCapture(self):
         pyzwoasi.startVideoCapture(self._cameraIndex)
 
@@ -326,8 +899,15 @@ class ZWOCamera:
         # Software binning does not change latence or FPS in live view
         self.softwareBinning = 1
 
+        # Frames are pulled by a capture thread, the UI only reads them.
+        # As given by the manufacturer ZWO, the timeout should be at least
+        # twice the exposure time plus 500 milliseconds.
+        waitms = int(2 * maximumExposureLimit / 1000 + 500)
+        depth  = self.bitDepthConverter(BitDepthConverter.PREVIEW)
+        stream = self.stream(slots=4, waitms=waitms, depth=depth)
+
         previousTime = time.time()
-        self.startVideoCapture()
+        stream.start()
         while True:
             # Updating camera exposure
             exposureTime_percentage = cv2.getTrackbarPos("Exposure", windowName)
@@ -336,7 +916,7 @@ class ZWOCamera:
 
             # Updating camera gain
             gain_percentage = cv2.getTrackbarPos("Gain", windowName)
-            cameraGainMin, cameraGainMax = self._dictControlIDMin["Gain"], self._dictControlIDMax["Gain"]
+            cameraGainMin, cameraGainMax = self.gainLimits
             gain = int(cameraGainMin + (cameraGainMax - cameraGainMin) * gain_percentage / 100)
             self.gain = gain
 
@@ -345,24 +925,26 @@ class ZWOCamera:
             width  = (int(self._maxWidth  * (roiPercentage / 100) / self.softwareBinning) // 8) * 8
             height = (int(self._maxHeight * (roiPercentage / 100) / self.softwareBinning) // 2) * 2
 
-            widthBeforeUpdate, heighBeforeUpdate, _, _ = pyzwoasi.getROIFormat(self._cameraIndex)
+            widthBeforeUpdate, heighBeforeUpdate, _, _ = self.roi
 
             if (width != widthBeforeUpdate) or (height != heighBeforeUpdate):
-                self.stopVideoCapture()
+                # Ring slots are sized for the ROI, a new stream is needed
+                stream.stop()
                 self.setROI(width, height)
-                self.startVideoCapture()
+                stream = self.stream(slots=4, waitms=waitms, depth=depth)
+                stream.start()
 
-            # Getting image from camera and displaying it
+            # Getting image from the stream and displaying it
             try:
-                # As given by the manufacturer ZWO, the refresh rate should
-                # be at least twice the exposure time plus 500 microseconds
-                refreshRate = int(2 * exposureTime_us + 500)
-                frame = pyzwoasi.getVideoData(self._cameraIndex, self.bufferSize, refreshRate)
+                frame = stream.read(timeout=waitms / 1000)
             except ASIError as e:
                 print(f"Error getting video data: {e}")
+                stream.stop()
+                stream.start()
+                continue
+            if frame is None:
                 continue
-                
-            img = np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 1)
+            img = frame.image
 
             target_height = 480
             scale = target_height / img.shape[0]
@@ -381,6 +963,7 @@ class ZWOCamera:
             # Let's close the window if 'q' is pressed
             if cv2.waitKey(1) & 0xFF == ord('q'): break
 
+        stream.stop()
         cv2.destroyAllWindows()
 
     def __del__(self):
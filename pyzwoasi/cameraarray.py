@@ -0,0 +1,242 @@
+import concurrent.futures, threading, time
+
+from . import pyzwoasi
+from .camera import ZWOCamera
+from .pyzwoasi import ASICameraMode
+
+class CameraArray:
+    """
+    @brief Several cameras driven as one, exposing at the same moment
+
+    @note Every camera has its own worker thread. For each capture the
+          workers meet on a barrier right before starting the exposure so
+          that the start skew between cameras is limited to the thread
+          wake-up time, then wait and download their frame concurrently.
+
+          with CameraArray() as cameras:
+              images = cameras.shot(exposureTime_us = 10_000)
+              print(cameras.lastCapture["skew"])
+    """
+
+    def __init__(self, cameraIndexes=None, bandwidthBudget=None, useSoftTrigger=False):
+        """
+        @param cameraIndexes   Indexes of the cameras to open. Defaults to every
+                               connected camera
+        @param bandwidthBudget Total USB bandwidth, in percent of one camera
+                               BandWidth control, shared between the cameras.
+                               None leaves the cameras settings untouched
+        @param useSoftTrigger  Trigger cameras are switched to soft edge
+                               trigger mode and exposed with sendSoftTrigger
+        """
+        if cameraIndexes is None:
+            cameraIndexes = range(pyzwoasi.getNumOfConnectedCameras())
+        cameraIndexes = list(cameraIndexes)
+        if not cameraIndexes:
+            raise ValueError("No camera to open")
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(cameraIndexes), thread_name_prefix="CameraArray")
+        self._isClosed = False
+
+        # Opening is slow (initCamera), every camera is opened in parallel
+        futures = [self._executor.submit(ZWOCamera, cameraIndex) for cameraIndex in cameraIndexes]
+        self._cameras = []
+        errors = []
+        for future in futures:
+            try:
+                self._cameras.append(future.result())
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            self.close()
+            raise errors[0]
+
+        # Previous modes of the trigger cameras are put back on close
+        self._softTrigger   = [useSoftTrigger and camera._isTriggerCam for camera in self._cameras]
+        self._previousModes = {}
+        for camera, softTrigger in zip(self._cameras, self._softTrigger):
+            if softTrigger:
+                self._previousModes[camera._cameraIndex] = pyzwoasi.getCameraMode(camera._cameraIndex)
+                pyzwoasi.setCameraMode(camera._cameraIndex, ASICameraMode.ASI_MODE_TRIG_SOFT_EDGE)
+
+        self._bandwidth = {}
+        if bandwidthBudget is not None:
+            self.setBandwidthBudget(bandwidthBudget)
+
+        self._lastCapture = None
+        self._captures    = 0
+        self._bytes       = 0
+        self._captureTime = 0.0
+
+    @property
+    def cameras(self):
+        return list(self._cameras)
+
+    def __len__(self):
+        return len(self._cameras)
+
+    def __iter__(self):
+        return iter(self._cameras)
+
+    def __getitem__(self, index):
+        return self._cameras[index]
+
+    def setBandwidthBudget(self, bandwidthBudget):
+        """
+        @brief Shares a total USB bandwidth between the cameras
+
+        @note Each camera gets an equal share, clamped to the limits of its
+              BandWidth control. Cameras without that control are ignored.
+
+        @param bandwidthBudget Total bandwidth, in percent of one camera
+                               BandWidth control (e.g. 200 for 4 cameras
+                               at 50%)
+
+        @return Dictionary mapping camera indexes to the applied bandwidth
+        """
+        cameras = [camera for camera in self._cameras if "BandWidth" in camera._controls]
+        if not cameras:
+            return {}
+
+        share = int(bandwidthBudget / len(cameras))
+        self._bandwidth = {}
+        for camera in cameras:
+            control   = camera._controls["BandWidth"]
+            bandwidth = min(max(share, control.minValue), control.maxValue)
+            if bandwidth > share:
+                print(f"Bandwidth budget cannot be honoured for camera {camera._cameraIndex}, using its minimum {bandwidth}")
+            camera.bandwidth = bandwidth
+            self._bandwidth[camera._cameraIndex] = bandwidth
+        return dict(self._bandwidth)
+
+    def _captureOne(self, cameraNumber, barrier, exposureTime_us, imageType):
+        camera   = self._cameras[cameraNumber]
+        cameraID = camera._cameraIndex
+
+        # Everything slow is done before meeting the other cameras. A failure
+        # here breaks the barrier so that the other cameras do not wait forever
+        try:
+            if exposureTime_us is not None:
+                camera.exposure  = exposureTime_us
+            if imageType is not None:
+                camera.imageType = imageType
+            exposure_us = camera.exposure
+            if self._softTrigger[cameraNumber]:
+                img = camera.emptyFrame()
+                pyzwoasi.startVideoCapture(cameraID)
+        except BaseException:
+            barrier.abort()
+            raise
+
+        if self._softTrigger[cameraNumber]:
+            try:
+                barrier.wait()
+                start = time.perf_counter()
+                pyzwoasi.sendSoftTrigger(cameraID, True)
+                pyzwoasi.getVideoDataInto(cameraID, img, int(2 * exposure_us / 1000 + 500))
+                pyzwoasi.sendSoftTrigger(cameraID, False)
+            finally:
+                pyzwoasi.stopVideoCapture(cameraID)
+        else:
+            barrier.wait()
+            start = time.perf_counter()
+            pyzwoasi.startExposure(cameraID, True)
+            img = camera._completeExposure(exposure_us)
+
+        return start, time.perf_counter(), img
+
+    def shot(self, exposureTime_us = None, imageType = None):
+        """
+        @brief Takes one picture with every camera, all exposures starting
+               at the same moment
+
+        @param exposureTime_us exposure time in microseconds, for every camera
+        @param imageType       image type, as in ZWOCamera.shot
+
+        @return List of NumPy arrays, in the order of the cameras
+        """
+        barrier = threading.Barrier(len(self._cameras))
+        futures = [self._executor.submit(self._captureOne, cameraNumber, barrier, exposureTime_us, imageType)
+                   for cameraNumber in range(len(self._cameras))]
+
+        results, errors = [], []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Releases the cameras still waiting for this one
+                barrier.abort()
+                errors.append(e)
+        errors = [e for e in errors if not isinstance(e, threading.BrokenBarrierError)] or errors
+        if errors:
+            raise errors[0]
+
+        starts      = [start for start, _, _ in results]
+        ends        = [end   for _, end, _ in results]
+        images      = [img   for _, _, img in results]
+        firstStart  = min(starts)
+        duration    = max(ends) - firstStart
+        totalBytes  = sum(img.nbytes for img in images)
+
+        self._lastCapture = {
+            "skew"        : max(starts) - firstStart,
+            "startOffsets": [start - firstStart for start in starts],
+            "durations"   : [end - start for start, end in zip(starts, ends)],
+            "duration"    : duration,
+            "bytes"       : totalBytes,
+            "throughput"  : totalBytes / duration if duration > 0 else 0.0,
+        }
+        self._captures    += 1
+        self._bytes       += totalBytes
+        self._captureTime += duration
+        return images
+
+    @property
+    def lastCapture(self):
+        """
+        @brief Timing of the last synchronized capture
+
+        @return Dictionary containing:
+                 - skew        : time between the first and last exposure start, in seconds
+                 - startOffsets: exposure start of each camera after the first one, in seconds
+                 - durations   : time from exposure start to frame downloaded, per camera
+                 - duration    : time from first exposure start to last frame downloaded
+                 - bytes       : bytes downloaded from all the cameras
+                 - throughput  : bytes per second over the capture
+        """
+        return self._lastCapture
+
+    @property
+    def statistics(self):
+        """
+        @brief Cumulative statistics of the synchronized captures
+
+        @return Dictionary containing the number of captures, bytes
+                downloaded, throughput in bytes per second and bandwidth
+                applied to each camera
+        """
+        return {
+            "captures"  : self._captures,
+            "bytes"     : self._bytes,
+            "throughput": self._bytes / self._captureTime if self._captureTime > 0 else 0.0,
+            "bandwidth" : dict(self._bandwidth),
+        }
+
+    def close(self):
+        if getattr(self, "_isClosed", True):
+            return
+        previousModes = getattr(self, "_previousModes", {})
+        for camera in getattr(self, "_cameras", []):
+            if camera._cameraIndex in previousModes:
+                pyzwoasi.setCameraMode(camera._cameraIndex, previousModes[camera._cameraIndex])
+            camera.close()
+        self._executor.shutdown(wait=True)
+        self._isClosed = True
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.close()
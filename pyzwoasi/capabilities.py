@@ -0,0 +1,103 @@
+import time
+
+from . import pyzwoasi
+from .cache    import JSONCache
+from .pyzwoasi import ASIError, ControlCaps
+
+_capsFields = ("Name", "Description", "MaxValue", "MinValue", "DefaultValue", "IsAutoSupported", "IsWritable", "ControlType")
+
+def _capsToDict(controlCaps):
+    return {field: getattr(controlCaps, field).decode('utf-8') if field in ("Name", "Description") else getattr(controlCaps, field)
+            for field in _capsFields}
+
+def _capsFromDict(values):
+    controlCaps = ControlCaps()
+    for field in _capsFields:
+        setattr(controlCaps, field, values[field].encode('utf-8') if field in ("Name", "Description") else values[field])
+    return controlCaps
+
+def enumerateControlCaps(cameraID):
+    """
+    @brief Reads the capabilities of every control from the camera
+
+    @param cameraID ID of an opened camera
+
+    @return List of ControlCaps, in control index order
+    """
+    return [pyzwoasi.getControlCaps(cameraID, controlIndex) for controlIndex in range(pyzwoasi.getNumOfControls(cameraID))]
+
+class CapabilityCache:
+    """
+    @brief On-disk cache of the control capabilities of cameras
+
+    @note Entries are keyed by camera name, serial number and SDK version,
+          so that a firmware or SDK update never reuses stale capabilities.
+          Cameras without serial number share the entry of their model.
+    """
+    def __init__(self, cache=None):
+        """
+        @param cache pyzwoasi.cache.JSONCache, the default on-disk one if None
+        """
+        self._cache = cache if cache is not None else JSONCache("capabilities.json")
+
+    @staticmethod
+    def key(cameraID, name):
+        """
+        @brief Key of an opened camera: name, serial number and SDK version
+        """
+        try:
+            serialNumber = pyzwoasi.getSerialNumber(cameraID)
+        except ASIError:
+            # Older cameras have no serial number
+            serialNumber = None
+        return f"{name}|{serialNumber}|{pyzwoasi.getSDKVersion()}"
+
+    def get(self, key):
+        """
+        @return Cached list of ControlCaps, None if unknown
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        return [_capsFromDict(values) for values in entry["controls"]]
+
+    def set(self, key, controls):
+        self._cache.set(key, {"created": time.time(), "controls": [_capsToDict(controlCaps) for controlCaps in controls]})
+
+    def invalidate(self, key=None):
+        """
+        @brief Forgets one entry, or every entry if key is None
+        """
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.remove(key)
+
+    def load(self, cameraID, name):
+        """
+        @brief Gets the control capabilities of an opened camera, from the
+               cache if known, from the camera otherwise
+
+        @param cameraID ID of the camera
+        @param name     Name of the camera, see CameraInfo.Name
+
+        @return Tuple containing the list of ControlCaps
+                                 the cache key
+                                 True if the capabilities come from the cache
+        """
+        key = self.key(cameraID, name)
+        controls = self.get(key)
+        if controls is not None:
+            return controls, key, True
+        controls = enumerateControlCaps(cameraID)
+        self.set(key, controls)
+        return controls, key, False
+
+# Cache shared by the cameras, created on first use
+_defaultCache = None
+
+def defaultCapabilityCache():
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = CapabilityCache()
+    return _defaultCache
@@ -0,0 +1,109 @@
+import collections, threading
+
+import numpy as np
+
+# Fixed layout of the metadata of one frame, 42 bytes per frame
+frameMetaDtype = np.dtype([
+    ("sequence"     , np.int64),   # Sequence number in its stream, -1 if none
+    ("hostTime"     , np.float64), # time.time() when the frame was received
+    ("exposure"     , np.int64),   # us
+    ("gain"         , np.int32),
+    ("temperature"  , np.float32), # Degrees Celsius, NaN if unknown
+    ("width"        , np.uint16),
+    ("height"       , np.uint16),
+    ("binning"      , np.uint8),
+    ("imageType"    , np.uint8),
+    ("droppedFrames", np.int32),   # SDK dropped frames count, as last polled
+])
+
+class FrameMeta(collections.namedtuple("FrameMeta", frameMetaDtype.names)):
+    """
+    @brief Metadata of one frame, see ZWOCamera.frameMeta and frameMetaDtype
+           for the fields
+    """
+    __slots__ = ()
+
+class FrameMetaTable:
+    """
+    @brief Column-wise table of frame metadata
+
+    @note Each field of frameMetaDtype is kept in its own array, grown by
+          doubling, so a million frames take about 42 MB and every query is
+          a vectorized operation on the columns. One table can be filled by
+          several streams and sequences in turn.
+
+          table = FrameMetaTable()
+          with camera.stream(meta=table) as stream:
+              ...
+          columns = table.columns()
+          hot     = columns["sequence"][columns["temperature"] > 0]
+    """
+    def __init__(self, capacity=1024):
+        """
+        @param capacity Initial number of rows, the table grows beyond it
+        """
+        if capacity < 1:
+            raise ValueError(f"Frame metadata table needs at least 1 row, got {capacity}")
+        self._columns = {name: np.zeros(capacity, dtype=frameMetaDtype[name]) for name in frameMetaDtype.names}
+        self._lock    = threading.Lock()
+        self._count   = 0
+
+    @property
+    def capacity(self):
+        return self._columns["sequence"].shape[0]
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        """
+        @brief Memory used by the columns, in bytes
+        """
+        return sum(column.nbytes for column in self._columns.values())
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+
+    def append(self, meta):
+        """
+        @brief Adds the metadata of one frame
+
+        @param meta FrameMeta, or any sequence of values in the order of
+                    frameMetaDtype
+        """
+        with self._lock:
+            if self._count == self.capacity:
+                for name, column in self._columns.items():
+                    self._columns[name] = np.concatenate((column, np.zeros_like(column)))
+            row = self._count
+            for column, value in zip(self._columns.values(), meta):
+                column[row] = value
+            self._count += 1
+
+    def __getitem__(self, index):
+        with self._lock:
+            if not -self._count <= index < self._count:
+                raise IndexError(f"Frame metadata index {index} out of range for {self._count} rows")
+            return FrameMeta(*(column[index % self._count].item() for column in self._columns.values()))
+
+    def columns(self):
+        """
+        @brief Copy of the table as column arrays, see frameMetaDtype for
+               the names and units
+        """
+        with self._lock:
+            return {name: column[:self._count].copy() for name, column in self._columns.items()}
+
+    @property
+    def records(self):
+        """
+        @brief Copy of the table as a structured array of dtype
+               frameMetaDtype, e.g. to np.save it
+        """
+        with self._lock:
+            records = np.empty(self._count, dtype=frameMetaDtype)
+            for name, column in self._columns.items():
+                records[name] = column[:self._count]
+        return records
@@ -0,0 +1,244 @@
+import json, time
+
+from . import pyzwoasi
+from .cache    import JSONCache
+from .pyzwoasi import ASIError, ASIErrorCode, ASIImageType
+
+# Image types from the most to the least detailed
+_imageTypeQuality = [ASIImageType.ASI_IMG_RAW16, ASIImageType.ASI_IMG_RGB24, ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_Y8]
+
+def measureFrameRate(camera, frames=30, warmupFrames=3, waitms=None):
+    """
+    @brief Measures the video frame rate with the current settings
+
+    @note Frames are read into a single reused buffer, so that the consumer
+          is never the bottleneck. The first frames are not timed, as frames
+          queued while the capture starts come in a burst.
+
+    @param camera       ZWOCamera
+    @param frames       Number of frames timed
+    @param warmupFrames Number of frames read before timing
+    @param waitms       Timeout of each SDK call in milliseconds
+
+    @return Dictionary with fps, droppedFrames and timeouts
+    """
+    if frames < 1:
+        raise ValueError(f"Frame rate measure needs at least 1 frame, got {frames}")
+
+    cameraID = camera._cameraIndex
+    if waitms is None:
+        waitms = int(2 * camera.exposure / 1000 + 500)
+
+    buffer   = camera.emptyFrame()
+    received = timeouts = 0
+    pyzwoasi.startVideoCapture(cameraID)
+    try:
+        for index in range(warmupFrames + frames):
+            if index == warmupFrames:
+                start   = time.perf_counter()
+                dropped = pyzwoasi.getDroppedFrames(cameraID)
+            try:
+                pyzwoasi.getVideoDataInto(cameraID, buffer, waitms)
+            except ASIError as e:
+                if e.args[1] != ASIErrorCode.ASI_ERROR_TIMEOUT:
+                    raise
+                timeouts += index >= warmupFrames
+                continue
+            received += index >= warmupFrames
+        elapsed = time.perf_counter() - start
+        dropped = pyzwoasi.getDroppedFrames(cameraID) - dropped
+    finally:
+        pyzwoasi.stopVideoCapture(cameraID)
+
+    return {
+        "fps"          : received / elapsed if elapsed > 0 else 0.0,
+        "droppedFrames": max(dropped, 0),
+        "timeouts"     : timeouts,
+    }
+
+class FrameRateGovernor:
+    """
+    @brief Finds the settings reaching a target frame rate with the least
+           loss of quality, and remembers them per camera model
+
+    @note Settings are measured from the most to the least detailed, each
+          step pulling the next lever until the target is met:
+            1. BandWidth to its maximum
+            2. HighSpeedMode on (10 bits ADC)
+            3. Lower bit depth image types (RAW16 to RAW8)
+            4. Smaller centered ROI, down to minWidth x minHeight
+            5. Larger binnings
+          A measurement with too many dropped frames first lowers BandWidth
+          in steps of 10, then counts as a miss. A step gaining less than
+          minGain of frame rate is undone. If the target is never met, the
+          fastest measured settings are kept.
+    """
+
+    # Relative frame rate gain for a step to be kept
+    minGain = 0.05
+
+    # Default constraints, see optimize
+    defaultConstraints = {
+        "imageTypes" : None,
+        "minWidth"   : None,
+        "minHeight"  : None,
+        "binnings"   : None,
+        "maxDropRate": 0.01,
+        "frames"     : 30,
+    }
+
+    def __init__(self, camera, cache=True):
+        """
+        @param camera ZWOCamera
+        @param cache  True for the default on-disk cache, False for none, or
+                      a pyzwoasi.cache.JSONCache
+        """
+        self._camera = camera
+        self._cache  = JSONCache("framerate.json") if cache is True else (cache or None)
+
+    def _constraints(self, constraints):
+        camera = self._camera
+        width, height, binning, imageType = camera.roi
+        merged = dict(self.defaultConstraints)
+        merged.update(constraints or {})
+        if merged["imageTypes"] is None:
+            merged["imageTypes"] = [imageType] + ([ASIImageType.ASI_IMG_RAW8] if imageType == ASIImageType.ASI_IMG_RAW16 else [])
+        if merged["minWidth"]  is None: merged["minWidth"]  = max(camera._maxWidth  // binning // 4 // 8 * 8, 8)
+        if merged["minHeight"] is None: merged["minHeight"] = max(camera._maxHeight // binning // 4 // 2 * 2, 2)
+        if merged["binnings"]  is None: merged["binnings"]  = [binning]
+        merged["imageTypes"] = [int(imageType) for imageType in merged["imageTypes"]]
+        return merged
+
+    def settings(self):
+        """
+        @brief Current values of the settings the governor tunes
+        """
+        camera = self._camera
+        width, height, binning, imageType = camera.roi
+        settings = {"width": width, "height": height, "binning": binning, "imageType": int(imageType)}
+        controlNames = [controlName for controlName in ("BandWidth", "HighSpeedMode") if controlName in camera._controls]
+        if controlNames:
+            settings.update(camera.getControls(controlNames))
+        return settings
+
+    def apply(self, settings):
+        """
+        @brief Sets the camera to settings returned by settings or optimize
+        """
+        camera = self._camera
+        camera.setROI(settings["width"], settings["height"], settings["binning"], settings["imageType"])
+        controls = {controlName: settings[controlName] for controlName in ("BandWidth", "HighSpeedMode")
+                    if controlName in settings and controlName in camera._controls}
+        if controls:
+            camera.setControls(controls)
+
+    def _steps(self, settings, constraints):
+        # Yields the successive changes of settings, cheapest loss first
+        camera = self._camera
+        if "BandWidth" in settings and settings["BandWidth"] < camera._controls["BandWidth"].maxValue:
+            yield {"BandWidth": camera._controls["BandWidth"].maxValue}
+        if "HighSpeedMode" in settings and settings["HighSpeedMode"] == 0:
+            yield {"HighSpeedMode": 1}
+
+        quality = [int(imageType) for imageType in _imageTypeQuality]
+        for imageType in sorted(constraints["imageTypes"], key=quality.index):
+            if quality.index(imageType) > quality.index(settings["imageType"]):
+                yield {"imageType": imageType}
+
+        fullWidth, fullHeight = width, height = settings["width"], settings["height"]
+        for scale in (0.75, 0.5, 0.375, 0.25, 0.125):
+            newWidth  = max(int(fullWidth  * scale) // 8 * 8, constraints["minWidth"])
+            newHeight = max(int(fullHeight * scale) // 2 * 2, constraints["minHeight"])
+            if (newWidth, newHeight) != (width, height) and newWidth <= width and newHeight <= height:
+                width, height = newWidth, newHeight
+                yield {"width": width, "height": height}
+
+        binning = settings["binning"]
+        for newBinning in sorted(constraints["binnings"]):
+            if newBinning > binning and newBinning in camera._supportedBins:
+                yield {"binning": newBinning,
+                       "width"  : max(width  * binning // newBinning // 8 * 8, 8),
+                       "height" : max(height * binning // newBinning // 2 * 2, 2)}
+
+    def _measure(self, settings, constraints, trials):
+        self.apply(settings)
+        measure = measureFrameRate(self._camera, constraints["frames"])
+        trials.append(dict(settings, **measure))
+        return measure
+
+    def _acceptable(self, measure, constraints):
+        return measure["droppedFrames"] <= constraints["maxDropRate"] * constraints["frames"]
+
+    def _cacheKey(self, targetFps, constraints):
+        return json.dumps({"camera": self._camera._name, "targetFps": targetFps,
+                           "exposure": self._camera.exposure, "constraints": constraints}, sort_keys=True)
+
+    def optimize(self, targetFps, constraints=None, useCache=True):
+        """
+        @brief Tunes the camera to reach a target frame rate
+
+        @param targetFps   Frame rate to reach
+        @param constraints Dictionary of limits, missing keys take defaults:
+                            - imageTypes : allowed ASIImageType, defaults to
+                                           the current one, plus RAW8 if it
+                                           is RAW16
+                            - minWidth   : smallest ROI width, defaults to a
+                            - minHeight    quarter of the sensor
+                            - binnings   : allowed binnings, defaults to the
+                                           current one
+                            - maxDropRate: accepted ratio of dropped frames
+                            - frames     : frames measured per trial
+        @param useCache    Starts from the cached result of a previous
+                           session for the same camera model, target,
+                           exposure and constraints, without measuring
+
+        @return Dictionary with settings, fps, droppedFrames, met (whether
+                the target was reached), cached and trials (every
+                measurement made)
+        """
+        camera = self._camera
+        if camera.exposure / 1e6 > 1 / targetFps:
+            print(f"Exposure of {camera.exposure} us cannot reach {targetFps} fps.")
+
+        constraints = self._constraints(constraints)
+        key = self._cacheKey(targetFps, constraints)
+        if useCache and self._cache is not None:
+            result = self._cache.get(key)
+            if result is not None:
+                self.apply(result["settings"])
+                return dict(result, cached=True, trials=[])
+
+        trials       = []
+        settings     = self.settings()
+        best         = None
+        measure      = self._measure(settings, constraints, trials)
+        steps        = self._steps(settings, constraints)
+        minBandwidth = camera._controls["BandWidth"].minValue if "BandWidth" in camera._controls else None
+        while True:
+            # Too many dropped frames: the link is saturated, slow it down
+            while not self._acceptable(measure, constraints) and "BandWidth" in settings and settings["BandWidth"] - 10 >= minBandwidth:
+                settings = dict(settings, BandWidth=settings["BandWidth"] - 10)
+                measure  = self._measure(settings, constraints, trials)
+
+            # A step which does not make the capture faster is undone, not
+            # to lose quality for nothing
+            if self._acceptable(measure, constraints) and (best is None or measure["fps"] > best[1]["fps"] * (1 + self.minGain)):
+                best = (settings, measure)
+            if best is not None and best[1]["fps"] >= targetFps:
+                break
+
+            step = next(steps, None)
+            if step is None:
+                break
+            settings = dict(best[0] if best is not None else settings, **step)
+            measure  = self._measure(settings, constraints, trials)
+
+        if best is None:
+            best = (settings, measure)
+        settings, measure = best
+        self.apply(settings)
+
+        result = {"settings": settings, "fps": measure["fps"], "droppedFrames": measure["droppedFrames"], "met": measure["fps"] >= targetFps}
+        if self._cache is not None:
+            self._cache.set(key, result)
+        return dict(result, cached=False, trials=trials)
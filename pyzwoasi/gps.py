@@ -0,0 +1,195 @@
+import threading
+
+import numpy as np
+
+from .pyzwoasi import GPSData
+
+# Layout of the SDK ASI_GPS_DATA structure, so that rows can be filled by
+# the SDK in place
+gpsDtype = np.dtype(GPSData)
+
+def gpsTimes(records):
+    """
+    @brief GPS times of records, as seconds since the Unix epoch (UTC)
+
+    @param records Array of dtype gpsDtype
+
+    @return float64 array, NaN where the GPS had no time yet
+    """
+    dateTime = records["DateTime"]
+    years    = dateTime["Year"]
+    valid    = (years > 0) & (dateTime["Month"] > 0) & (dateTime["Day"] > 0)
+    days = (np.where(valid, years - 1970, 0).astype("datetime64[Y]").astype("datetime64[M]")
+            + np.where(valid, dateTime["Month"] - 1, 0).astype("timedelta64[M]")).astype("datetime64[D]")
+    days = days + np.where(valid, dateTime["Day"] - 1, 0).astype("timedelta64[D]")
+    seconds = days.astype(np.int64) * 86400.0
+    seconds += dateTime["Hour"] * 3600.0 + dateTime["Minute"] * 60.0 + dateTime["Second"]
+    # Usecond is in tenths of microsecond within the millisecond
+    seconds += dateTime["Msecond"] / 1e3 + dateTime["Usecond"] / 1e7
+    seconds[~valid] = np.nan
+    return seconds
+
+class GPSTable:
+    """
+    @brief Preallocated table of the GPS records of the frames of a stream
+
+    @note The SDK writes each record straight into its row, next to the
+          sequence number and the host time of the frame. When the table is
+          full, the oldest rows are overwritten. Exports are column arrays,
+          no Python object is made per frame.
+
+          table = GPSTable(100_000)
+          with camera.stream(gps=table) as stream:
+              ...
+          columns = table.columns()
+    """
+    def __init__(self, capacity):
+        """
+        @param capacity Number of records kept
+        """
+        if capacity < 1:
+            raise ValueError(f"GPS table needs at least 1 row, got {capacity}")
+        self._records   = np.zeros(capacity, dtype=gpsDtype)
+        self._sequences = np.full(capacity, -1, dtype=np.int64)
+        self._hostTimes = np.zeros(capacity, dtype=np.float64)
+        self._lock      = threading.Lock()
+        self._count     = 0
+        self._last      = -1
+
+    @property
+    def capacity(self):
+        return self._records.shape[0]
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def overwritten(self):
+        """
+        @brief Number of records lost because the table was full
+        """
+        return max(self._count - self.capacity, 0)
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+
+    def _row(self):
+        # Next row, as a buffer for the SDK. Committed by _commit once the
+        # call succeeded, so that failed calls leave no record.
+        row = self._count % self.capacity
+        return self._records[row:row + 1]
+
+    def _commit(self, sequence, hostTime):
+        with self._lock:
+            row = self._count % self.capacity
+            self._sequences[row] = sequence
+            self._hostTimes[row] = hostTime
+            self._count += 1
+            self._last   = sequence
+
+    def _order(self):
+        # Indexes of the kept rows, oldest first. Called with the lock held
+        if self._count <= self.capacity:
+            return slice(0, self._count)
+        return np.roll(np.arange(self.capacity), -(self._count % self.capacity))
+
+    @property
+    def records(self):
+        """
+        @brief Copy of the kept records, oldest first, of dtype gpsDtype
+        """
+        with self._lock:
+            return self._records[self._order()].copy()
+
+    def columns(self):
+        """
+        @brief Kept records as column arrays, oldest first
+
+        @return Dictionary of arrays:
+                 - sequence  : sequence number of the frame in the stream
+                 - hostTime  : host clock when the frame was received, in
+                               seconds since the Unix epoch
+                 - gpsTime   : GPS time of the frame, in seconds since the
+                               Unix epoch, NaN without GPS time
+                 - latitude  : degrees, positive for North
+                 - longitude : degrees, positive for East
+                 - altitude  : meters
+                 - satellites: number of satellites
+        """
+        with self._lock:
+            order     = self._order()
+            records   = self._records[order]
+            sequences = self._sequences[order].copy()
+            hostTimes = self._hostTimes[order].copy()
+        return {
+            "sequence"  : sequences,
+            "hostTime"  : hostTimes,
+            "gpsTime"   : gpsTimes(records),
+            "latitude"  : records["Latitude"].copy(),
+            "longitude" : records["Longitude"].copy(),
+            "altitude"  : records["Altitude"] / 10,
+            "satellites": records["SatelliteNum"].copy(),
+        }
+
+    def _rowOf(self, sequence):
+        # Row of a frame, called with the lock held. Frames are committed in
+        # sequence order, so the row is usually found without searching.
+        back = self._last - sequence
+        if 0 <= back < min(self._count, self.capacity):
+            row = (self._count - 1 - back) % self.capacity
+            if self._sequences[row] == sequence:
+                return row
+        rows = np.flatnonzero(self._sequences[:min(self._count, self.capacity)] == sequence)
+        return int(rows[-1]) if rows.size else None
+
+    def find(self, sequence):
+        """
+        @brief Record of a frame of the stream
+
+        @param sequence Sequence number of the frame, see Frame.sequence
+
+        @return Record of dtype gpsDtype, None if not kept
+        """
+        with self._lock:
+            row = self._rowOf(sequence)
+            return self._records[row].copy() if row is not None else None
+
+    def gpsTime(self, sequence):
+        """
+        @brief GPS time of a frame of the stream
+
+        @param sequence Sequence number of the frame, see Frame.sequence
+
+        @return Seconds since the Unix epoch (UTC), NaN if the record is not
+                kept or the GPS had no time yet
+        """
+        with self._lock:
+            row = self._rowOf(sequence)
+            return float(gpsTimes(self._records[row:row + 1])[0]) if row is not None else float("nan")
+
+    def drift(self):
+        """
+        @brief Statistics of the host clock against the GPS clock
+
+        @note The host time is taken when the frame is received, so the
+              offset includes the exposure readout and transfer latency. The
+              rate is the slope of the offset over GPS time, positive when
+              the host clock runs fast.
+
+        @return Dictionary with frames (records with GPS time), and the mean,
+                std, min and max of hostTime - gpsTime in seconds, and rate
+                in seconds per second. Values are None without GPS time.
+        """
+        columns = self.columns()
+        valid   = ~np.isnan(columns["gpsTime"])
+        offsets = columns["hostTime"][valid] - columns["gpsTime"][valid]
+        statistics = {"frames": int(valid.sum()), "mean": None, "std": None, "min": None, "max": None, "rate": None}
+        if offsets.size:
+            statistics.update(mean=float(offsets.mean()), std=float(offsets.std()), min=float(offsets.min()), max=float(offsets.max()))
+        if offsets.size > 1:
+            gpsTime = columns["gpsTime"][valid]
+            elapsed = gpsTime - gpsTime[0]
+            if elapsed[-1] > 0:
+                statistics["rate"] = float(np.polyfit(elapsed, offsets, 1)[0])
+        return statistics
@@ -0,0 +1,317 @@
+import bisect, threading, time
+
+from . import pyzwoasi
+from .pyzwoasi import ASIErrorCode
+
+# Latency buckets upper bounds in seconds, from 1 us to 10 s
+defaultBuckets = tuple(mantissa * 10.0 ** exponent for exponent in range(-6, 1) for mantissa in (1, 2.5, 5)) + (10.0,)
+
+# Functions which do not return an ASI_ERROR_CODE
+_notErrorCodes = {"ASIGetNumOfConnectedCameras", "ASIGetProductIDs", "ASICameraCheck", "ASIGetSDKVersion"}
+
+# Position of the camera argument, for the functions where it is not first
+_cameraArguments = {
+    "ASIGetNumOfConnectedCameras": None,
+    "ASIGetProductIDs"           : None,
+    "ASICameraCheck"             : None,
+    "ASIGetSDKVersion"           : None,
+    "ASIGetCameraProperty"       : 1,
+}
+
+# Functions transferring a frame, with the position of the buffer size
+_transferFunctions = {"ASIGetVideoData": 2, "ASIGetVideoDataGPS": 2, "ASIGetDataAfterExp": 2, "ASIGetDataAfterExpGPS": 2}
+
+class Histogram:
+    """
+    @brief Fixed-bucket histogram, as exported to Prometheus
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=defaultBuckets):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Last bucket is +Inf
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        @brief Estimates a quantile as the upper bound of its bucket
+
+        @param q Quantile between 0 and 1
+
+        @return Estimated value, None if nothing was observed
+        """
+        if self.count == 0:
+            return None
+        rank, cumulated = q * self.count, 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulated += count
+            if cumulated >= rank:
+                return bound
+        return float("inf")
+
+    def toDict(self):
+        return {
+            "count": self.count,
+            "sum"  : self.sum,
+            "mean" : self.sum / self.count if self.count else None,
+            "p50"  : self.quantile(0.5),
+            "p99"  : self.quantile(0.99),
+        }
+
+class _CallMetrics:
+    __slots__ = ("calls", "errors", "bytes", "latency")
+
+    def __init__(self, bounds):
+        self.calls   = 0
+        self.errors  = {}
+        self.bytes   = 0
+        self.latency = Histogram(bounds)
+
+class MetricsRegistry:
+    """
+    @brief In-process registry of the SDK calls and camera operations
+
+    @note Enable it with pyzwoasi.metrics.enable(). Reading it with
+          snapshot() or toPrometheus() is cheap and can be done at any time
+          from any thread.
+    """
+    def __init__(self, bounds=defaultBuckets):
+        self._bounds = bounds
+        self._lock   = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._calls         = {} # (function, camera) -> _CallMetrics
+            self._operations    = {} # (operation, camera) -> Histogram
+            self._droppedFrames = {} # camera -> total dropped frames
+            self._lastDropped   = {} # camera -> last value read from the SDK
+
+    def wrap(self, name, function):
+        """
+        @brief Wraps an SDK function so that each call is recorded
+
+        @param name     C name of the function
+        @param function Function to wrap
+
+        @return Instrumented function
+        """
+        cameraArgument = _cameraArguments.get(name, 0)
+        returnsError   = name not in _notErrorCodes
+        sizeArgument   = _transferFunctions.get(name)
+        isDropped      = name == "ASIGetDroppedFrames"
+        perfCounter    = time.perf_counter
+
+        def instrumented(*args):
+            start  = perfCounter()
+            result = function(*args)
+            elapsed = perfCounter() - start
+
+            camera    = args[cameraArgument] if cameraArgument is not None else None
+            errorCode = result if returnsError else 0
+            nbytes    = args[sizeArgument] if sizeArgument is not None and errorCode == 0 else 0
+            self.observeCall(name, camera, elapsed, errorCode, nbytes)
+            if isDropped and errorCode == 0:
+                self.observeDroppedFrames(camera, getattr(args[1], "_obj", args[1]).value)
+            return result
+
+        instrumented.__name__ = name
+        return instrumented
+
+    def observeCall(self, function, camera, seconds, errorCode=0, nbytes=0):
+        with self._lock:
+            metrics = self._calls.get((function, camera))
+            if metrics is None:
+                metrics = self._calls[(function, camera)] = _CallMetrics(self._bounds)
+            metrics.calls += 1
+            metrics.bytes += nbytes
+            metrics.latency.observe(seconds)
+            if errorCode != 0:
+                metrics.errors[errorCode] = metrics.errors.get(errorCode, 0) + 1
+
+    def observeOperation(self, operation, camera, seconds):
+        with self._lock:
+            histogram = self._operations.get((operation, camera))
+            if histogram is None:
+                histogram = self._operations[(operation, camera)] = Histogram(self._bounds)
+            histogram.observe(seconds)
+
+    def observeDroppedFrames(self, camera, droppedFrames):
+        # The SDK counter only grows during a capture and is reset on stop
+        with self._lock:
+            last  = self._lastDropped.get(camera, 0)
+            delta = droppedFrames - last if droppedFrames >= last else droppedFrames
+            self._lastDropped[camera]   = droppedFrames
+            self._droppedFrames[camera] = self._droppedFrames.get(camera, 0) + delta
+
+    def snapshot(self):
+        """
+        @brief Current state of the registry
+
+        @return Dictionary containing:
+                 - calls        : one entry per function and camera with
+                                  calls, errors (by error code name), bytes
+                                  and latency (count, sum, mean, p50, p99)
+                 - operations   : one entry per ZWOCamera or VideoStream
+                                  operation and camera with its duration
+                 - droppedFrames: total dropped frames per camera
+        """
+        with self._lock:
+            return {
+                "calls": [{
+                    "function": function,
+                    "camera"  : camera,
+                    "calls"   : metrics.calls,
+                    "errors"  : {_errorName(errorCode): count for errorCode, count in metrics.errors.items()},
+                    "bytes"   : metrics.bytes,
+                    "latency" : metrics.latency.toDict(),
+                } for (function, camera), metrics in self._calls.items()],
+                "operations": [{
+                    "operation": operation,
+                    "camera"   : camera,
+                    "duration" : histogram.toDict(),
+                } for (operation, camera), histogram in self._operations.items()],
+                "droppedFrames": dict(self._droppedFrames),
+            }
+
+    def toPrometheus(self):
+        """
+        @brief Exports the registry in the Prometheus text format
+        """
+        lines = []
+        def family(name, kind, description):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, labels, histogram):
+            cumulated = 0
+            for bound, count in zip(histogram.bounds + (float("inf"),), histogram.counts):
+                cumulated += count
+                lines.append(f'{name}_bucket{{{labels},le="{_formatBound(bound)}"}} {cumulated}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        with self._lock:
+            calls      = sorted(self._calls.items(), key=_sortKey)
+            operations = sorted(self._operations.items(), key=_sortKey)
+
+            family("pyzwoasi_sdk_calls_total", "counter", "Calls to the ASICamera2 functions")
+            for (function, camera), metrics in calls:
+                lines.append(f'pyzwoasi_sdk_calls_total{{{_labels(function=function, camera=camera)}}} {metrics.calls}')
+
+            family("pyzwoasi_sdk_errors_total", "counter", "ASICamera2 calls which returned an error code")
+            for (function, camera), metrics in calls:
+                for errorCode, count in sorted(metrics.errors.items()):
+                    lines.append(f'pyzwoasi_sdk_errors_total{{{_labels(function=function, camera=camera, code=_errorName(errorCode))}}} {count}')
+
+            family("pyzwoasi_sdk_bytes_total", "counter", "Bytes of frames transferred by the ASICamera2 functions")
+            for (function, camera), metrics in calls:
+                if function in _transferFunctions:
+                    lines.append(f'pyzwoasi_sdk_bytes_total{{{_labels(function=function, camera=camera)}}} {metrics.bytes}')
+
+            family("pyzwoasi_sdk_call_duration_seconds", "histogram", "Duration of the ASICamera2 calls")
+            for (function, camera), metrics in calls:
+                histogram("pyzwoasi_sdk_call_duration_seconds", _labels(function=function, camera=camera), metrics.latency)
+
+            family("pyzwoasi_dropped_frames_total", "counter", "Frames dropped by the SDK")
+            for camera, droppedFrames in sorted(self._droppedFrames.items(), key=lambda item: str(item[0])):
+                lines.append(f'pyzwoasi_dropped_frames_total{{{_labels(camera=camera)}}} {droppedFrames}')
+
+            family("pyzwoasi_operation_duration_seconds", "histogram", "Duration of the camera and stream operations")
+            for (operation, camera), operationHistogram in operations:
+                histogram("pyzwoasi_operation_duration_seconds", _labels(operation=operation, camera=camera), operationHistogram)
+
+        return "\n".join(lines) + "\n"
+
+def _sortKey(item):
+    (name, camera), _ = item
+    return (name, str(camera))
+
+def _errorName(errorCode):
+    try:
+        return ASIErrorCode(errorCode).name
+    except ValueError:
+        return str(errorCode)
+
+def _formatBound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+def _labels(**labels):
+    return ",".join(f'{key}="{"" if value is None else value}"' for key, value in labels.items())
+
+# Registry in use, None when instrumentation is disabled
+_registry = None
+
+def enable(registry=None):
+    """
+    @brief Starts recording the SDK calls and the camera operations
+
+    @note When disabled, SDK functions are called without any wrapper and
+          camera operations only pay for a None check
+
+    @param registry MetricsRegistry to record into, a new one if None
+
+    @return Registry in use
+    """
+    global _registry
+    _registry = registry if registry is not None else MetricsRegistry()
+    pyzwoasi.lib.setWrapper(_registry.wrap)
+    return _registry
+
+def disable():
+    """
+    @brief Stops recording, the registry keeps what was recorded so far
+    """
+    global _registry
+    _registry = None
+    pyzwoasi.lib.setWrapper(None)
+
+def registry():
+    """
+    @return Registry in use, None when instrumentation is disabled
+    """
+    return _registry
+
+def observe(operation, camera, seconds):
+    """
+    @brief Records the duration of a camera operation, if enabled
+    """
+    if _registry is not None:
+        _registry.observeOperation(operation, camera, seconds)
+
+def serve(port=9464, address=""):
+    """
+    @brief Serves the registry in use on /metrics for Prometheus, from a
+           background thread
+
+    @param port    TCP port to listen on
+    @param address Address to bind, all interfaces by default
+
+    @return HTTP server, call shutdown() on it to stop serving
+    """
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = (_registry.toPrometheus() if _registry is not None else "").encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((address, port), Handler)
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    return server
@@ -0,0 +1,304 @@
+import numpy as np
+
+from .pyzwoasi import ASIBayerPattern, ASIImageType
+
+# Position (row, column) of the red and blue pixels in each 2x2 Bayer cell.
+# The two other pixels of the cell are green.
+_bayerOffsets = {
+    ASIBayerPattern.ASI_BAYER_RG: ((0, 0), (1, 1)),
+    ASIBayerPattern.ASI_BAYER_BG: ((1, 1), (0, 0)),
+    ASIBayerPattern.ASI_BAYER_GR: ((0, 1), (1, 0)),
+    ASIBayerPattern.ASI_BAYER_GB: ((1, 0), (0, 1)),
+}
+
+class Debayer:
+    """
+    @brief Vectorized demosaicing of RAW8 / RAW16 Bayer frames
+
+    @note Scratch and output buffers are allocated on the first frame and
+          reused as long as the frame shape and type stay the same, so that
+          no allocation happens per frame. The returned image is therefore
+          overwritten by the next call, unless an out array is given.
+
+    Supported modes:
+      - "superpixel": every 2x2 cell gives one RGB pixel, the output is half
+                      the input size. Fastest, no interpolation.
+      - "bilinear"  : full resolution, missing colors are interpolated from
+                      the nearest neighbours.
+    """
+
+    SUPERPIXEL = "superpixel"
+    BILINEAR   = "bilinear"
+
+    def __init__(self, bayerPattern, mode=BILINEAR, order="RGB"):
+        """
+        @param bayerPattern ASIBayerPattern of the sensor, see CameraInfo.BayerPattern
+        @param mode         Debayer.BILINEAR or Debayer.SUPERPIXEL
+        @param order        Channel order of the output, "RGB" or "BGR"
+                            (the latter being the one of OpenCV and RGB24)
+        """
+        if mode not in (self.SUPERPIXEL, self.BILINEAR):
+            raise ValueError(f"Unknown debayer mode {mode}")
+        if order not in ("RGB", "BGR"):
+            raise ValueError(f"Unknown channel order {order}")
+
+        self._bayerPattern = ASIBayerPattern(bayerPattern)
+        self._mode         = mode
+        self._channels     = (0, 1, 2) if order == "RGB" else (2, 1, 0)
+        self._key          = None
+
+    @property
+    def mode(self):
+        return self._mode
+
+    def outputShape(self, shape):
+        height, width = shape
+        if self._mode == self.SUPERPIXEL:
+            return (height // 2, width // 2, 3)
+        return (height, width, 3)
+
+    def _prepare(self, raw):
+        key = (raw.shape, raw.dtype)
+        if key == self._key:
+            return
+        if raw.ndim != 2 or raw.shape[0] % 2 or raw.shape[1] % 2:
+            raise ValueError(f"Bayer frames must be 2D with even sizes, got shape {raw.shape}")
+
+        height, width = raw.shape
+        self._out = np.empty(self.outputShape(raw.shape), dtype=raw.dtype)
+        if self._mode == self.SUPERPIXEL:
+            self._green = np.empty((height // 2, width // 2), dtype=np.uint32)
+        else:
+            # Sparse color plane with a one pixel border, and accumulator
+            self._plane = np.zeros((height + 2, width + 2), dtype=np.uint32)
+            self._accumulator = np.empty((height, width), dtype=np.uint32)
+        self._key = key
+
+    def __call__(self, raw, out=None):
+        """
+        @brief Demosaics one frame
+
+        @param raw 2D uint8 or uint16 Bayer frame
+        @param out Optional array of shape outputShape(raw.shape) and type
+                   raw.dtype receiving the result
+
+        @return Color image, shape (height, width, 3) or half of it in
+                superpixel mode
+        """
+        self._prepare(raw)
+        if out is None:
+            out = self._out
+
+        (redRow, redColumn), (blueRow, blueColumn) = _bayerOffsets[self._bayerPattern]
+        red, green, blue = self._channels
+        if self._mode == self.SUPERPIXEL:
+            # Both greens of a cell are on the anti-diagonal of the red one
+            green1 = raw[redRow    ::2, 1 - redColumn::2]
+            green2 = raw[1 - redRow::2, redColumn    ::2]
+            np.add(green1, green2, out=self._green, dtype=np.uint32)
+            np.right_shift(self._green, 1, out=self._green)
+            out[..., red]   = raw[redRow ::2, redColumn ::2]
+            out[..., green] = self._green
+            out[..., blue]  = raw[blueRow::2, blueColumn::2]
+            return out
+
+        self._interpolate(raw, out[..., red],  redRow,  redColumn)
+        self._interpolate(raw, out[..., blue], blueRow, blueColumn)
+        self._interpolateGreen(raw, out[..., green], redRow, redColumn)
+        return out
+
+    def _fillPlane(self, raw, sites):
+        # Mirrors the border so that neighbours keep the Bayer parity
+        plane = self._plane
+        plane.fill(0)
+        inner = plane[1:-1, 1:-1]
+        for row, column in sites:
+            inner[row::2, column::2] = raw[row::2, column::2]
+        plane[0, :]  = plane[2, :]
+        plane[-1, :] = plane[-3, :]
+        plane[:, 0]  = plane[:, 2]
+        plane[:, -1] = plane[:, -3]
+        return plane
+
+    def _interpolate(self, raw, out, row, column):
+        # Red or blue: (2 * edges + corners) / 4 where the color is missing
+        plane, accumulator = self._fillPlane(raw, ((row, column),)), self._accumulator
+        np.add(plane[:-2, 1:-1], plane[2:, 1:-1], out=accumulator)
+        accumulator += plane[1:-1, :-2]
+        accumulator += plane[1:-1, 2:]
+        np.left_shift(accumulator, 1, out=accumulator)
+        accumulator += plane[:-2, :-2]
+        accumulator += plane[:-2, 2:]
+        accumulator += plane[2:, :-2]
+        accumulator += plane[2:, 2:]
+        np.right_shift(accumulator, 2, out=accumulator)
+        out[...] = accumulator
+        out[row::2, column::2] = raw[row::2, column::2]
+
+    def _interpolateGreen(self, raw, out, redRow, redColumn):
+        # Green: mean of the four edges where the color is missing
+        sites = ((redRow, 1 - redColumn), (1 - redRow, redColumn))
+        plane, accumulator = self._fillPlane(raw, sites), self._accumulator
+        np.add(plane[:-2, 1:-1], plane[2:, 1:-1], out=accumulator)
+        accumulator += plane[1:-1, :-2]
+        accumulator += plane[1:-1, 2:]
+        np.right_shift(accumulator, 2, out=accumulator)
+        out[...] = accumulator
+        for row, column in sites:
+            out[row::2, column::2] = raw[row::2, column::2]
+
+def debayer(raw, bayerPattern, mode=Debayer.BILINEAR, order="RGB", out=None):
+    """
+    @brief Demosaics one Bayer frame, see Debayer
+
+    @note Prefer a Debayer instance when processing several frames, it keeps
+          its buffers from one frame to the next
+
+    @return Color image
+    """
+    return Debayer(bayerPattern, mode, order)(raw, out)
+
+class ColorProcessor:
+    """
+    @brief Turns any frame given by ZWOCamera into a color (or mono) image
+
+    @note Handles every ASIImageType:
+           - RAW8 / RAW16 of a color camera are debayered
+           - RAW8 / RAW16 of a mono camera and Y8 are returned unchanged
+           - RGB24, debayered by the SDK in BGR order, has its channels
+             reordered into a reusable buffer if RGB is requested
+    """
+
+    def __init__(self, isColorCam, bayerPattern, mode=Debayer.BILINEAR, order="RGB"):
+        """
+        @param isColorCam   True for color cameras, see CameraInfo.IsColorCam
+        @param bayerPattern ASIBayerPattern of the sensor
+        @param mode         Debayer.BILINEAR or Debayer.SUPERPIXEL
+        @param order        Channel order of color outputs, "RGB" or "BGR"
+        """
+        self._isColorCam = isColorCam
+        self._order      = order
+        self._debayer    = Debayer(bayerPattern, mode, order)
+        self._rgb        = None
+
+    def __call__(self, frame, imageType, out=None):
+        """
+        @param frame     Frame as returned by ZWOCamera.shot or a video stream
+        @param imageType ASIImageType of the frame
+        @param out       Optional output array
+
+        @return Processed image. Unless out is given, it is a reused buffer
+                overwritten by the next call
+        """
+        imageType = ASIImageType(imageType)
+        if imageType == ASIImageType.ASI_IMG_Y8 or (not self._isColorCam and imageType != ASIImageType.ASI_IMG_RGB24):
+            if out is None:
+                return frame
+            out[...] = frame
+            return out
+
+        if imageType == ASIImageType.ASI_IMG_RGB24:
+            if self._order == "BGR":
+                if out is None:
+                    return frame
+                out[...] = frame
+                return out
+            if out is None:
+                if self._rgb is None or self._rgb.shape != frame.shape:
+                    self._rgb = np.empty_like(frame)
+                out = self._rgb
+            out[...] = frame[..., ::-1]
+            return out
+
+        if imageType in (ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_RAW16):
+            return self._debayer(frame, out)
+
+        raise ValueError('Unsupported image type')
+
+class BitDepthConverter:
+    """
+    @brief Handles the bit depth of RAW16 frames, which the SDK aligns on
+           the most significant bit whatever the ADC bit depth
+
+    @note Modes:
+           - "keep"   : frames are returned unchanged
+           - "native" : RAW16 frames are shifted down to the ADC range, e.g.
+                        0 to 4095 for a 12 bits sensor. Done in place unless
+                        inPlace=False, then into a reused uint16 buffer.
+           - "preview": RAW16 frames are turned into uint8 through a lookup
+                        table, which also applies the black and white points
+                        and the gamma at no extra cost. The output buffer is
+                        reused, the frame bytes are halved.
+          Other image types are already 8 bits and are returned unchanged.
+    """
+
+    KEEP    = "keep"
+    NATIVE  = "native"
+    PREVIEW = "preview"
+
+    def __init__(self, bitDepth, mode=PREVIEW, inPlace=True, black=0, white=None, gamma=1.0):
+        """
+        @param bitDepth ADC bit depth, see CameraInfo.BitDepth
+        @param mode     BitDepthConverter.KEEP, NATIVE or PREVIEW
+        @param inPlace  Shifts the frames themselves in native mode, instead
+                        of a reused buffer
+        @param black    Native value shown black in preview mode
+        @param white    Native value shown white in preview mode, the full
+                        scale if None
+        @param gamma    Gamma of the preview mode
+        """
+        if mode not in (self.KEEP, self.NATIVE, self.PREVIEW):
+            raise ValueError(f"Unknown bit depth mode {mode}")
+        if not 8 <= bitDepth <= 16:
+            raise ValueError(f"Bit depth must be between 8 and 16, got {bitDepth}")
+        if white is None:
+            white = (1 << bitDepth) - 1
+        if not 0 <= black < white:
+            raise ValueError(f"Black point {black} must be positive and under the white point {white}")
+
+        self._bitDepth = bitDepth
+        self._mode     = mode
+        self._inPlace  = inPlace
+        self._shift    = 16 - bitDepth
+        self._out      = None
+
+        # Index is the 16 bits value as given by the SDK
+        if mode == self.PREVIEW:
+            level = (np.arange(1 << 16, dtype=np.float64) / (1 << self._shift) - black) / (white - black)
+            self._lut = np.round(255 * np.clip(level, 0, 1) ** (1 / gamma)).astype(np.uint8)
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def bitDepth(self):
+        return self._bitDepth
+
+    def _buffer(self, frame, dtype):
+        if self._out is None or self._out.shape != frame.shape or self._out.dtype != dtype:
+            self._out = np.empty(frame.shape, dtype=dtype)
+        return self._out
+
+    def __call__(self, frame, imageType, out=None):
+        """
+        @param frame     Frame as returned by ZWOCamera.shot or a video stream
+        @param imageType ASIImageType of the frame
+        @param out       Optional output array, uint16 in native mode and
+                         uint8 in preview mode
+
+        @return Converted frame. Unless out is given or the frame is
+                converted in place, it is a reused buffer overwritten by the
+                next call
+        """
+        if self._mode == self.KEEP or ASIImageType(imageType) != ASIImageType.ASI_IMG_RAW16:
+            return frame
+
+        if self._mode == self.NATIVE:
+            if out is None:
+                out = frame if self._inPlace else self._buffer(frame, np.uint16)
+            return np.right_shift(frame, self._shift, out=out)
+
+        if out is None:
+            out = self._buffer(frame, np.uint8)
+        return np.take(self._lut, frame, out=out, mode="clip")
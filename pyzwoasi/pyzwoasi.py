@@ -2,20 +2,134 @@ import ctypes
 import enum
 import platform
 import os
+import threading
 
 
-# Chosing and reading correct dll
-system = platform.system()
-arch = platform.architecture()[0]
-if   system == 'Windows':
-    dllPath = os.path.join(os.path.dirname(__file__), 'lib', system, 'x64' if arch == '64bit' else 'x86', 'ASICamera2.dll')
-elif system == 'Linux':
-    dllPath = os.path.join(os.path.dirname(__file__), 'lib', system, 'x64' if arch == '64bit' else 'x86', 'libASICamera2.so.1.37')
-elif system == 'Darwin':
-    dllPath = os.path.join(os.path.dirname(__file__), 'lib', 'MacOS', 'libASICamera2.dylib.1.37')
-else:
+# Environment variable overriding the path of the ASICamera2 library, which
+# can also be set to simulatorPath to use the simulated cameras
+libraryPathVariable = "PYZWOASI_LIBRARY"
+simulatorPath       = "simulator"
+
+def defaultLibraryPath():
+    """
+    @brief Gets the path of the ASICamera2 library shipped with the package
+           for the current system
+
+    @return Path of the library
+    """
+    system = platform.system()
+    arch = platform.architecture()[0]
+    if   system == 'Windows':
+        return os.path.join(os.path.dirname(__file__), 'lib', system, 'x64' if arch == '64bit' else 'x86', 'ASICamera2.dll')
+    elif system == 'Linux':
+        return os.path.join(os.path.dirname(__file__), 'lib', system, 'x64' if arch == '64bit' else 'x86', 'libASICamera2.so.1.37')
+    elif system == 'Darwin':
+        return os.path.join(os.path.dirname(__file__), 'lib', 'MacOS', 'libASICamera2.dylib.1.37')
     raise ValueError(f"Unsupported system: {system}")
-lib = ctypes.cdll.LoadLibrary(dllPath)
+
+# Prototypes of the library functions, name -> (restype, argtypes)
+_prototypes = {}
+
+def _prototype(name, restype, argtypes=None):
+    _prototypes[name] = (restype, argtypes)
+
+class _Library:
+    """
+    Lazy handle on the ASICamera2 library. Importing the package does not
+    touch the library: it is loaded on first use, and the prototype of each
+    function is only set when this function is first accessed. Functions are
+    then cached as plain attributes, later calls go straight to ctypes.
+    A wrapper, such as the one of pyzwoasi.metrics, can be set around the
+    cached functions.
+    """
+    def __init__(self):
+        self._dll     = None
+        self._path    = None
+        self._wrapper = None
+        self._lock    = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._dll is not None
+
+    @property
+    def path(self):
+        return self._path
+
+    def load(self, path=None):
+        with self._lock:
+            if self._dll is not None and (path is None or path == self._path):
+                return self._dll
+            if path is None:
+                path = os.environ.get(libraryPathVariable) or defaultLibraryPath()
+            if path == simulatorPath:
+                from .simulator import SimulatedLibrary
+                dll = SimulatedLibrary()
+            else:
+                dll = ctypes.cdll.LoadLibrary(path)
+            self._use(dll, path)
+            return dll
+
+    def use(self, backend):
+        with self._lock:
+            self._use(backend, None)
+
+    def setWrapper(self, wrapper):
+        # wrapper(name, function) returns the function to cache, None for none
+        with self._lock:
+            self._forget()
+            self._wrapper = wrapper
+
+    def _use(self, backend, path):
+        # Functions of a previously loaded backend are forgotten
+        self._forget()
+        self._dll, self._path = backend, path
+
+    def _forget(self):
+        for name in [name for name in vars(self) if not name.startswith("_")]:
+            delattr(self, name)
+
+    def __getattr__(self, name):
+        # Only reached for functions which are not set up yet
+        if name.startswith("_"):
+            raise AttributeError(name)
+        function = getattr(self.load(), name)
+        if name in _prototypes and isinstance(function, ctypes._CFuncPtr):
+            function.restype, function.argtypes = _prototypes[name]
+        if self._wrapper is not None:
+            function = self._wrapper(name, function)
+        setattr(self, name, function)
+        return function
+
+lib = _Library()
+
+def loadLibrary(path=None):
+    """
+    @brief Loads the ASICamera2 library now instead of on first use
+
+    @note The library is otherwise loaded from the path given by the
+          PYZWOASI_LIBRARY environment variable, or the one shipped with
+          the package. Giving another path replaces the loaded library.
+
+    @param path Path of the library, None for the default one
+
+    @return Path of the loaded library
+    """
+    lib.load(path)
+    return lib.path
+
+def setBackend(backend):
+    """
+    @brief Replaces the ASICamera2 library by another backend
+
+    @note A backend is any object exposing the SDK functions under their C
+          names (ASIOpenCamera, ASIGetVideoData, ...), called with the same
+          ctypes arguments as the library. pyzwoasi.simulator.SimulatedLibrary
+          is one. Giving None goes back to loading the library on next use.
+
+    @param backend Backend to use, or None
+    """
+    lib.use(backend)
 
 # Defining custom exception type for dll errors
 class ASIError(Exception):
@@ -56,6 +170,13 @@ class ASIImageType(enum.IntEnum):
     ASI_IMG_Y8     = enum.auto() # Y (mono) image,  8 bits per pixel
     ASI_IMG_END    = enum.auto() #   End of image type
 
+# Defining ASI Bayer patterns, named after the colors of the two first pixels
+class ASIBayerPattern(enum.IntEnum):
+    ASI_BAYER_RG = 0
+    ASI_BAYER_BG = enum.auto()
+    ASI_BAYER_GR = enum.auto()
+    ASI_BAYER_GB = enum.auto()
+
 # Defining ASI Exposure Status
 class ASIExposureStatus(enum.IntEnum):
     ASI_EXP_IDLE    = 0           # Idle state, exposure can be started
@@ -63,6 +184,55 @@ class ASIExposureStatus(enum.IntEnum):
     ASI_EXP_SUCCESS = enum.auto() # Exposure over, waiting for download
     ASI_EXP_FAILED  = enum.auto() # Exposure failed should be restarted
 
+# Defining ASI control types, as given by ControlCaps.ControlType
+class ASIControlType(enum.IntEnum):
+    ASI_GAIN                   = 0
+    ASI_EXPOSURE               = enum.auto() # microseconds
+    ASI_GAMMA                  = enum.auto()
+    ASI_WB_R                   = enum.auto()
+    ASI_WB_B                   = enum.auto()
+    ASI_OFFSET                 = enum.auto()
+    ASI_BANDWIDTHOVERLOAD      = enum.auto()
+    ASI_OVERCLOCK              = enum.auto()
+    ASI_TEMPERATURE            = enum.auto() # returns 10 * temperature
+    ASI_FLIP                   = enum.auto()
+    ASI_AUTO_MAX_GAIN          = enum.auto()
+    ASI_AUTO_MAX_EXP           = enum.auto() # microseconds
+    ASI_AUTO_TARGET_BRIGHTNESS = enum.auto() # target brightness
+    ASI_HARDWARE_BIN           = enum.auto()
+    ASI_HIGH_SPEED_MODE        = enum.auto()
+    ASI_COOLER_POWER_PERC      = enum.auto()
+    ASI_TARGET_TEMP            = enum.auto() # not multiplied by 10
+    ASI_COOLER_ON              = enum.auto()
+    ASI_MONO_BIN               = enum.auto() # leads to less grid at software bin mode for color camera
+    ASI_FAN_ON                 = enum.auto()
+    ASI_PATTERN_ADJUST         = enum.auto()
+    ASI_ANTI_DEW_HEATER        = enum.auto()
+    ASI_FAN_ADJUST             = enum.auto()
+    ASI_PWRLED_BRIGNT          = enum.auto()
+    ASI_USBHUB_RESET           = enum.auto()
+    ASI_GPS_SUPPORT            = enum.auto()
+    ASI_GPS_START_LINE         = enum.auto()
+    ASI_GPS_END_LINE           = enum.auto()
+    ASI_ROLLING_INTERVAL       = enum.auto() # microseconds
+
+# Defining ASI camera modes, see getCameraSupportMode
+class ASICameraMode(enum.IntEnum):
+    ASI_MODE_NORMAL          = 0           # Free running video or snapshots
+    ASI_MODE_TRIG_SOFT_EDGE  = enum.auto() # One exposure per sendSoftTrigger
+    ASI_MODE_TRIG_RISE_EDGE  = enum.auto() # One exposure per rising edge of the trigger input
+    ASI_MODE_TRIG_FALL_EDGE  = enum.auto() # One exposure per falling edge of the trigger input
+    ASI_MODE_TRIG_SOFT_LEVEL = enum.auto() # Exposure lasts while the soft trigger is on
+    ASI_MODE_TRIG_HIGH_LEVEL = enum.auto() # Exposure lasts while the trigger input is high
+    ASI_MODE_TRIG_LOW_LEVEL  = enum.auto() # Exposure lasts while the trigger input is low
+    ASI_MODE_END             = -1          # End of the supported modes list
+
+# Defining ASI trigger output pins
+class ASITrigOutputPin(enum.IntEnum):
+    ASI_TRIG_OUTPUT_PINA = 0  # Only pin A output
+    ASI_TRIG_OUTPUT_PINB = 1  # Only pin B output
+    ASI_TRIG_OUTPUT_NONE = -1
+
 # Defining struct _ASI_CAMERA_INFO
 class CameraInfo(ctypes.Structure):
     _fields_ = [
@@ -145,8 +315,42 @@ class SupportedMode(ctypes.Structure):
         ("SupportedMode", ctypes.c_int * 16)
     ]
 
+def _asCBuffer(buffer):
+    """
+    @brief Exposes a writable buffer as a ctypes unsigned char array sharing
+           its memory, so that the SDK can write into it without any copy
+
+    @param buffer Writable C-contiguous object supporting the buffer protocol
+
+    @return ctypes array of unsigned char pointing to the buffer memory
+    """
+    view = memoryview(buffer)
+    if view.readonly:
+        raise ValueError("Buffer must be writable")
+    if not view.c_contiguous:
+        raise ValueError("Buffer must be C-contiguous")
+    return (ctypes.c_ubyte * view.nbytes).from_buffer(view)
+
+def _asGPSData(gpsData):
+    """
+    @brief Exposes a GPS record as a GPSData structure the SDK can fill
+
+    @param gpsData GPSData, None for a new one, or writable buffer of one
+                   record, e.g. a row of an array of dtype np.dtype(GPSData)
+
+    @return GPSData, sharing the memory of the given buffer
+    """
+    if gpsData is None:
+        return GPSData()
+    if isinstance(gpsData, GPSData):
+        return gpsData
+    view = memoryview(gpsData).cast('B')
+    if view.readonly:
+        raise ValueError("GPS record must be writable")
+    return GPSData.from_buffer(view)
+
 # Defining int ASIGetNumOfConnectedCameras()
-lib.ASIGetNumOfConnectedCameras.restype = ctypes.c_int
+_prototype("ASIGetNumOfConnectedCameras", ctypes.c_int)
 def getNumOfConnectedCameras():
     """
     @brief Gets number of connected ASI cameras
@@ -158,8 +362,7 @@ def getNumOfConnectedCameras():
     return lib.ASIGetNumOfConnectedCameras()
 
 # Defining int ASIGetProductIDs(int* pPIDs)
-lib.ASIGetNumOfConnectedCameras.restype = ctypes.c_int
-lib.ASIGetProductIDs.argtypes = [ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetProductIDs", ctypes.c_int, [ctypes.POINTER(ctypes.c_int)])
 def getProductIDs():
     """
     @brief Gets product IDs of connected ASI cameras
@@ -187,8 +390,7 @@ def getProductIDs():
     return productIDs
 
 # Defining ASI_BOOL ASICameraCheck(int iVID, int iPID)
-lib.ASICameraCheck.restype = ctypes.c_bool
-lib.ASICameraCheck.argtypes = [ctypes.c_int, ctypes.c_int]
+_prototype("ASICameraCheck", ctypes.c_bool, [ctypes.c_int, ctypes.c_int])
 def cameraCheck(vendorID, productID):
     """
     @brief Checks if the device is an ASI camera
@@ -204,8 +406,7 @@ def cameraCheck(vendorID, productID):
     return result == 1
 
 # Defining ASI_ERROR_CODE ASIGetCameraProperty(ASI_CAMERA_INFO *pASICameraInfo, int iCameraIndex)
-lib.ASIGetCameraProperty.restype = ctypes.c_int
-lib.ASIGetCameraProperty.argtypes = [ctypes.POINTER(CameraInfo), ctypes.c_int]
+_prototype("ASIGetCameraProperty", ctypes.c_int, [ctypes.POINTER(CameraInfo), ctypes.c_int])
 def getCameraProperty(cameraIndex):
     """
     @brief Gets information about the camera
@@ -223,8 +424,7 @@ def getCameraProperty(cameraIndex):
     return cameraInfo
 
 # Defining ASI_ERROR_CODE ASIGetCameraPropertyByID(int iCameraID, ASI_CAMERA_INFO *pASICameraInfo)
-lib.ASIGetCameraPropertyByID.restype = ctypes.c_int
-lib.ASIGetCameraPropertyByID.argtypes = [ctypes.c_int, ctypes.POINTER(CameraInfo)]
+_prototype("ASIGetCameraPropertyByID", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(CameraInfo)])
 def getCameraPropertyByID(cameraID):
     """
     @brief Gets information about the camera
@@ -242,8 +442,7 @@ def getCameraPropertyByID(cameraID):
     return cameraInfo
 
 # Defining ASI_ERROR_CODE ASIOpenCamera(int iCameraID)
-lib.ASIOpenCamera.restype = ctypes.c_int
-lib.ASIOpenCamera.argtypes = [ctypes.c_int]
+_prototype("ASIOpenCamera", ctypes.c_int, [ctypes.c_int])
 def openCamera(cameraID):
     """
     @brief Opens camera before any operation
@@ -255,8 +454,7 @@ def openCamera(cameraID):
         raise ASIError(f"Failed to open camera. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIInitCamera(int iCameraID)
-lib.ASIInitCamera.restype = ctypes.c_int
-lib.ASIInitCamera.argtypes = [ctypes.c_int]
+_prototype("ASIInitCamera", ctypes.c_int, [ctypes.c_int])
 def initCamera(cameraID):
     """
     @brief Initializes camera before any operation
@@ -270,8 +468,7 @@ def initCamera(cameraID):
         raise ASIError(f"Failed to initialize camera. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASICloseCamera(int iCameraID)
-lib.ASICloseCamera.restype = ctypes.c_int
-lib.ASICloseCamera.argtypes = [ctypes.c_int]
+_prototype("ASICloseCamera", ctypes.c_int, [ctypes.c_int])
 def closeCamera(cameraID):
     """
     @brief Closes camera to free all the resources
@@ -283,8 +480,7 @@ def closeCamera(cameraID):
         raise ASIError(f"Failed to close camera. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIGetNumOfControls(int iCameraID, int * piNumberOfControls)
-lib.ASIGetNumOfControls.restype = ctypes.c_int
-lib.ASIGetNumOfControls.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetNumOfControls", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int)])
 def getNumOfControls(cameraID):
     """
     @brief Gets number of controls available for this camera
@@ -304,8 +500,7 @@ def getNumOfControls(cameraID):
     return pNumOfControls.value
 
 # Defining ASI_ERROR_CODE ASIGetControlCaps(int iCameraID, int iControlIndex, ASI_CONTROL_CAPS * pControlCaps)
-lib.ASIGetControlCaps.restype = ctypes.c_int
-lib.ASIGetControlCaps.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(ControlCaps)]
+_prototype("ASIGetControlCaps", ctypes.c_int, [ctypes.c_int, ctypes.c_int, ctypes.POINTER(ControlCaps)])
 def getControlCaps(cameraID, controlIndex):
     """
     @brief Gets controls property available for this camera
@@ -322,8 +517,7 @@ def getControlCaps(cameraID, controlIndex):
     return controlCaps
 
 # Defining ASI_ERROR_CODE ASIGetControlValue(int iCameraID, ASI_CONTROL_TYPE ControlType, long *plValue, ASI_BOOL *pbAuto)
-lib.ASIGetControlValue.restype = ctypes.c_int
-lib.ASIGetControlValue.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_long), ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetControlValue", ctypes.c_int, [ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_long), ctypes.POINTER(ctypes.c_int)])
 def getControlValue(cameraID, controlType):
     """
     @brief Gets the value of a specific control of the camera
@@ -342,8 +536,7 @@ def getControlValue(cameraID, controlType):
     return value.value, autoStatus.value == 1
 
 # Defining ASI_ERROR_CODE ASISetControlValue(int iCameraID, ASI_CONTROL_TYPE  ControlType, long lValue, ASI_BOOL bAuto)
-lib.ASISetControlValue.restype = ctypes.c_int
-lib.ASISetControlValue.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_int]
+_prototype("ASISetControlValue", ctypes.c_int, [ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_int])
 def setControlValue(cameraID, controlType, value, auto):
     """
     @brief Sets the value of a specific control of the camera
@@ -359,9 +552,52 @@ def setControlValue(cameraID, controlType, value, auto):
     if errorCode != 0:
         raise ASIError(f"Failed to set control value for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
+def getControlValues(cameraID, controlTypes):
+    """
+    @brief Gets the values of several controls of the camera
+
+    @note The SDK has no batched call, but the ctypes arguments are built
+          once and reused for every control, which is much cheaper than
+          calling getControlValue in a loop
+
+    @param cameraID     ID of the camera
+    @param controlTypes Iterable of control types to get the values of
+
+    @return List of tuples containing value of the control
+                                      auto status
+            in the same order as controlTypes
+    """
+    value      = ctypes.c_long()
+    autoStatus = ctypes.c_int()
+    pValue      = ctypes.byref(value)
+    pAutoStatus = ctypes.byref(autoStatus)
+    getValue    = lib.ASIGetControlValue
+
+    values = []
+    for controlType in controlTypes:
+        errorCode = getValue(cameraID, controlType, pValue, pAutoStatus)
+        if errorCode != 0:
+            raise ASIError(f"Failed to get control value {controlType} for cameraID {cameraID}. Error code: {errorCode}", errorCode)
+        values.append((value.value, autoStatus.value == 1))
+    return values
+
+def setControlValues(cameraID, controls):
+    """
+    @brief Sets the values of several controls of the camera
+
+    @note It will clamp the values to the minimum or the maximum if out of range
+
+    @param cameraID ID of the camera
+    @param controls Iterable of tuples (controlType, value, auto)
+    """
+    setValue = lib.ASISetControlValue
+    for controlType, value, auto in controls:
+        errorCode = setValue(cameraID, controlType, value, auto)
+        if errorCode != 0:
+            raise ASIError(f"Failed to set control value {controlType} for cameraID {cameraID}. Error code: {errorCode}", errorCode)
+
 # Defining ASI_ERROR_CODE ASIGetROIFormat(int iCameraID, int *piWidth, int *piHeight, int *piBin, ASI_IMG_TYPE *pImg_type)
-lib.ASIGetROIFormat.restype = ctypes.c_int
-lib.ASIGetROIFormat.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetROIFormat", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)])
 def getROIFormat(cameraID):
     """
     @brief Gets the current ROI format settings of the camera
@@ -385,8 +621,7 @@ def getROIFormat(cameraID):
     return width.value, height.value, binning.value, ASIImageType(imgType.value)
 
 # Defining ASI_ERROR_CODE ASISetROIFormat(int iCameraID, int iWidth, int iHeight, int iBin, ASI_IMG_TYPE Img_type)
-lib.ASISetROIFormat.restype = ctypes.c_int
-lib.ASISetROIFormat.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+_prototype("ASISetROIFormat", ctypes.c_int, [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int])
 def setROIFormat(cameraID, width, height, binning, imgType):
     """
     @brief Sets the ROI format settings of the camera before capture
@@ -405,8 +640,7 @@ def setROIFormat(cameraID, width, height, binning, imgType):
         raise ASIError(f"Failed to set ROI format for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIGetStartPos(int iCameraID, int *piStartX, int *piStartY)
-lib.ASIGetStartPos.restype = ctypes.c_int
-lib.ASIGetStartPos.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetStartPos", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)])
 def getStartPos(cameraID):
     """
     @brief Gets the start position of the current ROI area
@@ -424,8 +658,7 @@ def getStartPos(cameraID):
     return startX.value, startY.value
 
 # Defining ASI_ERROR_CODE ASISetStartPos(int iCameraID, int iStartX, int iStartY)
-lib.ASISetStartPos.restype = ctypes.c_int
-lib.ASISetStartPos.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+_prototype("ASISetStartPos", ctypes.c_int, [ctypes.c_int, ctypes.c_int, ctypes.c_int])
 def setStartPos(cameraID, startX, startY):
     """
     @brief Sets the start position of the ROI area
@@ -439,8 +672,7 @@ def setStartPos(cameraID, startX, startY):
         raise ASIError(f"Failed to set start position for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIGetDroppedFrames(int iCameraID,int *piDropFrames)
-lib.ASIGetDroppedFrames.restype = ctypes.c_int
-lib.ASIGetDroppedFrames.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetDroppedFrames", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int)])
 def getDroppedFrames(cameraID):
     """
     @brief Gets the number of dropped frames
@@ -459,8 +691,7 @@ def getDroppedFrames(cameraID):
     return droppedFrames.value
 
 # Defining ASI_ERROR_CODE ASIEnableDarkSubtract(int iCameraID, char *pcBMPPath)
-lib.ASIEnableDarkSubtract.restype = ctypes.c_int
-lib.ASIEnableDarkSubtract.argtypes = [ctypes.c_int, ctypes.c_char_p]
+_prototype("ASIEnableDarkSubtract", ctypes.c_int, [ctypes.c_int, ctypes.c_char_p])
 def enableDarkSubtract(cameraID, bmpPath):
     """
     @brief Enables the dark subtract function from a dark BMP file
@@ -480,8 +711,7 @@ def enableDarkSubtract(cameraID, bmpPath):
         raise ASIError(f"Failed to enable dark subtract for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIDisableDarkSubtract(int iCameraID)
-lib.ASIDisableDarkSubtract.restype = ctypes.c_int
-lib.ASIDisableDarkSubtract.argtypes = [ctypes.c_int]
+_prototype("ASIDisableDarkSubtract", ctypes.c_int, [ctypes.c_int])
 def disableDarkSubtract(cameraID):
     """
     @brief Disables the dark subtract function
@@ -496,8 +726,7 @@ def disableDarkSubtract(cameraID):
         raise ASIError(f"Failed to disable dark subtract for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIStartVideoCapture(int iCameraID)
-lib.ASIStartVideoCapture.restype = ctypes.c_int
-lib.ASIStartVideoCapture.argtypes = [ctypes.c_int]
+_prototype("ASIStartVideoCapture", ctypes.c_int, [ctypes.c_int])
 def startVideoCapture(cameraID):
     """
     @brief Starts video capture
@@ -509,8 +738,7 @@ def startVideoCapture(cameraID):
         raise ASIError(f"Failed to start video capture for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIStopVideoCapture(int iCameraID)
-lib.ASIStopVideoCapture.restype = ctypes.c_int
-lib.ASIStopVideoCapture.argtypes = [ctypes.c_int]
+_prototype("ASIStopVideoCapture", ctypes.c_int, [ctypes.c_int])
 def stopVideoCapture(cameraID):
     """
     @brief Stops video capture
@@ -522,8 +750,7 @@ def stopVideoCapture(cameraID):
         raise ASIError(f"Failed to stop video capture for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIGetVideoData(int iCameraID, unsigned char* pBuffer, long lBuffSize, int iWaitms)
-lib.ASIGetVideoData.restype = ctypes.c_int
-lib.ASIGetVideoData.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long, ctypes.c_int]
+_prototype("ASIGetVideoData", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long, ctypes.c_int])
 def getVideoData(cameraID, bufferSize, waitms):
     """
     @brief Gets video data from the camera buffer
@@ -546,20 +773,79 @@ def getVideoData(cameraID, bufferSize, waitms):
 
     @return Buffer containing the video data
     """
-    buffer = (ctypes.c_ubyte * bufferSize)()
-    errorCode = lib.ASIGetVideoData(cameraID, buffer, bufferSize, waitms)
+    buffer = bytearray(bufferSize)
+    getVideoDataInto(cameraID, buffer, waitms)
+    return bytes(buffer)
+
+def getVideoDataInto(cameraID, buffer, waitms):
+    """
+    @brief Gets video data from the camera buffer directly into a caller
+           supplied buffer, without any allocation nor copy
+
+    @note Same constraints as getVideoData. The buffer can be reused from
+          one frame to the next, which is the recommended way to keep the
+          buffer loop fast.
+
+    @param cameraID ID of the camera
+    @param buffer   Writable C-contiguous buffer (NumPy array, bytearray,
+                    memoryview, ...) large enough to hold one image
+    @param waitms   Time to wait for the data in milliseconds, -1 for
+                    infinite
+
+    @return Given buffer, filled with the video data
+    """
+    cBuffer = _asCBuffer(buffer)
+    errorCode = lib.ASIGetVideoData(cameraID, cBuffer, len(cBuffer), waitms)
     if errorCode != 0:
         raise ASIError(f"Failed to get video data for cameraID {cameraID}. Error code: {errorCode}", errorCode)
-    return bytes(buffer)
+    return buffer
 
 # Defining ASI_ERROR_CODE ASIGetVideoDataGPS(int iCameraID, unsigned char* pBuffer, long lBuffSize, int iWaitms, ASI_GPS_DATA *gpsData)
-lib.ASIGetVideoDataGPS.restype = ctypes.c_int
-lib.ASIGetVideoDataGPS.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long, ctypes.c_int, ctypes.POINTER(GPSData)]
-# =============== TO BE DONE ===============
+_prototype("ASIGetVideoDataGPS", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long, ctypes.c_int, ctypes.POINTER(GPSData)])
+def getVideoDataGPS(cameraID, bufferSize, waitms):
+    """
+    @brief Gets video data from the camera buffer, with the GPS data of the
+           frame
+
+    @note Same constraints as getVideoData. Only available for cameras
+          with GPS, see the GPSSupport control.
+
+    @param cameraID   ID of the camera
+    @param bufferSize Size of the buffer in bytes, see getVideoData
+    @param waitms     Time to wait for the data in milliseconds, -1 for
+                      infinite
+
+    @return Tuple containing the buffer containing the video data
+                             GPSData of the frame
+    """
+    buffer = bytearray(bufferSize)
+    gpsData = getVideoDataGPSInto(cameraID, buffer, waitms)
+    return bytes(buffer), gpsData
+
+def getVideoDataGPSInto(cameraID, buffer, waitms, gpsData=None):
+    """
+    @brief Gets video data and its GPS data directly into caller supplied
+           buffers, without any allocation nor copy
+
+    @param cameraID ID of the camera
+    @param buffer   Writable C-contiguous buffer large enough to hold one
+                    image
+    @param waitms   Time to wait for the data in milliseconds, -1 for
+                    infinite
+    @param gpsData  GPSData to fill, or writable buffer of one record (e.g.
+                    a row of a GPSTable), None for a new GPSData
+
+    @return GPSData filled by the SDK, sharing the memory of gpsData
+    """
+    cBuffer = _asCBuffer(buffer)
+    gpsData = _asGPSData(gpsData)
+    errorCode = lib.ASIGetVideoDataGPS(cameraID, cBuffer, len(cBuffer), waitms, ctypes.byref(gpsData))
+    if errorCode != 0:
+        raise ASIError(f"Failed to get video data with GPS for cameraID {cameraID}. Error code: {errorCode}", errorCode)
+    return gpsData
 
 # Defining ASI_ERROR_CODE ASIPulseGuideOn(int iCameraID, ASI_GUIDE_DIRECTION direction)
-lib.ASIPulseGuideOn.restype = ctypes.c_int
-lib.ASIPulseGuideOn.argtypes = [ctypes.c_int, ctypes.c_int]
+_prototype("ASIPulseGuideOn", ctypes.c_int, [ctypes.c_int, ctypes.c_int])
 def pulseGuideOn(cameraID, direction):
     """
     @brief Pulsing guide on the ST4 port set to on
@@ -576,8 +862,7 @@ def pulseGuideOn(cameraID, direction):
         raise ASIError(f"Failed to pulse guide on for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIPulseGuideOff(int iCameraID, ASI_GUIDE_DIRECTION direction)
-lib.ASIPulseGuideOff.restype = ctypes.c_int
-lib.ASIPulseGuideOff.argtypes = [ctypes.c_int, ctypes.c_int]
+_prototype("ASIPulseGuideOff", ctypes.c_int, [ctypes.c_int, ctypes.c_int])
 def pulseGuideOff(cameraID, direction):
     """
     @brief Pulsing guide on the ST4 port set to off
@@ -594,8 +879,7 @@ def pulseGuideOff(cameraID, direction):
         raise ASIError(f"Failed to pulse guide off for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIStartExposure(int iCameraID, ASI_BOOL bIsDark)
-lib.ASIStartExposure.restype = ctypes.c_int
-lib.ASIStartExposure.argtypes = [ctypes.c_int, ctypes.c_int]
+_prototype("ASIStartExposure", ctypes.c_int, [ctypes.c_int, ctypes.c_int])
 def startExposure(cameraID, isDark):
     """
     @brief Starts exposure
@@ -611,8 +895,7 @@ def startExposure(cameraID, isDark):
         raise ASIError(f"Failed to start exposure for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIStopExposure(int iCameraID)
-lib.ASIStopExposure.restype = ctypes.c_int
-lib.ASIStopExposure.argtypes = [ctypes.c_int]
+_prototype("ASIStopExposure", ctypes.c_int, [ctypes.c_int])
 def stopExposure(cameraID):
     """
     @brief Stops long exposure which is on
@@ -624,8 +907,7 @@ def stopExposure(cameraID):
         raise ASIError(f"Failed to stop exposure for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIGetExpStatus(int iCameraID, ASI_EXPOSURE_STATUS *pExpStatus)
-lib.ASIGetExpStatus.restype = ctypes.c_int
-lib.ASIGetExpStatus.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetExpStatus", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int)])
 def getExpStatus(cameraID):
     """
     @brief Get snap status
@@ -646,8 +928,7 @@ def getExpStatus(cameraID):
     return ASIExposureStatus(expStatus.value)
 
 # Defining ASI_ERROR_CODE ASIGetDataAfterExp(int iCameraID, unsigned char* pBuffer, long lBuffSize)
-lib.ASIGetDataAfterExp.restype = ctypes.c_int
-lib.ASIGetDataAfterExp.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long]
+_prototype("ASIGetDataAfterExp", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long])
 def getDataAfterExp(cameraID, bufferSize):
     """
     @brief Get data after exposure
@@ -663,20 +944,67 @@ def getDataAfterExp(cameraID, bufferSize):
 
     @return Buffer containing the data after exposure
     """
-    buffer = (ctypes.c_ubyte * bufferSize)()
-    errorCode = lib.ASIGetDataAfterExp(cameraID, buffer, bufferSize)
+    buffer = bytearray(bufferSize)
+    getDataAfterExpInto(cameraID, buffer)
+    return bytes(buffer)
+
+def getDataAfterExpInto(cameraID, buffer):
+    """
+    @brief Get data after exposure directly into a caller supplied buffer,
+           without any allocation nor copy
+
+    @param cameraID ID of the camera
+    @param buffer   Writable C-contiguous buffer (NumPy array, bytearray,
+                    memoryview, ...) large enough to hold one image
+
+    @return Given buffer, filled with the data after exposure
+    """
+    cBuffer = _asCBuffer(buffer)
+    errorCode = lib.ASIGetDataAfterExp(cameraID, cBuffer, len(cBuffer))
     if errorCode != 0:
         raise ASIError(f"Failed to get data after exposure for cameraID {cameraID}. Error code: {errorCode}", errorCode)
-    return bytes(buffer)
+    return buffer
 
 # Defining ASI_ERROR_CODE ASIGetDataAfterExpGPS(int iCameraID, unsigned char* pBuffer, long lBuffSize, ASI_GPS_DATA *gpsData)
-lib.ASIGetDataAfterExpGPS.restype = ctypes.c_int
-lib.ASIGetDataAfterExpGPS.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long, ctypes.POINTER(GPSData)]
-# ================= TO BE DONE =================
+_prototype("ASIGetDataAfterExpGPS", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_long, ctypes.POINTER(GPSData)])
+def getDataAfterExpGPS(cameraID, bufferSize):
+    """
+    @brief Get data after exposure, with the GPS data of the exposure
+
+    @note Only available for cameras with GPS, see the GPSSupport control
+
+    @param cameraID   ID of the camera
+    @param bufferSize Size of the buffer in bytes, see getDataAfterExp
+
+    @return Tuple containing the buffer containing the data after exposure
+                             GPSData of the exposure
+    """
+    buffer = bytearray(bufferSize)
+    gpsData = getDataAfterExpGPSInto(cameraID, buffer)
+    return bytes(buffer), gpsData
+
+def getDataAfterExpGPSInto(cameraID, buffer, gpsData=None):
+    """
+    @brief Get data after exposure and its GPS data directly into caller
+           supplied buffers, without any allocation nor copy
+
+    @param cameraID ID of the camera
+    @param buffer   Writable C-contiguous buffer large enough to hold one
+                    image
+    @param gpsData  GPSData to fill, or writable buffer of one record, None
+                    for a new GPSData
+
+    @return GPSData filled by the SDK, sharing the memory of gpsData
+    """
+    cBuffer = _asCBuffer(buffer)
+    gpsData = _asGPSData(gpsData)
+    errorCode = lib.ASIGetDataAfterExpGPS(cameraID, cBuffer, len(cBuffer), ctypes.byref(gpsData))
+    if errorCode != 0:
+        raise ASIError(f"Failed to get data after exposure with GPS for cameraID {cameraID}. Error code: {errorCode}", errorCode)
+    return gpsData
 
 # Defining ASI_ERROR_CODE ASIGetID(int iCameraID, ASI_ID* pID)
-lib.ASIGetID.restype = ctypes.c_int
-lib.ASIGetID.argtypes = [ctypes.c_int, ctypes.POINTER(ID)]
+_prototype("ASIGetID", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ID)])
 def getID(cameraID):
     """
     @brief Gets the ID of the camera
@@ -694,8 +1022,7 @@ def getID(cameraID):
     return cameraIDStruct
 
 # Defining ASI_ERROR_CODE ASISetID(int iCameraID, ASI_ID ID)
-lib.ASISetID.restype = ctypes.c_int
-lib.ASISetID.argtypes = [ctypes.c_int, ID]
+_prototype("ASISetID", ctypes.c_int, [ctypes.c_int, ID])
 def setID(cameraID, newCameraID):
     """
     @brief Writes camera ID to flash.
@@ -710,8 +1037,7 @@ def setID(cameraID, newCameraID):
         raise ASIError(f"Failed to set ID for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIGetGainOffset(int iCameraID, int *pOffset_HighestDR, int *pOffset_UnityGain, int *pGain_LowestRN, int *pOffset_LowestRN)
-lib.ASIGetGainOffset.restype = ctypes.c_int
-lib.ASIGetGainOffset.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetGainOffset", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)])
 def getGainOffset(cameraID):
     """
     @brief Gets the gain and offset pre-setting parameters values for the camera
@@ -740,8 +1066,7 @@ def getGainOffset(cameraID):
     return (offsetHighestDR.value, offsetUnityGain.value, gainLowestRN.value, offsetLowestRN.value)
 
 # Defining ASI_ERROR_CODE ASIGetLMHGainOffset(int iCameraID, int* pLGain, int* pMGain, int* pHGain, int* pHOffset)
-lib.ASIGetLMHGainOffset.restype = ctypes.c_int
-lib.ASIGetLMHGainOffset.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetLMHGainOffset", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)])
 def getLMHGainOffset(cameraID):
     """
     @brief Gets the frequently-used gain and offset pre-setting parameters values for the camera
@@ -769,8 +1094,7 @@ def getLMHGainOffset(cameraID):
     return (lGain.value, mGain.value, hGain.value, hOffset.value)
 
 # Defining char* ASIGetSDKVersion()
-lib.ASIGetSDKVersion.restype = ctypes.c_char_p
-lib.ASIGetSDKVersion.argtypes = []
+_prototype("ASIGetSDKVersion", ctypes.c_char_p, [])
 def getSDKVersion():
     """
     @brief Gets the version of the SDK
@@ -780,8 +1104,7 @@ def getSDKVersion():
     return lib.ASIGetSDKVersion().decode('utf-8')
 
 # Defining ASI_ERROR_CODE ASIGetCameraSupportMode(int iCameraID, ASI_SUPPORTED_MODE* pSupportedMode)
-lib.ASIGetCameraSupportMode.restype = ctypes.c_int
-lib.ASIGetCameraSupportMode.argtypes = [ctypes.c_int, ctypes.POINTER(SupportedMode)]
+_prototype("ASIGetCameraSupportMode", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(SupportedMode)])
 def getCameraSupportMode(cameraID):
     """
     @brief Gets the supported mode of the camera
@@ -801,8 +1124,7 @@ def getCameraSupportMode(cameraID):
     return supportedMode
 
 # Defining ASI_ERROR_CODE ASIGetCameraMode(int iCameraID, ASI_CAMERA_MODE* mode)
-lib.ASIGetCameraMode.restype = ctypes.c_int
-lib.ASIGetCameraMode.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+_prototype("ASIGetCameraMode", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(ctypes.c_int)])
 def getCameraMode(cameraID):
     """
     @brief Gets the current camera mode
@@ -824,8 +1146,7 @@ def getCameraMode(cameraID):
     return cameraMode.value
 
 # Defining ASI_ERROR_CODE ASISetCameraMode(int iCameraID, ASI_CAMERA_MODE mode)
-lib.ASISetCameraMode.restype = ctypes.c_int
-lib.ASISetCameraMode.argtypes = [ctypes.c_int, ctypes.c_int]
+_prototype("ASISetCameraMode", ctypes.c_int, [ctypes.c_int, ctypes.c_int])
 def setCameraMode(cameraID, cameraMode):
     """
     @brief Sets the camera mode
@@ -844,8 +1165,7 @@ def setCameraMode(cameraID, cameraMode):
         raise ASIError(f"Failed to set camera mode for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASISendSoftTrigger(int iCameraID, ASI_BOOL bStart)
-lib.ASISendSoftTrigger.restype = ctypes.c_int
-lib.ASISendSoftTrigger.argtypes = [ctypes.c_int, ctypes.c_int]
+_prototype("ASISendSoftTrigger", ctypes.c_int, [ctypes.c_int, ctypes.c_int])
 def sendSoftTrigger(cameraID, start):
     """
     @brief Sends a softTrigger to the camera
@@ -858,8 +1178,7 @@ def sendSoftTrigger(cameraID, start):
         raise ASIError(f"Failed to send soft trigger for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASIGetSerialNumber(int iCameraID, ASI_SN* pSN)
-lib.ASIGetSerialNumber.restype = ctypes.c_int
-lib.ASIGetSerialNumber.argtypes = [ctypes.c_int, ctypes.POINTER(SN)]
+_prototype("ASIGetSerialNumber", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(SN)])
 def getSerialNumber(cameraID):
     """
     @brief Gets the serial number of the camera
@@ -877,8 +1196,7 @@ def getSerialNumber(cameraID):
     return ''.join(f"{b:02X}" for b in serialNumber.SN)
 
 # Defining ASI_ERROR_CODE ASISetTriggerOutputIOConf(int iCameraID, ASI_TRIG_OUTPUT_PIN pin, ASI_BOOL bPinHigh, long lDelay, long lDuration)
-lib.ASISetTriggerOutputIOConf.restype = ctypes.c_int
-lib.ASISetTriggerOutputIOConf.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_long]
+_prototype("ASISetTriggerOutputIOConf", ctypes.c_int, [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_long])
 def setTriggerOutputIOConf(cameraID, pin, bPinHigh, delay, duration):
     """
     @brief Sets the trigger output IO pin configuration
@@ -899,8 +1217,7 @@ def setTriggerOutputIOConf(cameraID, pin, bPinHigh, delay, duration):
         raise ASIError(f"Failed to set trigger output IO configuration for cameraID {cameraID}. Error code: {errorCode}", errorCode)
 
 # Defining ASI_ERROR_CODE ASIGetTriggerOutputIOConf(int iCameraID, ASI_TRIG_OUTPUT_PIN pin, ASI_BOOL *bPinHigh, long *lDelay, long *lDuration)
-lib.ASIGetTriggerOutputIOConf.restype = ctypes.c_int
-lib.ASIGetTriggerOutputIOConf.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_long), ctypes.POINTER(ctypes.c_long)]
+_prototype("ASIGetTriggerOutputIOConf", ctypes.c_int, [ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_long), ctypes.POINTER(ctypes.c_long)])
 def getTriggerOutputIOConf(cameraID, pin):
     """
     @brief Gets the trigger output IO pin configuration
@@ -933,6 +1250,21 @@ def getTriggerOutputIOConf(cameraID, pin):
     return (bPinHigh.value == 1, lDelay.value, lDuration.value)
 
 # Defining ASI_ERROR_CODE ASIGPSGetData(int iCameraID, ASI_GPS_DATA* startLineGPSData, ASI_GPS_DATA* endLineGPSData)
-lib.ASIGPSGetData.restype = ctypes.c_int
-lib.ASIGPSGetData.argtypes = [ctypes.c_int, ctypes.POINTER(GPSData), ctypes.POINTER(GPSData)]
-# ============= TO BE DONE =============
\ No newline at end of file
+_prototype("ASIGPSGetData", ctypes.c_int, [ctypes.c_int, ctypes.POINTER(GPSData), ctypes.POINTER(GPSData)])
+def gpsGetData(cameraID):
+    """
+    @brief Gets the GPS data of the start and end lines of the last frame
+
+    @note The lines are set with the GPSStartLine and GPSEndLine controls
+
+    @param cameraID ID of the camera
+
+    @return Tuple containing the GPSData of the start line
+                             GPSData of the end line
+    """
+    startLineGPSData = GPSData()
+    endLineGPSData   = GPSData()
+    errorCode = lib.ASIGPSGetData(cameraID, ctypes.byref(startLineGPSData), ctypes.byref(endLineGPSData))
+    if errorCode != 0:
+        raise ASIError(f"Failed to get GPS data for cameraID {cameraID}. Error code: {errorCode}", errorCode)
+    return startLineGPSData, endLineGPSData
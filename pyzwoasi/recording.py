@@ -0,0 +1,480 @@
+import os, struct, tempfile, threading, time
+import numpy as np
+
+from .pyzwoasi import ASIBayerPattern, ASIImageType
+from .stream   import VideoStream
+
+# Offset between .NET ticks epoch (0001-01-01) and Unix epoch, in seconds
+_ticksEpochOffset = 62135596800
+
+def _toTicks(timestamps):
+    # SER timestamps are .NET ticks: 100 ns units since 0001-01-01 UTC.
+    # Whole seconds are converted apart so that ticks keep sub-microsecond
+    # precision, which float64 loses at the scale of the ticks epoch.
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    seconds    = np.floor(timestamps)
+    return (seconds.astype(np.int64) + _ticksEpochOffset) * 10_000_000 + np.round((timestamps - seconds) * 10_000_000).astype(np.int64)
+
+class _TimestampLog:
+    """
+    Per-frame timestamps, kept in a float64 chunk which is spilled to a
+    temporary file once full, so that memory use does not depend on the
+    recording length.
+    """
+    def __init__(self, chunkSize=4096):
+        self._chunk = np.empty(chunkSize, dtype=np.float64)
+        self._count = 0
+        self._total = 0
+        self._first = None
+        self._spill = None
+
+    def __len__(self):
+        return self._total
+
+    @property
+    def first(self):
+        return self._first
+
+    def append(self, timestamp):
+        if self._count == self._chunk.shape[0]:
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile()
+            self._spill.write(self._chunk.tobytes())
+            self._count = 0
+        if self._first is None:
+            self._first = timestamp
+        self._chunk[self._count] = timestamp
+        self._count += 1
+        self._total += 1
+
+    def chunks(self):
+        # Arrays of the timestamps in order, at most one chunk in memory
+        if self._spill is not None:
+            self._spill.seek(0)
+            while True:
+                data = self._spill.read(self._chunk.nbytes)
+                if not data:
+                    break
+                yield np.frombuffer(data, dtype=np.float64)
+        yield self._chunk[:self._count]
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+class _FrameMap:
+    """
+    Memory-mapped window of a few frames in a growing file. Only one
+    window is mapped at a time, so that memory use does not depend on the
+    recording length.
+    """
+    def __init__(self, file, offset, frameShape, dtype, chunkFrames):
+        self._file        = file
+        self._offset      = offset
+        self._frameShape  = tuple(frameShape)
+        self._dtype       = np.dtype(dtype)
+        self._frameBytes  = int(np.prod(frameShape)) * self._dtype.itemsize
+        self._chunkFrames = chunkFrames
+        self._chunk       = None
+        self._chunkIndex  = -1
+
+    def frame(self, frameIndex):
+        chunkIndex = frameIndex // self._chunkFrames
+        if chunkIndex != self._chunkIndex:
+            self._release()
+            start = self._offset + chunkIndex * self._chunkFrames * self._frameBytes
+            end   = start + self._chunkFrames * self._frameBytes
+            if os.fstat(self._file.fileno()).st_size < end:
+                self._file.truncate(end)
+            self._chunk = np.memmap(self._file, dtype=self._dtype, mode="r+", offset=start,
+                                    shape=(self._chunkFrames,) + self._frameShape)
+            self._chunkIndex = chunkIndex
+        return self._chunk[frameIndex - chunkIndex * self._chunkFrames]
+
+    def _release(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+            self._chunkIndex = -1
+
+    def close(self, numOfFrames):
+        self._release()
+        self._file.truncate(self._offset + numOfFrames * self._frameBytes)
+
+class SERWriter:
+    """
+    @brief Writes frames into a SER video file (version 3), the format of
+           most planetary and lucky imaging software
+
+    @note Frames are stored as given by the camera: Bayer pattern of raw
+          frames and BGR order of RGB24 frames are declared in the header.
+          Per-frame UTC timestamps are written in the trailer.
+    """
+
+    _colorIDs = {
+        ASIBayerPattern.ASI_BAYER_RG: 8,  # BAYER_RGGB
+        ASIBayerPattern.ASI_BAYER_GR: 9,  # BAYER_GRBG
+        ASIBayerPattern.ASI_BAYER_GB: 10, # BAYER_GBRG
+        ASIBayerPattern.ASI_BAYER_BG: 11, # BAYER_BGGR
+    }
+    _headerSize = 178
+
+    def __init__(self, path, frameShape, imageType, isColorCam=False, bayerPattern=ASIBayerPattern.ASI_BAYER_RG,
+                 observer="", instrument="", telescope="", chunkFrames=64):
+        imageType = ASIImageType(imageType)
+        if   imageType == ASIImageType.ASI_IMG_RGB24:
+            colorID, dtype = 101, np.uint8 # BGR
+        elif imageType == ASIImageType.ASI_IMG_Y8 or not isColorCam:
+            colorID, dtype = 0, (np.uint16 if imageType == ASIImageType.ASI_IMG_RAW16 else np.uint8)
+        else:
+            colorID, dtype = self._colorIDs[ASIBayerPattern(bayerPattern)], (np.uint16 if imageType == ASIImageType.ASI_IMG_RAW16 else np.uint8)
+
+        self._frameShape  = tuple(frameShape)
+        self._colorID     = colorID
+        self._dtype       = np.dtype(dtype)
+        self._texts       = (observer, instrument, telescope)
+        self._timestamps  = _TimestampLog()
+        self._numOfFrames = 0
+
+        self._file = open(path, "w+b")
+        self._file.write(self._header(0, time.time()))
+        self._frames = _FrameMap(self._file, self._headerSize, self._frameShape, self._dtype, chunkFrames)
+
+    def _header(self, numOfFrames, timestamp):
+        height, width = self._frameShape[:2]
+        observer, instrument, telescope = (text.encode("ascii", "replace")[:40].ljust(40) for text in self._texts)
+        localTimestamp = timestamp - time.timezone
+        # LittleEndian is 0 for little-endian data, the de facto convention
+        # followed by capture and stacking software (spec says otherwise)
+        return struct.pack("<14s7i40s40s40sqq", b"LUCAM-RECORDER", 0, self._colorID, 0,
+                           width, height, 8 * self._dtype.itemsize, numOfFrames,
+                           observer, instrument, telescope,
+                           int(_toTicks(localTimestamp)), int(_toTicks(timestamp)))
+
+    @property
+    def numOfFrames(self):
+        return self._numOfFrames
+
+    def write(self, image, timestamp):
+        """
+        @param image     Frame as given by the camera
+        @param timestamp Acquisition time, seconds since epoch (UTC)
+        """
+        self._frames.frame(self._numOfFrames)[...] = image
+        self._timestamps.append(timestamp)
+        self._numOfFrames += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._frames.close(self._numOfFrames)
+
+        # Trailer holds one timestamp per frame
+        self._file.seek(0, os.SEEK_END)
+        for timestamps in self._timestamps.chunks():
+            self._file.write(_toTicks(timestamps).astype("<i8").tobytes())
+        self._file.seek(0)
+        self._file.write(self._header(self._numOfFrames, self._timestamps.first if self._timestamps.first is not None else time.time()))
+        self._file.close()
+        self._timestamps.close()
+        self._file = None
+
+class FITSWriter:
+    """
+    @brief Writes frames into a FITS data cube
+
+    @note The primary HDU holds the frames, one plane (or three for color
+          frames, in RGB order) per frame. A binary table extension named
+          TIMESTAMPS holds the acquisition time of each frame. Unsigned 16
+          bit data is stored with BZERO = 32768 as required by FITS.
+    """
+
+    _blockSize = 2880
+    _bayerNames = {
+        ASIBayerPattern.ASI_BAYER_RG: "RGGB",
+        ASIBayerPattern.ASI_BAYER_BG: "BGGR",
+        ASIBayerPattern.ASI_BAYER_GR: "GRBG",
+        ASIBayerPattern.ASI_BAYER_GB: "GBRG",
+    }
+
+    def __init__(self, path, frameShape, imageType, isColorCam=False, bayerPattern=ASIBayerPattern.ASI_BAYER_RG,
+                 instrument="", chunkFrames=64):
+        imageType = ASIImageType(imageType)
+        height, width = frameShape[:2]
+
+        self._imageType   = imageType
+        self._instrument  = instrument
+        self._bayerName   = self._bayerNames[ASIBayerPattern(bayerPattern)] if isColorCam and imageType in (ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_RAW16) else None
+        self._timestamps  = _TimestampLog()
+        self._numOfFrames = 0
+
+        if imageType == ASIImageType.ASI_IMG_RGB24:
+            planeShape = (3, height, width)
+        else:
+            planeShape = (height, width)
+        self._planeShape = planeShape
+        self._is16Bits   = imageType == ASIImageType.ASI_IMG_RAW16
+        self._scratch    = np.empty((height, width), dtype=np.uint16) if self._is16Bits else None
+
+        self._file = open(path, "w+b")
+        header = self._primaryHeader(0, time.time())
+        self._file.write(header)
+        self._frames = _FrameMap(self._file, len(header), planeShape, ">u2" if self._is16Bits else "u1", chunkFrames)
+
+    @staticmethod
+    def _card(keyword, value=None, comment=""):
+        if value is None:
+            card = keyword
+        else:
+            # Fixed format: strings start at column 11, other values end at column 30
+            if isinstance(value, bool):
+                value = f"{'T' if value else 'F':>20}"
+            elif isinstance(value, str):
+                value = ("'" + value.replace("'", "''").ljust(8) + "'").ljust(20)
+            else:
+                value = f"{value:>20}"
+            card = f"{keyword:<8}= {value}"
+            if comment:
+                card += f" / {comment}"
+        return card[:80].ljust(80)
+
+    def _pad(self, cards):
+        header = "".join(cards) + self._card("END")
+        header += " " * (-len(header) % self._blockSize)
+        return header.encode("ascii")
+
+    def _primaryHeader(self, numOfFrames, timestamp):
+        axes = [self._planeShape[-1], self._planeShape[-2]] + ([3] if len(self._planeShape) == 3 else []) + [numOfFrames]
+        cards = [
+            self._card("SIMPLE", True, "conforms to FITS standard"),
+            self._card("BITPIX", 16 if self._is16Bits else 8, "bits per data value"),
+            self._card("NAXIS" , len(axes), "number of axes"),
+        ]
+        cards += [self._card(f"NAXIS{axis + 1}", size) for axis, size in enumerate(axes)]
+        cards += [
+            self._card("BZERO"   , 32768 if self._is16Bits else 0, "unsigned data offset"),
+            self._card("BSCALE"  , 1),
+            self._card("DATE-OBS", time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(timestamp)) + f".{int(timestamp % 1 * 1e6):06d}", "UTC start of the recording"),
+            self._card("ROWORDER", "TOP-DOWN"),
+            self._card("INSTRUME", self._instrument),
+            self._card("BAYERPAT", self._bayerName or "NONE"),
+        ]
+        return self._pad(cards)
+
+    @property
+    def numOfFrames(self):
+        return self._numOfFrames
+
+    def write(self, image, timestamp):
+        """
+        @param image     Frame as given by the camera
+        @param timestamp Acquisition time, seconds since epoch (UTC)
+        """
+        plane = self._frames.frame(self._numOfFrames)
+        if self._is16Bits:
+            # uint16 - 32768 is a flip of the sign bit, done in a reused buffer
+            np.bitwise_xor(image, 0x8000, out=self._scratch)
+            plane[...] = self._scratch
+        elif self._imageType == ASIImageType.ASI_IMG_RGB24:
+            for channel in range(3):
+                plane[channel] = image[..., 2 - channel] # BGR to RGB planes
+        else:
+            plane[...] = image
+        self._timestamps.append(timestamp)
+        self._numOfFrames += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._frames.close(self._numOfFrames)
+
+        # Pads the data unit then appends the timestamps table
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(b"\0" * (-self._file.tell() % self._blockSize))
+        cards = [
+            self._card("XTENSION", "BINTABLE", "binary table extension"),
+            self._card("BITPIX"  , 8),
+            self._card("NAXIS"   , 2),
+            self._card("NAXIS1"  , 8, "bytes per row"),
+            self._card("NAXIS2"  , self._numOfFrames, "one row per frame"),
+            self._card("PCOUNT"  , 0),
+            self._card("GCOUNT"  , 1),
+            self._card("TFIELDS" , 1),
+            self._card("TTYPE1"  , "TIMESTAMP"),
+            self._card("TFORM1"  , "1D"),
+            self._card("TUNIT1"  , "s", "seconds since 1970-01-01 UTC"),
+            self._card("EXTNAME" , "TIMESTAMPS"),
+        ]
+        self._file.write(self._pad(cards))
+        for timestamps in self._timestamps.chunks():
+            self._file.write(timestamps.astype(">f8").tobytes())
+        self._file.write(b"\0" * (-self._file.tell() % self._blockSize))
+
+        # Frame count is only known now, the header keeps its size
+        self._file.seek(0)
+        self._file.write(self._primaryHeader(self._numOfFrames, self._timestamps.first if self._timestamps.first is not None else time.time()))
+        self._file.close()
+        self._timestamps.close()
+        self._file = None
+
+class Recorder:
+    """
+    @brief Records a video stream to disk with bounded memory
+
+    @note Frames are captured into the ring of a VideoStream (block policy)
+          and copied by a writer thread straight into a memory-mapped SER
+          or FITS file. Memory use only depends on the ring size and on the
+          mapped window, not on the recording length.
+
+          With a GPSTable, frames are time stamped with their GPS time when
+          the GPS has one, and with the host time otherwise.
+    """
+
+    SER  = "ser"
+    FITS = "fits"
+
+    def __init__(self, camera, path, format=SER, frames=None, duration=None, slots=16, waitms=None, gps=None):
+        """
+        @param camera   ZWOCamera to record from
+        @param path     Output file path
+        @param format   Recorder.SER or Recorder.FITS
+        @param frames   Number of frames to record
+        @param duration Recording duration in seconds, used if frames is None
+        @param slots    Number of frames of the acquisition ring buffer
+        @param waitms   Timeout of each SDK call in milliseconds
+        @param gps      Optional GPSTable filled by the stream, for cameras
+                        with GPS
+        """
+        if (frames is None) == (duration is None):
+            raise ValueError("Either frames or duration must be given")
+        if format not in (self.SER, self.FITS):
+            raise ValueError(f"Unknown recording format {format}")
+
+        self._camera   = camera
+        self._path     = path
+        self._frames   = frames
+        self._duration = duration
+        self._gps      = gps
+
+        imageType = camera.imageType
+        writerType = SERWriter if format == self.SER else FITSWriter
+        self._writer = writerType(path, camera.frameShape, imageType, camera._isColorCam, camera._bayerPattern, chunkFrames=min(64, frames or 64))
+        self._stream = VideoStream(camera, slots, VideoStream.BLOCK, waitms, gps=gps)
+
+        self._thread       = None
+        self._stopping     = False
+        self._error        = None
+        self._bytesWritten = 0
+        self._gpsFrames    = 0
+        self._writeTime    = 0.0
+        self._startTime    = None
+        self._endTime      = None
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._startTime = time.perf_counter()
+        self._stream.start()
+        self._thread = threading.Thread(target=self._writeLoop, name=f"Recorder-{self._camera._cameraIndex}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _done(self, numOfFrames, firstFrameTime):
+        if self._stopping:
+            return True
+        if self._frames is not None:
+            return numOfFrames >= self._frames
+        return firstFrameTime is not None and time.perf_counter() - firstFrameTime >= self._duration
+
+    def _writeLoop(self):
+        firstFrameTime = None
+        try:
+            while not self._done(self._writer.numOfFrames, firstFrameTime):
+                frame = self._stream.read(timeout=0.1)
+                if frame is None:
+                    if not self._stream.running:
+                        break
+                    continue
+                if firstFrameTime is None:
+                    firstFrameTime = time.perf_counter()
+
+                timestamp = frame.timestamp
+                if self._gps is not None:
+                    gpsTime = self._gps.gpsTime(frame.sequence)
+                    if not np.isnan(gpsTime):
+                        timestamp = gpsTime
+                        self._gpsFrames += 1
+
+                start = time.perf_counter()
+                self._writer.write(frame.image, timestamp)
+                self._writeTime    += time.perf_counter() - start
+                self._bytesWritten += frame.image.nbytes
+        except Exception as e:
+            self._error = e
+        finally:
+            self._stream.stop()
+            self._writer.close()
+            self._endTime = time.perf_counter()
+
+    def join(self, timeout=None):
+        """
+        @brief Waits for the end of the recording
+
+        @return True if the recording is over
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return True
+
+    def stop(self):
+        """
+        @brief Ends the recording early, keeping the frames already written
+        """
+        self._stopping = True
+        return self.join()
+
+    @property
+    def statistics(self):
+        """
+        @brief Statistics of the recording
+
+        @return Dictionary containing:
+                 - framesWritten  : frames written to disk
+                 - bytesWritten   : image bytes written to disk
+                 - writeThroughput: bytes per second spent in writes
+                 - backlog        : frames captured but not written yet
+                 - fps            : frames written per second of recording
+                 - gpsFrames      : frames time stamped with their GPS time
+                 - droppedFrames  : frames dropped by the SDK
+                 - timeouts       : SDK calls which timed out
+        """
+        elapsed = ((self._endTime or time.perf_counter()) - self._startTime) if self._startTime is not None else 0.0
+        streamStatistics = self._stream.statistics
+        return {
+            "framesWritten"  : self._writer.numOfFrames,
+            "bytesWritten"   : self._bytesWritten,
+            "writeThroughput": self._bytesWritten / self._writeTime if self._writeTime > 0 else 0.0,
+            "backlog"        : self._stream.backlog,
+            "fps"            : self._writer.numOfFrames / elapsed if elapsed > 0 else 0.0,
+            "gpsFrames"      : self._gpsFrames,
+            "droppedFrames"  : streamStatistics["droppedFrames"],
+            "timeouts"       : streamStatistics["timeouts"],
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.stop()
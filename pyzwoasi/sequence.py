@@ -0,0 +1,250 @@
+import collections, concurrent.futures, queue, threading, time
+
+from . import pyzwoasi
+
+# Step of a sequence plan. None keeps the value of the previous step.
+SequenceStep = collections.namedtuple("SequenceStep", ["exposure", "gain", "binning", "imageType"], defaults=[None, None, None])
+
+# Frame yielded by a sequence. Index is the position of its step in the
+# plan, timestamp the time.time() of the end of the exposure.
+SequenceFrame = collections.namedtuple("SequenceFrame", ["image", "index", "step", "timestamp"])
+
+def _asStep(step):
+    if isinstance(step, SequenceStep):
+        return step
+    if isinstance(step, dict):
+        return SequenceStep(**step)
+    return SequenceStep(*step)
+
+class SequenceRun:
+    """
+    @brief Runs a plan of exposures, overlapping the camera work with the
+           processing and saving of the frames
+
+    @note A capture thread sets up each step, exposes and downloads it, then
+          arms the next exposure right away while a worker pool runs the
+          processor and save functions on the downloaded frame. Frames are
+          yielded in capture order, at most maxPending of them are held
+          between download and consumer.
+
+          With reorder=True, the steps are grouped by ROI format, then gain,
+          then exposure, starting with the current settings, so that the
+          slow ROI format changes happen once per group. Frames still carry
+          the index of their step in the plan.
+    """
+    def __init__(self, camera, plan, processor=None, save=None, workers=2, reorder=False, maxPending=4, meta=None):
+        """
+        @param camera     ZWOCamera
+        @param plan       Iterable of SequenceStep, or of (exposure, gain,
+                          binning, imageType) tuples or dictionaries.
+                          Exposure is in microseconds
+        @param processor  Optional processor applied to each frame by the
+                          workers
+        @param save       Optional function called by the workers with
+                          each SequenceFrame, once processed
+        @param workers    Number of worker threads
+        @param reorder    Allows reordering the steps to limit setting
+                          changes
+        @param maxPending Maximum number of frames downloaded but not yet
+                          yielded, the capture waits beyond it
+        @param meta       Optional FrameMetaTable receiving the metadata of
+                          each frame, with the plan index as sequence
+        """
+        if maxPending < 1:
+            raise ValueError(f"Sequence needs at least 1 pending frame, got {maxPending}")
+
+        self._camera    = camera
+        self._processor = processor
+        self._save      = save
+        self._workers   = workers
+        self._meta      = meta
+        self._steps     = list(enumerate(_asStep(step) for step in plan))
+        if reorder:
+            self._steps = self._reorder(self._steps)
+
+        self._slots   = threading.Semaphore(maxPending)
+        self._results = queue.Queue()
+        self._thread  = None
+        self._stopped = threading.Event()
+        self._error   = None
+        self._done    = False
+
+        self._frames         = 0
+        self._shutterTime    = 0.0
+        self._configureTime  = 0.0
+        self._processingTime = 0.0
+        self._formatChanges  = 0
+        self._controlChanges = 0
+        self._startTime      = None
+        self._endTime        = None
+        self._lock           = threading.Lock()
+
+    def _reorder(self, steps):
+        # Steps are resolved against the current settings first, as None no
+        # longer means the previous value once reordered
+        exposure = self._camera.exposure
+        gain     = self._camera.gain
+        _, _, binning, imageType = self._camera.roi
+        current  = (binning, int(imageType), gain)
+
+        resolved = []
+        for index, step in steps:
+            exposure  = step.exposure  if step.exposure  is not None else exposure
+            gain      = step.gain      if step.gain      is not None else gain
+            binning   = step.binning   if step.binning   is not None else binning
+            imageType = step.imageType if step.imageType is not None else imageType
+            resolved.append((index, SequenceStep(exposure, gain, binning, int(imageType))))
+
+        # Stable grouping by format then gain, the current settings first
+        def key(item):
+            step = item[1]
+            return ((step.binning, step.imageType) != current[:2], step.binning, step.imageType,
+                    step.gain != current[2], step.gain, step.exposure)
+        return sorted(resolved, key=key)
+
+    @property
+    def order(self):
+        """
+        @brief Plan indexes of the steps, in the order they are captured
+        """
+        return [index for index, _ in self._steps]
+
+    def start(self):
+        """
+        @brief Starts the capture, done by the first iteration otherwise
+
+        @note A run goes through its plan once, a stopped or fully iterated
+              run cannot be started again
+        """
+        if self._done:
+            raise RuntimeError("Sequence run already stopped, create a new one to run the plan again")
+        if self._thread is not None:
+            return self
+        self._pool   = concurrent.futures.ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="SequenceRun")
+        self._thread = threading.Thread(target=self._captureLoop, name=f"SequenceRun-{self._camera._cameraIndex}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        @brief Stops after the current exposure, the frames not yielded yet
+               are dropped
+        """
+        if self._thread is None or self._done:
+            return
+        self._done = True
+        self._stopped.set()
+        self._slots.release()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+
+    def _configure(self, step):
+        camera = self._camera
+        width, height, binning, imageType = camera.roi
+        newBinning   = step.binning   if step.binning   is not None else binning
+        newImageType = step.imageType if step.imageType is not None else imageType
+        if (newBinning, newImageType) != (binning, imageType):
+            # Same field of view at the new binning
+            camera.setROI(width * binning // newBinning // 8 * 8, height * binning // newBinning // 2 * 2, newBinning, newImageType)
+            self._formatChanges += 1
+
+        controls = {}
+        if step.exposure is not None: controls["Exposure"] = step.exposure
+        if step.gain     is not None: controls["Gain"]     = step.gain
+        if controls:
+            skipped = camera._controlStatistics["skippedWrites"]
+            camera.setControls(controls)
+            self._controlChanges += len(controls) - (camera._controlStatistics["skippedWrites"] - skipped)
+
+    def _finish(self, frame, imageType):
+        # Runs on the worker pool
+        start = time.perf_counter()
+        if self._processor is not None:
+            frame = frame._replace(image=self._processor(frame.image, imageType))
+        if self._save is not None:
+            self._save(frame)
+        with self._lock:
+            self._processingTime += time.perf_counter() - start
+        return frame
+
+    def _captureLoop(self):
+        camera   = self._camera
+        cameraID = camera._cameraIndex
+        try:
+            for index, step in self._steps:
+                self._slots.acquire()
+                if self._stopped.is_set():
+                    break
+
+                configured = time.perf_counter()
+                self._configure(step)
+                exposure_us = camera._lastControlValues.get("Exposure")
+                if exposure_us is None:
+                    exposure_us = camera.exposure
+                imageType = camera.imageType
+
+                start = time.perf_counter()
+                self._configureTime += start - configured
+                if self._startTime is None:
+                    self._startTime = configured
+                pyzwoasi.startExposure(cameraID, True)
+                image = camera._completeExposure(exposure_us)
+                self._endTime      = time.perf_counter()
+                self._shutterTime += exposure_us / 1e6
+                self._frames      += 1
+
+                frame = SequenceFrame(image, index, step, time.time())
+                if self._meta is not None:
+                    self._meta.append(camera.frameMeta(index, frame.timestamp))
+                self._results.put(self._pool.submit(self._finish, frame, imageType))
+        except Exception as e:
+            self._error = e
+        finally:
+            self._results.put(None)
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                future = self._results.get()
+                if future is None:
+                    break
+                frame = future.result()
+                self._slots.release()
+                yield frame
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+        finally:
+            self.stop()
+
+    @property
+    def statistics(self):
+        """
+        @brief Snapshot of the sequence statistics
+
+        @return Dictionary containing:
+                 - frames        : frames captured
+                 - wallTime      : seconds from the first step set up to the
+                                   last frame downloaded
+                 - shutterTime   : total exposure time in seconds
+                 - dutyCycle     : shutterTime / wallTime
+                 - configureTime : seconds spent changing settings
+                 - processingTime: seconds spent by the workers, overlapped
+                                   with the capture
+                 - formatChanges : ROI format changes
+                 - controlChanges: exposure and gain writes
+        """
+        wallTime = (self._endTime - self._startTime) if self._startTime is not None and self._endTime is not None else 0.0
+        with self._lock:
+            processingTime = self._processingTime
+        return {
+            "frames"        : self._frames,
+            "wallTime"      : wallTime,
+            "shutterTime"   : self._shutterTime,
+            "dutyCycle"     : self._shutterTime / wallTime if wallTime > 0 else 0.0,
+            "configureTime" : self._configureTime,
+            "processingTime": processingTime,
+            "formatChanges" : self._formatChanges,
+            "controlChanges": self._controlChanges,
+        }
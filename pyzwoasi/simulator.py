@@ -0,0 +1,860 @@
+import collections, ctypes, math, random, threading, time
+import numpy as np
+
+from .pyzwoasi   import ASIBayerPattern, ASICameraMode, ASIControlType, ASIErrorCode, ASIExposureStatus, ASIImageType
+from .processing import _bayerOffsets
+
+# Controls of the simulated cameras, in the order the SDK lists them:
+# name, control type, min, max, default, auto supported, writable, description
+_commonControls = [
+    ("Gain"                   ,  0,    0,        600,   200, True , True , "Gain"),
+    ("Exposure"               ,  1,   32, 2000000000, 10000, True , True , "Exposure Time(us)"),
+    ("Offset"                 ,  5,    0,         80,     8, False, True , "offset"),
+    ("BandWidth"              ,  6,   40,        100,    50, True , True , "The total data transfer rate percentage"),
+    ("Flip"                   ,  9,    0,          3,     0, False, True , "Flip: 0->None 1->Horiz 2->Vert 3->Both"),
+    ("AutoExpMaxGain"         , 10,    0,        600,   300, False, True , "Auto exposure maximum gain value"),
+    ("AutoExpMaxExpMS"        , 11,    1,      60000,   100, False, True , "Auto exposure maximum exposure value(unit ms)"),
+    ("AutoExpTargetBrightness", 12,   50,        160,   100, False, True , "Auto exposure target brightness value"),
+    ("HardwareBin"            , 13,    0,          1,     0, False, True , "Is hardware bin2:0->No 1->Yes"),
+    ("HighSpeedMode"          , 14,    0,          1,     0, False, True , "Is high speed mode:0->No 1->Yes"),
+    ("Temperature"            ,  8, -500,       1000,   250, False, False, "Sensor temperature(degrees Celsius)"),
+]
+_colorControls = [
+    ("WB_R"   ,  3, 1, 99, 52, True , True, "White balance: Red component"),
+    ("WB_B"   ,  4, 1, 99, 95, True , True, "White balance: Blue component"),
+    ("MonoBin", 18, 0,  1,  0, False, True, "bin R G G B to one pixel for color camera, color will loss"),
+]
+_coolerControls = [
+    ("CoolerPowerPerc", 15,   0, 100, 0, False, False, "Cooler power percent"),
+    ("TargetTemp"     , 16, -40,  30, 0, False, True , "Target temperature(cool camera only)"),
+    ("CoolerOn"       , 17,   0,   1, 0, False, True , "turn on/off cooler(cool camera only)"),
+]
+
+_gainControl, _exposureControl, _offsetControl, _bandwidthControl, _flipControl = (
+    ASIControlType.ASI_GAIN, ASIControlType.ASI_EXPOSURE, ASIControlType.ASI_OFFSET, ASIControlType.ASI_BANDWIDTHOVERLOAD, ASIControlType.ASI_FLIP)
+
+# Relative response of the color filters to the simulated sky
+_filterResponses = {"R": 0.7, "G": 1.0, "B": 0.5}
+
+def _target(pointer):
+    # Wrappers give either ctypes objects or byref() of them
+    return getattr(pointer, "_obj", pointer)
+
+class SimulatedCamera:
+    """
+    @brief Description and state of a camera simulated by SimulatedLibrary
+
+    @note Failures can be injected at any time, either as rates drawn from
+          a seeded random generator, or as a number of next events to fail
+          with inject(). Both are deterministic for a given seed.
+    """
+    def __init__(self, name="ZWO ASI Simulator", width=1920, height=1080, bitDepth=12, isColorCam=True,
+                 bayerPattern=ASIBayerPattern.ASI_BAYER_RG, fps=60.0, pixelSize=2.9, supportedBins=(1, 2, 4),
+                 isUSB3=True, usbRate=None, isCoolerCam=False, isTriggerCam=False, productID=0x120A, queueFrames=2, seed=0,
+                 expFailureRate=0.0, timeoutRate=0.0, dropRate=0.0, planet=None, gps=None, gpsOffset=0.0, gpsDrift=0.0):
+        """
+        @param name           Name reported by the camera
+        @param width          Sensor width in pixels
+        @param height         Sensor height in pixels
+        @param bitDepth       ADC bit depth
+        @param isColorCam     True for a camera with a Bayer filter
+        @param bayerPattern   ASIBayerPattern of the filter
+        @param fps            Frame rate of the full sensor in 8 bits, when
+                              exposure and USB are not the limit
+        @param pixelSize      Pixel size in um
+        @param supportedBins  Supported binnings
+        @param isUSB3         USB3 (380 MB/s) or USB2 (40 MB/s) link
+        @param usbRate        Link rate in bytes per second overriding the
+                              USB one, float("inf") for no transfer limit
+        @param isCoolerCam    Adds the cooler controls
+        @param isTriggerCam   Supports the trigger modes
+        @param productID      USB product ID
+        @param queueFrames    Frames buffered by the SDK in video mode, older
+                              ones are dropped if not read in time
+        @param seed           Seed of the image noise and of the failures
+        @param expFailureRate Probability of an exposure to fail
+        @param timeoutRate    Probability of a video frame request to time out
+        @param dropRate       Probability of a video frame to be dropped
+        @param planet         Optional bright disk (x, y, radius, flux) in
+                              sensor pixels and full scale per second, as a
+                              planetary or solar target. Can be moved by
+                              setting the planet attribute
+        @param gps            Optional GPS position (latitude, longitude,
+                              altitude in meters, satellites), adds the GPS
+                              controls and data
+        @param gpsOffset      Host clock minus GPS clock, in seconds
+        @param gpsDrift       Rate of the host clock against the GPS clock,
+                              in seconds per second
+        """
+        self.name           = name
+        self.width          = width
+        self.height         = height
+        self.bitDepth       = bitDepth
+        self.isColorCam     = isColorCam
+        self.bayerPattern   = ASIBayerPattern(bayerPattern)
+        self.fps            = fps
+        self.pixelSize      = pixelSize
+        self.supportedBins  = tuple(supportedBins)
+        self.isUSB3         = isUSB3
+        self.usbRate        = usbRate if usbRate is not None else (380e6 if isUSB3 else 40e6)
+        self.isCoolerCam    = isCoolerCam
+        self.isTriggerCam   = isTriggerCam
+        self.productID      = productID
+        self.queueFrames    = queueFrames
+        self.seed           = seed
+        self.expFailureRate = expFailureRate
+        self.timeoutRate    = timeoutRate
+        self.dropRate       = dropRate
+        self.planet         = planet
+        self.gps            = gps
+        self.gpsOffset      = gpsOffset
+        self.gpsDrift       = gpsDrift
+        self.gpsEpoch       = time.time()
+
+        self.controls = _commonControls + (_colorControls if isColorCam else []) + (_coolerControls if isCoolerCam else [])
+        if gps is not None:
+            self.controls = self.controls + [
+                ("GPSSupport"  , ASIControlType.ASI_GPS_SUPPORT   , 0, 1         , 1         , False, False, "GPS support"),
+                ("GPSStartLine", ASIControlType.ASI_GPS_START_LINE, 0, height - 1, 0         , False, True , "GPS start line"),
+                ("GPSEndLine"  , ASIControlType.ASI_GPS_END_LINE  , 0, height - 1, height - 1, False, True , "GPS end line"),
+            ]
+
+        self._random   = random.Random(seed)
+        self._injected = collections.Counter()
+        self._lock     = threading.Lock()
+        self._images   = {}
+
+        # Serial number differs between models, as their controls do
+        serialRandom = random.Random(repr((seed, name, width, height, isColorCam, isCoolerCam, isTriggerCam) + ((True,) if gps is not None else ())))
+        self.serialNumber = bytes(serialRandom.getrandbits(8) for _ in range(8))
+        self.reset()
+
+    def reset(self):
+        """
+        @brief Puts the camera back in its power-on state
+        """
+        self.opened        = False
+        self.initialized   = False
+        self.values        = {control[1]: [control[4], False] for control in self.controls}
+        self.imageTypes    = [ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_RGB24, ASIImageType.ASI_IMG_RAW16, ASIImageType.ASI_IMG_Y8] if self.isColorCam \
+                        else [ASIImageType.ASI_IMG_RAW8, ASIImageType.ASI_IMG_RAW16]
+        self.roi           = (self.width, self.height, 1, ASIImageType.ASI_IMG_RAW8)
+        self.startPos      = (0, 0)
+        self.cameraMode    = 0
+        self.id            = bytes(8)
+
+        self.expStatus     = ASIExposureStatus.ASI_EXP_IDLE
+        self.expEnd        = 0.0
+        self.expFailed     = False
+
+        self.capturing     = False
+        self.nextFrameTime = 0.0
+        self.triggers      = collections.deque()
+        self.droppedFrames = 0
+        self.framesSent    = 0
+        self.lastGPSTime   = None
+
+        self.missedTriggers = 0
+        self.triggerOutputs = {}
+
+    def inject(self, expFailures=0, timeouts=0, droppedFrames=0):
+        """
+        @brief Makes the next exposures fail, the next video frame requests
+               time out, or the next video frames be dropped
+        """
+        with self._lock:
+            self._injected["expFailures"]   += expFailures
+            self._injected["timeouts"]      += timeouts
+            self._injected["droppedFrames"] += droppedFrames
+
+    def _happens(self, event, rate):
+        # Called with the lock held
+        if self._injected[event] > 0:
+            self._injected[event] -= 1
+            return True
+        return rate > 0 and self._random.random() < rate
+
+    def value(self, controlType):
+        return self.values[controlType][0]
+
+    def externalTrigger(self):
+        """
+        @brief Sends an edge on the trigger input, as an external strobe
+
+        @note Only starts an exposure in the hardware trigger modes. Edges
+              arriving while the previous triggered frame is still exposed
+              or read out are missed, as on the cameras.
+
+        @return time.perf_counter() of the edge
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if self.cameraMode not in (ASICameraMode.ASI_MODE_TRIG_RISE_EDGE, ASICameraMode.ASI_MODE_TRIG_FALL_EDGE,
+                                       ASICameraMode.ASI_MODE_TRIG_HIGH_LEVEL, ASICameraMode.ASI_MODE_TRIG_LOW_LEVEL):
+                return now
+            if not self.capturing or (self.triggers and self.triggers[-1] > now):
+                self.missedTriggers += 1
+            else:
+                # Triggered frame is ready once exposed and read out
+                self.triggers.append(now + self.framePeriod())
+        return now
+
+    def gpsTime(self, hostTime):
+        """
+        @brief Time of the GPS clock at a time of the host clock
+        """
+        return hostTime - self.gpsOffset - self.gpsDrift * (hostTime - self.gpsEpoch)
+
+    def fillGPS(self, gpsData, gpsTime):
+        # Called with the lock held
+        seconds  = math.floor(gpsTime)
+        fraction = gpsTime - seconds
+        dateTime = time.gmtime(seconds)
+        record   = _target(gpsData)
+        record.DateTime.Year    = dateTime.tm_year
+        record.DateTime.Month   = dateTime.tm_mon
+        record.DateTime.Day     = dateTime.tm_mday
+        record.DateTime.Hour    = dateTime.tm_hour
+        record.DateTime.Minute  = dateTime.tm_min
+        record.DateTime.Second  = dateTime.tm_sec
+        record.DateTime.Msecond = int(fraction * 1e3)
+        record.DateTime.Usecond = int((fraction * 1e3 - record.DateTime.Msecond) * 1e4)
+        record.Latitude, record.Longitude, altitude, record.SatelliteNum = self.gps
+        record.Altitude = int(round(altitude * 10))
+
+    def frameBytes(self):
+        width, height, _, imageType = self.roi
+        return width * height * (1, 3, 2, 1)[imageType]
+
+    def readoutTime(self):
+        """
+        @brief Time to read the ROI out of the sensor and send it to the host
+        """
+        width, height, binning, imageType = self.roi
+        sensorTime = height * binning / (self.height * self.fps)
+        if self.value(14): # HighSpeedMode, 10 bits ADC
+            sensorTime /= 2
+
+        # RGB24 frames are debayered by the SDK, only raw data goes over USB
+        usbRate      = self.usbRate * self.value(_bandwidthControl) / 100
+        transferTime = width * height * (2 if imageType == ASIImageType.ASI_IMG_RAW16 else 1) / usbRate
+        return max(sensorTime, transferTime)
+
+    def framePeriod(self):
+        return max(self.value(_exposureControl) / 1e6, self.readoutTime())
+
+    def image(self):
+        """
+        @brief Synthetic frame for the current ROI and settings: a sky
+               background with stars, noise, and the sensor offset
+
+        @note Frames are rendered once per settings, a few noise variants
+              are then cycled so that rendering is not the bottleneck
+        """
+        key = (self.roi, self.startPos, self.planet) + tuple(self.value(control) for control in (_gainControl, _exposureControl, _offsetControl, _flipControl))
+        images = self._images.get(key)
+        if images is None:
+            if len(self._images) > 8:
+                self._images.clear()
+            images = self._images[key] = self._render()
+        self.framesSent += 1
+        return images[self.framesSent % len(images)]
+
+    def _render(self, variants=4):
+        width, height, binning, imageType = self.roi
+        startX, startY = self.startPos
+        rng = np.random.default_rng(self.seed)
+
+        # Stars are drawn at fixed sensor positions, whatever the ROI
+        numOfStars = max(1, self.width * self.height // 20000)
+        starsX     = rng.uniform(0, self.width , numOfStars)
+        starsY     = rng.uniform(0, self.height, numOfStars)
+        starsFlux  = rng.uniform(0.05, 2.0, numOfStars)
+
+        # Flux in full scale per second, on the binned ROI grid
+        xs = (startX + (np.arange(width ) + 0.5) * binning)[np.newaxis, :]
+        ys = (startY + (np.arange(height) + 0.5) * binning)[:, np.newaxis]
+        flux = np.full((height, width), 0.02, dtype=np.float32)
+        flux += (0.01 * ys / self.height).astype(np.float32)
+        sigma = 1.5 * binning
+        inside = (starsX >= xs[0, 0] - 4 * sigma) & (starsX <= xs[0, -1] + 4 * sigma) & (starsY >= ys[0, 0] - 4 * sigma) & (starsY <= ys[-1, 0] + 4 * sigma)
+        for starX, starY, starFlux in zip(starsX[inside], starsY[inside], starsFlux[inside]):
+            column, row = int((starX - startX) / binning), int((starY - startY) / binning)
+            rows    = slice(max(row    - 5, 0), min(row    + 6, height))
+            columns = slice(max(column - 5, 0), min(column + 6, width ))
+            flux[rows, columns] += starFlux * np.exp(-((xs[:, columns] - starX) ** 2 + (ys[rows] - starY) ** 2) / (2 * sigma ** 2))
+        if self.planet is not None:
+            planetX, planetY, radius, planetFlux = self.planet
+            flux += np.float32(planetFlux) * ((xs - planetX) ** 2 + (ys - planetY) ** 2 <= radius ** 2)
+
+        # Response of the color filters, in sensor coordinates
+        response = np.ones((height, width, 3), dtype=np.float32) if imageType == ASIImageType.ASI_IMG_RGB24 else np.ones((height, width), dtype=np.float32)
+        if self.isColorCam:
+            if imageType == ASIImageType.ASI_IMG_RGB24:
+                response *= np.array([_filterResponses[color] for color in "BGR"], dtype=np.float32)
+            elif imageType != ASIImageType.ASI_IMG_Y8:
+                (redRow, redColumn), (blueRow, blueColumn) = _bayerOffsets[self.bayerPattern]
+                response[...] = _filterResponses["G"]
+                response[redRow ::2, redColumn ::2] = _filterResponses["R"]
+                response[blueRow::2, blueColumn::2] = _filterResponses["B"]
+
+        gain     = 10 ** (self.value(_gainControl) / 200)
+        exposure = self.value(_exposureControl) / 1e6
+        offset   = self.value(_offsetControl) / 1000
+        signal   = flux * exposure * gain
+        if response.ndim == 3:
+            signal = signal[..., np.newaxis]
+        signal = signal * response + offset
+
+        fullScale = (1 << self.bitDepth) - 1
+        if   imageType == ASIImageType.ASI_IMG_RAW16:
+            shift, dtype = 16 - self.bitDepth, np.uint16
+        else:
+            shift, dtype = -(self.bitDepth - 8), np.uint8
+
+        images = []
+        for _ in range(variants):
+            adu = rng.standard_normal(signal.shape, dtype=np.float32)
+            adu *= 0.002 * gain
+            adu += signal
+            adu *= fullScale
+            adu = np.clip(adu, 0, fullScale, out=adu).astype(np.uint32)
+            adu   = (adu << shift) if shift >= 0 else (adu >> -shift)
+            flip  = self.value(_flipControl)
+            if flip & 1: adu = adu[:, ::-1]
+            if flip & 2: adu = adu[::-1]
+            images.append(np.ascontiguousarray(adu, dtype=dtype))
+        return images
+
+class SimulatedTriggerSource:
+    """
+    @brief Thread sending edges to the trigger input of a simulated camera at
+           a fixed rate, as an external strobe or sync generator
+    """
+    def __init__(self, camera, rate, count=None, callback=None):
+        """
+        @param camera   SimulatedCamera receiving the edges
+        @param rate     Edges per second
+        @param count    Number of edges, None until stopped
+        @param callback Optional function called with the time.perf_counter()
+                        of each edge, e.g. TriggeredCapture.noteTrigger
+        """
+        self.camera   = camera
+        self.rate     = rate
+        self.count    = count
+        self.callback = callback
+        self.sent     = 0
+
+        self._stopped = threading.Event()
+        self._thread  = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="SimulatedTriggerSource", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        # Edges are scheduled on absolute times, so that sleeping does not
+        # drift. A late edge delays the next ones rather than being caught
+        # up in a burst the camera would miss.
+        nextTime = time.perf_counter()
+        while not self._stopped.is_set() and (self.count is None or self.sent < self.count):
+            delay = nextTime - time.perf_counter()
+            if delay > 0 and self._stopped.wait(delay):
+                break
+            edgeTime = self.camera.externalTrigger()
+            if self.callback is not None:
+                self.callback(edgeTime)
+            self.sent += 1
+            nextTime = max(nextTime, edgeTime) + 1 / self.rate
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.stop()
+
+class SimulatedLibrary:
+    """
+    @brief Pure Python stand-in for the ASICamera2 library, simulating one
+           or more cameras with realistic timings
+
+    @note Enable it with pyzwoasi.setBackend(SimulatedLibrary(...)), or by
+          setting the PYZWOASI_LIBRARY environment variable to "simulator"
+          for a single default camera. It exposes the SDK functions by their
+          C names and is called with the ctypes arguments the wrappers build,
+          which is all a backend needs to provide.
+    """
+    vendorID = 0x03C3
+
+    def __init__(self, *cameras):
+        self.cameras = list(cameras) or [SimulatedCamera()]
+
+    def _camera(self, cameraID, opened=True):
+        if not 0 <= cameraID < len(self.cameras):
+            return None, ASIErrorCode.ASI_ERROR_INVALID_ID
+        camera = self.cameras[cameraID]
+        if opened and not camera.opened:
+            return None, ASIErrorCode.ASI_ERROR_CAMERA_CLOSED
+        return camera, ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetNumOfConnectedCameras(self):
+        return len(self.cameras)
+
+    def ASIGetProductIDs(self, pPIDs):
+        if pPIDs is not None:
+            for index, camera in enumerate(self.cameras):
+                pPIDs[index] = camera.productID
+        return len(self.cameras)
+
+    def ASICameraCheck(self, vendorID, productID):
+        return vendorID == self.vendorID and any(camera.productID == productID for camera in self.cameras)
+
+    def ASIGetCameraProperty(self, cameraInfo, cameraIndex):
+        if not 0 <= cameraIndex < len(self.cameras):
+            return ASIErrorCode.ASI_ERROR_INVALID_INDEX
+        camera = self.cameras[cameraIndex]
+        info   = _target(cameraInfo)
+        info.Name              = camera.name.encode("utf-8")
+        info.CameraID          = cameraIndex
+        info.MaxHeight         = camera.height
+        info.MaxWidth          = camera.width
+        info.IsColorCam        = int(camera.isColorCam)
+        info.BayerPattern      = int(camera.bayerPattern)
+        for index in range(16):
+            info.SupportedBins[index] = camera.supportedBins[index] if index < len(camera.supportedBins) else 0
+        for index in range(8):
+            info.SupportedVideoFormat[index] = camera.imageTypes[index] if index < len(camera.imageTypes) else ASIImageType.ASI_IMG_END
+        info.PixelSize         = camera.pixelSize
+        info.MechanicalShutter = 0
+        info.ST4Port           = 1
+        info.IsCoolerCam       = int(camera.isCoolerCam)
+        info.IsUSB3Host        = int(camera.isUSB3)
+        info.IsUSB3Camera      = int(camera.isUSB3)
+        info.ElecPerADU        = 1.0
+        info.BitDepth          = camera.bitDepth
+        info.IsTriggerCam      = int(camera.isTriggerCam)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetCameraPropertyByID(self, cameraID, cameraInfo):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        return self.ASIGetCameraProperty(cameraInfo, cameraID)
+
+    def ASIOpenCamera(self, cameraID):
+        camera, errorCode = self._camera(cameraID, opened=False)
+        if camera is None:
+            return errorCode
+        camera.opened = True
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIInitCamera(self, cameraID):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        camera.initialized = True
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASICloseCamera(self, cameraID):
+        camera, errorCode = self._camera(cameraID, opened=False)
+        if camera is None:
+            return errorCode
+        camera.reset()
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetNumOfControls(self, cameraID, pNumOfControls):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        _target(pNumOfControls).value = len(camera.controls)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetControlCaps(self, cameraID, controlIndex, pControlCaps):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if not 0 <= controlIndex < len(camera.controls):
+            return ASIErrorCode.ASI_ERROR_INVALID_CONTROL_TYPE
+        name, controlType, minValue, maxValue, defaultValue, isAutoSupported, isWritable, description = camera.controls[controlIndex]
+        caps = _target(pControlCaps)
+        caps.Name            = name.encode("utf-8")
+        caps.Description     = description.encode("utf-8")
+        caps.MaxValue        = maxValue
+        caps.MinValue        = minValue
+        caps.DefaultValue    = defaultValue
+        caps.IsAutoSupported = int(isAutoSupported)
+        caps.IsWritable      = int(isWritable)
+        caps.ControlType     = controlType
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetControlValue(self, cameraID, controlType, pValue, pAuto):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if controlType not in camera.values:
+            return ASIErrorCode.ASI_ERROR_INVALID_CONTROL_TYPE
+        value, auto = camera.values[controlType]
+        _target(pValue).value = value
+        _target(pAuto).value  = int(auto)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASISetControlValue(self, cameraID, controlType, value, auto):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        control = next((control for control in camera.controls if control[1] == controlType), None)
+        if control is None:
+            return ASIErrorCode.ASI_ERROR_INVALID_CONTROL_TYPE
+        if control[6]:
+            # Out of range values are clamped, as the SDK does
+            camera.values[controlType] = [min(max(value, control[2]), control[3]), bool(auto) and control[5]]
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetROIFormat(self, cameraID, pWidth, pHeight, pBin, pImgType):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        width, height, binning, imageType = camera.roi
+        _target(pWidth).value   = width
+        _target(pHeight).value  = height
+        _target(pBin).value     = binning
+        _target(pImgType).value = imageType
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASISetROIFormat(self, cameraID, width, height, binning, imageType):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if binning not in camera.supportedBins or width <= 0 or height <= 0 or width % 8 or height % 2 \
+           or width * binning > camera.width or height * binning > camera.height:
+            return ASIErrorCode.ASI_ERROR_INVALID_SIZE
+        if imageType not in camera.imageTypes:
+            return ASIErrorCode.ASI_ERROR_INVALID_IMGTYPE
+
+        # ROI is centered on the sensor, as the SDK does
+        camera.roi      = (width, height, binning, ASIImageType(imageType))
+        camera.startPos = ((camera.width // binning - width) // 2 // 2 * 2, (camera.height // binning - height) // 2 // 2 * 2)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetStartPos(self, cameraID, pStartX, pStartY):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        _target(pStartX).value, _target(pStartY).value = camera.startPos
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASISetStartPos(self, cameraID, startX, startY):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        width, height, binning, _ = camera.roi
+        if startX < 0 or startY < 0 or startX + width > camera.width // binning or startY + height > camera.height // binning:
+            return ASIErrorCode.ASI_ERROR_OUT_OF_BOUNDARY
+        camera.startPos = (startX, startY)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetDroppedFrames(self, cameraID, pDropFrames):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        _target(pDropFrames).value = camera.droppedFrames
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIEnableDarkSubtract(self, cameraID, bmpPath):
+        camera, errorCode = self._camera(cameraID)
+        return errorCode
+
+    def ASIDisableDarkSubtract(self, cameraID):
+        camera, errorCode = self._camera(cameraID)
+        return errorCode
+
+    def ASIStartVideoCapture(self, cameraID):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if camera.expStatus == ASIExposureStatus.ASI_EXP_WORKING:
+            return ASIErrorCode.ASI_ERROR_EXPOSURE_IN_PROGRESS
+        with camera._lock:
+            camera.capturing     = True
+            camera.droppedFrames = 0
+            camera.nextFrameTime = time.perf_counter() + camera.framePeriod()
+            camera.triggers.clear()
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIStopVideoCapture(self, cameraID):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        camera.capturing = False
+        return ASIErrorCode.ASI_SUCCESS
+
+    def _copy(self, image, buffer, bufferSize):
+        if bufferSize < image.nbytes:
+            return ASIErrorCode.ASI_ERROR_BUFFER_TOO_SMALL
+        ctypes.memmove(buffer, image.ctypes.data, image.nbytes)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def _nextVideoFrame(self, camera, now):
+        # Called with the lock held. Returns the time the next frame is
+        # ready, dropping the frames the SDK queue could not hold.
+        if camera.cameraMode != 0:
+            while camera.triggers and camera.triggers[0] <= now and len(camera.triggers) > camera.queueFrames:
+                camera.triggers.popleft()
+                camera.droppedFrames += 1
+            return camera.triggers[0] if camera.triggers else None
+
+        period = camera.framePeriod()
+        if now >= camera.nextFrameTime:
+            ready = int((now - camera.nextFrameTime) / period) + 1
+            if ready > camera.queueFrames:
+                camera.droppedFrames += ready - camera.queueFrames
+                camera.nextFrameTime += (ready - camera.queueFrames) * period
+        return camera.nextFrameTime
+
+    def ASIGetVideoData(self, cameraID, buffer, bufferSize, waitms):
+        return self._videoData(cameraID, buffer, bufferSize, waitms)
+
+    def _videoData(self, cameraID, buffer, bufferSize, waitms, gpsData=None):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if gpsData is not None and camera.gps is None:
+            return ASIErrorCode.ASI_ERROR_GPS_NOT_SUPPORTED
+        if not camera.capturing:
+            return ASIErrorCode.ASI_ERROR_INVALID_SEQUENCE
+
+        timeout  = waitms / 1000 if waitms >= 0 else float("inf")
+        deadline = time.perf_counter() + timeout
+        with camera._lock:
+            timedOut = camera._happens("timeouts", camera.timeoutRate)
+        if timedOut:
+            time.sleep(timeout if timeout != float("inf") else 0)
+            return ASIErrorCode.ASI_ERROR_TIMEOUT
+
+        while True:
+            with camera._lock:
+                now       = time.perf_counter()
+                readyTime = self._nextVideoFrame(camera, now)
+                if readyTime is not None and readyTime <= now:
+                    if camera.cameraMode != 0:
+                        camera.triggers.popleft()
+                    else:
+                        camera.nextFrameTime += camera.framePeriod()
+                    if camera._happens("droppedFrames", camera.dropRate):
+                        camera.droppedFrames += 1
+                        continue
+                    if camera.gps is not None:
+                        # Time stamped at the start of the exposure
+                        camera.lastGPSTime = camera.gpsTime(time.time() - camera.framePeriod())
+                        if gpsData is not None:
+                            camera.fillGPS(gpsData, camera.lastGPSTime)
+                    return self._copy(camera.image(), buffer, bufferSize)
+            if now >= deadline:
+                return ASIErrorCode.ASI_ERROR_TIMEOUT
+
+            # Waits outside of the lock, like the SDK waits for USB data.
+            # Triggers may come at any time, they are polled more often.
+            wakeTime = deadline if readyTime is None else min(readyTime, deadline)
+            time.sleep(min(wakeTime - now, 0.05 if camera.cameraMode == 0 else 0.0005))
+
+    def ASIGetVideoDataGPS(self, cameraID, buffer, bufferSize, waitms, gpsData):
+        return self._videoData(cameraID, buffer, bufferSize, waitms, gpsData)
+
+    def ASIPulseGuideOn(self, cameraID, direction):
+        camera, errorCode = self._camera(cameraID)
+        return errorCode
+
+    def ASIPulseGuideOff(self, cameraID, direction):
+        camera, errorCode = self._camera(cameraID)
+        return errorCode
+
+    def ASIStartExposure(self, cameraID, isDark):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if camera.capturing:
+            return ASIErrorCode.ASI_ERROR_VIDEO_MODE_ACTIVE
+        with camera._lock:
+            if camera.expStatus == ASIExposureStatus.ASI_EXP_WORKING:
+                return ASIErrorCode.ASI_ERROR_EXPOSURE_IN_PROGRESS
+            camera.expStatus = ASIExposureStatus.ASI_EXP_WORKING
+            camera.expEnd    = time.perf_counter() + camera.value(_exposureControl) / 1e6 + camera.readoutTime()
+            # Without mechanical shutter, dark frames are ordinary frames
+            camera.expFailed = camera._happens("expFailures", camera.expFailureRate)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIStopExposure(self, cameraID):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        with camera._lock:
+            if camera.expStatus == ASIExposureStatus.ASI_EXP_WORKING:
+                camera.expStatus = ASIExposureStatus.ASI_EXP_IDLE
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetExpStatus(self, cameraID, pExpStatus):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        with camera._lock:
+            if camera.expStatus == ASIExposureStatus.ASI_EXP_WORKING and time.perf_counter() >= camera.expEnd:
+                camera.expStatus = ASIExposureStatus.ASI_EXP_FAILED if camera.expFailed else ASIExposureStatus.ASI_EXP_SUCCESS
+            _target(pExpStatus).value = camera.expStatus
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetDataAfterExp(self, cameraID, buffer, bufferSize):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        with camera._lock:
+            if camera.expStatus != ASIExposureStatus.ASI_EXP_SUCCESS:
+                return ASIErrorCode.ASI_ERROR_GENERAL_ERROR
+            camera.expStatus = ASIExposureStatus.ASI_EXP_IDLE
+            return self._copy(camera.image(), buffer, bufferSize)
+
+    def ASIGetDataAfterExpGPS(self, cameraID, buffer, bufferSize, gpsData):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if camera.gps is None:
+            return ASIErrorCode.ASI_ERROR_GPS_NOT_SUPPORTED
+        with camera._lock:
+            if camera.expStatus != ASIExposureStatus.ASI_EXP_SUCCESS:
+                return ASIErrorCode.ASI_ERROR_GENERAL_ERROR
+            camera.expStatus   = ASIExposureStatus.ASI_EXP_IDLE
+            exposureStart = time.time() - (time.perf_counter() - camera.expEnd) - camera.value(_exposureControl) / 1e6 - camera.readoutTime()
+            camera.lastGPSTime = camera.gpsTime(exposureStart)
+            camera.fillGPS(gpsData, camera.lastGPSTime)
+            return self._copy(camera.image(), buffer, bufferSize)
+
+    def ASIGetID(self, cameraID, pID):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        ctypes.memmove(_target(pID).ID, camera.id, 8)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASISetID(self, cameraID, newID):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        camera.id = bytes(_target(newID).ID)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetGainOffset(self, cameraID, pOffsetHighestDR, pOffsetUnityGain, pGainLowestRN, pOffsetLowestRN):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        _target(pOffsetHighestDR).value = 10
+        _target(pOffsetUnityGain).value = 20
+        _target(pGainLowestRN).value    = 250
+        _target(pOffsetLowestRN).value  = 40
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetLMHGainOffset(self, cameraID, pLGain, pMGain, pHGain, pHOffset):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        _target(pLGain).value   = 0
+        _target(pMGain).value   = 100
+        _target(pHGain).value   = 250
+        _target(pHOffset).value = 40
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetSDKVersion(self):
+        return b"1, 37, 0, 0"
+
+    def ASIGetCameraSupportMode(self, cameraID, pSupportedMode):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        modes = list(range(7)) if camera.isTriggerCam else [0]
+        supportedMode = _target(pSupportedMode)
+        for index in range(16):
+            supportedMode.SupportedMode[index] = modes[index] if index < len(modes) else -1
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetCameraMode(self, cameraID, pMode):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if not camera.isTriggerCam:
+            return ASIErrorCode.ASI_ERROR_INVALID_MODE
+        _target(pMode).value = camera.cameraMode
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASISetCameraMode(self, cameraID, mode):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if not camera.isTriggerCam or not 0 <= mode <= 6:
+            return ASIErrorCode.ASI_ERROR_INVALID_MODE
+        camera.cameraMode = mode
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASISendSoftTrigger(self, cameraID, start):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if camera.cameraMode == 0:
+            return ASIErrorCode.ASI_ERROR_INVALID_MODE
+        if start:
+            # Triggered frame is ready once exposed and read out
+            with camera._lock:
+                camera.triggers.append(time.perf_counter() + camera.framePeriod())
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetSerialNumber(self, cameraID, pSN):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        ctypes.memmove(_target(pSN).SN, camera.serialNumber, 8)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASISetTriggerOutputIOConf(self, cameraID, pin, pinHigh, delay, duration):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if not camera.isTriggerCam:
+            return ASIErrorCode.ASI_ERROR_INVALID_MODE
+        camera.triggerOutputs[pin] = (pinHigh, delay, duration)
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGetTriggerOutputIOConf(self, cameraID, pin, pPinHigh, pDelay, pDuration):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if not camera.isTriggerCam:
+            return ASIErrorCode.ASI_ERROR_INVALID_MODE
+        pinHigh, delay, duration = camera.triggerOutputs.get(pin, (1, 0, 0))
+        _target(pPinHigh).value  = pinHigh
+        _target(pDelay).value    = delay
+        _target(pDuration).value = duration
+        return ASIErrorCode.ASI_SUCCESS
+
+    def ASIGPSGetData(self, cameraID, startLineGPSData, endLineGPSData):
+        camera, errorCode = self._camera(cameraID)
+        if camera is None:
+            return errorCode
+        if camera.gps is None:
+            return ASIErrorCode.ASI_ERROR_GPS_NOT_SUPPORTED
+        with camera._lock:
+            if camera.lastGPSTime is None:
+                return ASIErrorCode.ASI_ERROR_GPS_DATA_INVALID
+            # Lines are read out one after the other
+            lineTime = camera.readoutTime() / camera.roi[1]
+            camera.fillGPS(startLineGPSData, camera.lastGPSTime + lineTime * camera.value(ASIControlType.ASI_GPS_START_LINE))
+            camera.fillGPS(endLineGPSData  , camera.lastGPSTime + lineTime * camera.value(ASIControlType.ASI_GPS_END_LINE))
+        return ASIErrorCode.ASI_SUCCESS
@@ -0,0 +1,226 @@
+import time
+
+import numpy as np
+
+class Stacker:
+    """
+    @brief Running statistics of a series of frames: sum, mean, variance
+           (Welford), minimum, maximum, with optional sigma-clipping
+
+    @note Every buffer is allocated once for the frame shape, adding a frame
+          only runs in-place vectorized operations on them and converts the
+          frame to float a single time. Frames are the ones ZWOCamera
+          produces: RAW8 / Y8 (uint8), RAW16 (uint16) or RGB24 (H, W, 3).
+
+    @note Sigma-clipping is done on the fly: once minFrames frames have been
+          accumulated, a pixel further than sigmaClip standard deviations from
+          its current mean is left out of the sum, mean and variance. A
+          deviation of one ADU, the quantization step, is never rejected, so
+          that a pixel constant over the first frames (common in bias and
+          darks) keeps accepting its noise. This single-pass clipping is close to, but not the same as, the iterative
+          clipping done on a full stack kept in memory.
+    """
+    def __init__(self, shape, inputDtype=np.uint16, dtype=np.float32, sigmaClip=None, minFrames=5, minMax=True):
+        """
+        @param shape      Shape of the frames
+        @param inputDtype Type of the frames, uint8 or uint16
+        @param dtype      Type of the accumulators, float32 or float64. The
+                          sum of uint16 frames is always float64, float32
+                          losing integers past 2^24
+        @param sigmaClip  Rejection threshold in standard deviations, None
+                          to keep every pixel
+        @param minFrames  Number of frames accumulated before clipping starts
+        @param minMax     Whether to track the minimum and maximum frames
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64):
+            raise ValueError(f"Stacker accumulates into float32 or float64, got {dtype}")
+        if sigmaClip is not None and sigmaClip <= 0:
+            raise ValueError(f"Sigma clipping threshold must be positive, got {sigmaClip}")
+
+        self._shape      = tuple(shape)
+        self._inputDtype = np.dtype(inputDtype)
+        self._dtype      = dtype
+        self._sigmaClip  = sigmaClip
+        self._minFrames  = max(minFrames, 2)
+
+        self._sum     = np.empty(self._shape, dtype=np.float64 if self._inputDtype == np.uint16 else dtype)
+        self._mean    = np.empty(self._shape, dtype=dtype)
+        self._m2      = np.empty(self._shape, dtype=dtype)
+        self._frame   = np.empty(self._shape, dtype=dtype) # Frame converted to float
+        self._delta   = np.empty(self._shape, dtype=dtype)
+        self._scratch = np.empty(self._shape, dtype=dtype)
+        self._min     = np.empty(self._shape, dtype=self._inputDtype) if minMax else None
+        self._max     = np.empty(self._shape, dtype=self._inputDtype) if minMax else None
+
+        # Sigma-clipping needs a count per pixel
+        self._counts  = np.empty(self._shape, dtype=dtype) if sigmaClip is not None else None
+        self._keep    = np.empty(self._shape, dtype=bool)  if sigmaClip is not None else None
+        self.reset()
+
+    @classmethod
+    def forCamera(cls, camera, **kwargs):
+        """
+        @brief Stacker matching the current ROI format of a ZWOCamera
+
+        @param camera ZWOCamera whose frames are stacked
+        @param kwargs Other arguments of Stacker
+        """
+        return cls(camera.frameShape, camera.frameDtype, **kwargs)
+
+    def reset(self):
+        for buffer in (self._sum, self._mean, self._m2):
+            buffer.fill(0)
+        if self._counts is not None:
+            self._counts.fill(0)
+        self._frames   = 0
+        self._rejected = 0
+        self._elapsed  = 0.0
+
+    def add(self, frame):
+        """
+        @brief Adds a frame to the statistics
+
+        @param frame Frame of the stacker shape and input type
+        """
+        if frame.shape != self._shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the stacker shape {self._shape}")
+        start = time.perf_counter()
+
+        np.copyto(self._frame, frame, casting="unsafe")
+        if self._min is not None:
+            if self._frames == 0:
+                np.copyto(self._min, frame)
+                np.copyto(self._max, frame)
+            else:
+                np.minimum(self._min, frame, out=self._min)
+                np.maximum(self._max, frame, out=self._max)
+
+        if self._sigmaClip is None:
+            self._addAll()
+        else:
+            self._addClipped()
+
+        self._frames  += 1
+        self._elapsed += time.perf_counter() - start
+
+    def _addAll(self):
+        # Welford update with the same count for every pixel
+        frame, delta, scratch = self._frame, self._delta, self._scratch
+        np.add(self._sum, frame, out=self._sum)
+        np.subtract(frame, self._mean, out=delta)
+        np.multiply(delta, 1.0 / (self._frames + 1), out=scratch)
+        np.add(self._mean, scratch, out=self._mean)
+        np.subtract(frame, self._mean, out=scratch)
+        np.multiply(scratch, delta, out=scratch)
+        np.add(self._m2, scratch, out=self._m2)
+
+    def _addClipped(self):
+        # Welford update of the pixels within sigmaClip deviations only
+        frame, delta, scratch, keep, counts = self._frame, self._delta, self._scratch, self._keep, self._counts
+        np.subtract(frame, self._mean, out=delta)
+        if self._frames < self._minFrames:
+            keep.fill(True)
+        else:
+            # |delta|^2 <= k^2 * var + 1  <=>  (delta^2 - 1) * (n - 1) <= k^2 * m2,
+            # the 1 ADU^2 floor keeping the pixels of zero variance usable
+            np.multiply(delta, delta, out=scratch)
+            np.subtract(scratch, 1, out=scratch)
+            np.subtract(counts, 1, out=counts)
+            np.multiply(scratch, counts, out=scratch)
+            np.add(counts, 1, out=counts)
+            np.multiply(scratch, 1.0 / self._sigmaClip ** 2, out=scratch)
+            np.less_equal(scratch, self._m2, out=keep)
+            self._rejected += keep.size - int(np.count_nonzero(keep))
+
+        np.add(counts, keep, out=counts)
+        np.multiply(delta, keep, out=delta)
+        np.add(self._sum, frame, out=self._sum, where=keep)
+        np.divide(delta, counts, out=scratch, where=keep)
+        np.add(self._mean, scratch, out=self._mean, where=keep)
+        np.subtract(frame, self._mean, out=scratch)
+        np.multiply(scratch, delta, out=scratch)
+        np.add(self._m2, scratch, out=self._m2)
+
+    def __call__(self, frame, imageType=None):
+        # Lets a Stacker be chained as a stream processor
+        self.add(frame)
+        return frame
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def frames(self):
+        return self._frames
+
+    @property
+    def counts(self):
+        """
+        @brief Number of frames kept per pixel
+        """
+        if self._counts is not None:
+            return self._counts.astype(np.int64)
+        return np.full(self._shape, self._frames, dtype=np.int64)
+
+    @property
+    def sum(self):
+        """
+        @note View on the accumulator, updated by the next frame
+        """
+        return self._sum
+
+    @property
+    def mean(self):
+        """
+        @note View on the accumulator, updated by the next frame
+        """
+        return self._mean
+
+    @property
+    def variance(self):
+        """
+        @brief Unbiased per-pixel variance, zero where less than two frames
+               were kept
+        """
+        counts = self._counts if self._counts is not None else self._frames
+        return np.divide(self._m2, np.maximum(np.subtract(counts, 1), 1), dtype=self._dtype)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def min(self):
+        return self._min if self._min is not None and self._frames > 0 else None
+
+    @property
+    def max(self):
+        return self._max if self._max is not None and self._frames > 0 else None
+
+    @property
+    def memoryBytes(self):
+        """
+        @brief Memory used by the stacker buffers
+        """
+        buffers = (self._sum, self._mean, self._m2, self._frame, self._delta, self._scratch, self._min, self._max, self._counts, self._keep)
+        return sum(buffer.nbytes for buffer in buffers if buffer is not None)
+
+    @property
+    def statistics(self):
+        """
+        @brief Snapshot of the stacking statistics
+
+        @return Dictionary containing:
+                 - frames         : frames added
+                 - rejectedPixels : pixel samples left out by sigma-clipping
+                 - framesPerS     : frames added per second of stacking work
+                 - memoryBytes    : memory used by the buffers
+        """
+        return {
+            "frames"        : self._frames,
+            "rejectedPixels": self._rejected,
+            "framesPerS"    : self._frames / self._elapsed if self._elapsed > 0 else 0.0,
+            "memoryBytes"   : self.memoryBytes,
+        }
@@ -0,0 +1,329 @@
+import collections, threading, time
+import numpy as np
+
+from . import metrics, pyzwoasi
+from .pyzwoasi import ASIError, ASIErrorCode
+
+# Frame handed to the consumer. The image is a view on a ring slot, valid
+# until the next frame is requested from the stream.
+Frame = collections.namedtuple("Frame", ["image", "sequence", "timestamp"])
+
+class VideoStream:
+    """
+    @brief Video capture engine pulling frames from the SDK on a dedicated
+           thread into a preallocated ring of NumPy arrays
+
+    @note The capture thread spends nearly all its time inside the SDK call,
+          which releases the GIL, so that the consumer can run concurrently.
+          No allocation is made per frame: the SDK writes directly into the
+          ring slots and the consumer receives views on them.
+    """
+
+    OVERWRITE = "overwrite" # Oldest unread frame is dropped when the ring is full
+    BLOCK     = "block"     # Capture waits for the consumer when the ring is full
+
+    _temperatureInterval = 1.0 # Seconds between two temperature reads for the metadata
+
+    def __init__(self, camera, slots=8, policy=OVERWRITE, waitms=None, processor=None, gps=None, meta=None, depth=None):
+        """
+        @param camera    ZWOCamera to stream from. Its ROI format must not
+                         be changed while the stream is running
+        @param slots     Number of frames in the ring, at least 2
+        @param policy    VideoStream.OVERWRITE or VideoStream.BLOCK
+        @param waitms    Timeout of each SDK call in milliseconds. Defaults
+                         to twice the exposure time plus 500 ms as advised
+                         by ZWO
+        @param processor Optional ColorProcessor applied to each frame by
+                         the consumer, when reading it
+        @param gps       Optional GPSTable, filled with the GPS record of
+                         each frame by the same SDK call as the image
+        @param meta      Optional FrameMetaTable receiving the metadata of
+                         each frame, from the camera state when the frame
+                         was requested. The temperature is read once per
+                         second by the consumer, in read()
+        @param depth     Optional BitDepthConverter applied by the consumer
+                         to each frame, before the processor. In place
+                         conversions write into the ring slot
+        """
+        if slots < 2:
+            raise ValueError(f"Stream needs at least 2 slots, got {slots}")
+        if policy not in (self.OVERWRITE, self.BLOCK):
+            raise ValueError(f"Unknown stream policy {policy}")
+
+        self._camera    = camera
+        self._cameraID  = camera._cameraIndex
+        self._policy    = policy
+        self._waitms    = waitms
+        self._processor = processor
+        self._depth     = depth
+        self._gps       = gps
+        self._meta      = meta
+        self._imageType = camera.imageType
+
+        # Ring buffer and its per-slot metadata
+        frame = camera.emptyFrame()
+        self._ring       = np.empty((slots,) + frame.shape, dtype=frame.dtype)
+        self._sequences  = np.full(slots, -1, dtype=np.int64)
+        self._timestamps = np.zeros(slots, dtype=np.float64)
+
+        # Slot bookkeeping, protected by the condition lock
+        self._condition = threading.Condition()
+        self._free      = collections.deque(range(slots))
+        self._ready     = collections.deque()
+        self._held      = None
+        self._heldSince = None
+
+        self._thread    = None
+        self._running   = False
+        self._error     = None
+
+        self._temperaturePolled = None
+
+        self._resetStatistics()
+
+    def _resetStatistics(self):
+        self._framesCaptured    = 0
+        self._framesOverwritten = 0
+        self._timeouts          = 0
+        self._droppedFrames     = 0
+        self._startTime         = None
+        self._lastFrameTime     = None
+
+    @property
+    def slots(self):
+        return self._ring.shape[0]
+
+    @property
+    def policy(self):
+        return self._policy
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def backlog(self):
+        """
+        @brief Number of captured frames not read yet
+        """
+        with self._condition:
+            return len(self._ready)
+
+    @property
+    def statistics(self):
+        """
+        @brief Snapshot of the capture statistics
+
+        @return Dictionary containing:
+                 - framesCaptured   : frames received from the SDK
+                 - framesOverwritten: frames dropped by the ring (overwrite policy)
+                 - droppedFrames    : frames dropped by the SDK, see getDroppedFrames
+                 - timeouts         : SDK calls which timed out
+                 - fps              : sustained frame rate since the stream started
+        """
+        with self._condition:
+            fps = 0.0
+            if self._startTime is not None and self._lastFrameTime is not None and self._framesCaptured > 1:
+                elapsed = self._lastFrameTime - self._startTime
+                if elapsed > 0:
+                    fps = (self._framesCaptured - 1) / elapsed
+            return {
+                "framesCaptured"   : self._framesCaptured,
+                "framesOverwritten": self._framesOverwritten,
+                "droppedFrames"    : self._droppedFrames,
+                "timeouts"         : self._timeouts,
+                "fps"              : fps,
+            }
+
+    def start(self):
+        """
+        @brief Starts video capture and the capture thread
+        """
+        if self._running:
+            return
+
+        # A capture thread which died on an error still holds the SDK video
+        # capture, it is stopped first
+        if self._thread is not None:
+            self.stop()
+
+        with self._condition:
+            self._free.extend(self._ready)
+            self._ready.clear()
+            if self._held is not None:
+                self._free.append(self._held)
+                self._held = None
+            self._error = None
+            self._resetStatistics()
+
+        if self._meta is not None:
+            # Caches exposure and gain, the capture thread makes no control read
+            self._camera.frameMeta()
+            self._temperaturePolled = time.perf_counter()
+
+        pyzwoasi.startVideoCapture(self._cameraID)
+        self._running = True
+        self._thread  = threading.Thread(target=self._captureLoop, name=f"VideoStream-{self._cameraID}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        @brief Stops the capture thread and video capture
+
+        @note Frames already in the ring can still be read after stopping
+        """
+        if self._thread is None:
+            return
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+
+        # Dropped frames counter is reset by the SDK on stop, read it last
+        try:
+            self._droppedFrames = pyzwoasi.getDroppedFrames(self._cameraID)
+        except ASIError:
+            pass
+        pyzwoasi.stopVideoCapture(self._cameraID)
+
+    def _acquireSlot(self):
+        # Called from the capture thread with the condition held
+        while True:
+            if self._free:
+                return self._free.popleft()
+            if not self._running:
+                return None
+            if self._policy == self.OVERWRITE:
+                self._framesOverwritten += 1
+                return self._ready.popleft()
+            self._condition.wait()
+
+    def _captureLoop(self):
+        waitms = self._waitms
+        if waitms is None:
+            waitms = int(2 * self._camera.exposure / 1000 + 500)
+
+        sequence         = 0
+        lastDroppedCheck = time.perf_counter()
+        try:
+            while self._running:
+                with self._condition:
+                    slot = self._acquireSlot()
+                if slot is None:
+                    break
+
+                # Settings changed from now on apply to the next frames only
+                state = self._camera._metaState if self._meta is not None else None
+                try:
+                    if self._gps is None:
+                        pyzwoasi.getVideoDataInto(self._cameraID, self._ring[slot], waitms)
+                    else:
+                        pyzwoasi.getVideoDataGPSInto(self._cameraID, self._ring[slot], waitms, self._gps._row())
+                except ASIError as e:
+                    timeout = e.args[1] == ASIErrorCode.ASI_ERROR_TIMEOUT
+                    with self._condition:
+                        self._free.appendleft(slot)
+                        if timeout:
+                            self._timeouts += 1
+                    if timeout:
+                        continue
+                    raise
+
+                now      = time.perf_counter()
+                hostTime = time.time()
+                if self._gps is not None:
+                    self._gps._commit(sequence, hostTime)
+                if self._meta is not None:
+                    self._meta.append(self._camera.frameMeta(sequence, hostTime, self._droppedFrames, state))
+                with self._condition:
+                    self._sequences[slot]  = sequence
+                    self._timestamps[slot] = hostTime
+                    self._ready.append(slot)
+                    self._framesCaptured += 1
+                    if self._startTime is None:
+                        self._startTime = now
+                    self._lastFrameTime = now
+                    self._condition.notify_all()
+                sequence += 1
+
+                # Dropped frames are polled once per second, not per frame
+                if now - lastDroppedCheck >= 1.0:
+                    self._droppedFrames = pyzwoasi.getDroppedFrames(self._cameraID)
+                    lastDroppedCheck = now
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+
+    def read(self, timeout=None):
+        """
+        @brief Waits for the next frame of the stream
+
+        @note The image of the returned frame is a view on the ring. It stays
+              valid until the next call to read (or next iteration), copy it
+              if it has to be kept longer.
+
+        @param timeout Maximum time to wait in seconds, None for infinite
+
+        @return Frame(image, sequence, timestamp), or None if the timeout
+                expired or the stream is stopped and empty
+        """
+        start = time.perf_counter()
+        if self._temperaturePolled is not None and start - self._temperaturePolled >= self._temperatureInterval:
+            # Control reads stay on the consumer side, along with the writes
+            if "Temperature" in self._camera._controls:
+                self._camera.getControls(["Temperature"])
+            self._temperaturePolled = start
+
+        with self._condition:
+            if self._held is not None:
+                # Time spent by the consumer on the previous frame
+                metrics.observe("stream.consume", self._cameraID, start - self._heldSince)
+                self._free.append(self._held)
+                self._held = None
+                self._condition.notify_all()
+
+            ready = self._condition.wait_for(lambda: self._ready or not self._running, timeout)
+            metrics.observe("stream.wait", self._cameraID, time.perf_counter() - start)
+            if not ready:
+                return None
+            if not self._ready:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                return None
+
+            slot = self._ready.popleft()
+            self._held = slot
+            sequence, timestamp = int(self._sequences[slot]), float(self._timestamps[slot])
+
+        # Processing happens outside of the lock, the held slot is not
+        # touched by the capture thread
+        image = self._ring[slot]
+        if self._processor is not None or self._depth is not None:
+            processed = time.perf_counter()
+            if self._depth is not None:
+                image = self._depth(image, self._imageType)
+            if self._processor is not None:
+                image = self._processor(image, self._imageType)
+            metrics.observe("stream.processing", self._cameraID, time.perf_counter() - processed)
+        self._heldSince = time.perf_counter()
+        return Frame(image, sequence, timestamp)
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.stop()
@@ -0,0 +1,247 @@
+import time
+
+import numpy as np
+
+from .stream import VideoStream
+
+def centroid(image, threshold=0.5, step=1):
+    """
+    @brief Intensity-weighted centroid of the bright part of a frame
+
+    @note Pixels below min + threshold * (max - min) are ignored, so that the
+          sky background does not pull the centroid towards the frame center.
+          The weights are reduced to row and column profiles, which costs two
+          sums over the frame. Color frames are measured on their green
+          channel.
+
+    @param image     Frame, 2D or (H, W, 3)
+    @param threshold Fraction of the dynamic range below which pixels are
+                     ignored, between 0 and 1
+    @param step      Subsampling step, 1 to use every pixel
+
+    @return (x, y) in pixels of the frame, None on a flat frame
+    """
+    view = image[::step, ::step] if step > 1 else image
+    if view.ndim == 3:
+        view = view[..., 1]
+
+    low, high = float(view.min()), float(view.max())
+    if high <= low:
+        return None
+
+    weights = view.astype(np.float32)
+    np.subtract(weights, low + threshold * (high - low), out=weights)
+    np.maximum(weights, 0, out=weights)
+    total = float(weights.sum(dtype=np.float64))
+    if total <= 0:
+        return None
+
+    rows    = weights.sum(axis=1, dtype=np.float64)
+    columns = weights.sum(axis=0, dtype=np.float64)
+    x = float(columns @ np.arange(columns.size)) / total * step
+    y = float(rows    @ np.arange(rows.size   )) / total * step
+    return x, y
+
+class ROITracker:
+    """
+    @brief Video stream through a small ROI which follows a target across
+           the sensor, by moving its start position
+
+    @note On start, a few full-frame video frames measure the full-frame
+          frame rate and locate the target. The ROI is then centered on it,
+          and each frame read is centroided: the ROI is moved when the target
+          is more than deadband pixels off center, at most once per
+          minInterval seconds. Moving the start position does not restart the
+          capture, frames taken before a move are not used for tracking.
+    """
+    def __init__(self, camera, width, height, slots=8, policy=VideoStream.OVERWRITE, waitms=None, processor=None,
+                 deadband=4, minInterval=0.2, threshold=0.5, step=1, baselineFrames=10):
+        """
+        @param camera         ZWOCamera
+        @param width          Width of the tracking ROI, multiple of 8
+        @param height         Height of the tracking ROI, multiple of 2
+        @param slots          Number of frames of the ring buffer
+        @param policy         VideoStream.OVERWRITE or VideoStream.BLOCK
+        @param waitms         Timeout of each SDK call in milliseconds
+        @param processor      Optional processor applied to each frame read
+        @param deadband       Offset from the ROI center, in pixels, under
+                              which the ROI is not moved
+        @param minInterval    Minimum time between two moves in seconds
+        @param threshold      See centroid
+        @param step           See centroid
+        @param baselineFrames Number of full-frame frames measured on start,
+                              0 to skip the baseline and start from the
+                              current position
+        """
+        self._camera         = camera
+        self._width          = width
+        self._height         = height
+        self._slots          = slots
+        self._policy         = policy
+        self._waitms         = waitms
+        self._processor      = processor
+        self._deadband       = deadband
+        self._minInterval    = minInterval
+        self._threshold      = threshold
+        self._step           = step
+        self._baselineFrames = baselineFrames
+        self._warmupFrames   = 3
+
+        # Start positions are kept even on color cameras, not to change the
+        # Bayer pattern of the ROI
+        self._alignment = 2 if camera._isColorCam else 1
+        self._stream    = None
+        self._position  = None
+
+        self._baselineFps  = None
+        self._moves        = 0
+        self._limitedMoves = 0
+        self._movedAt      = 0.0
+        self._lastMove     = float("-inf")
+        self._target       = None
+
+    def start(self):
+        """
+        @brief Measures the full-frame baseline, centers the ROI on the
+               target and starts the stream
+        """
+        if self._stream is not None and self._stream.running:
+            return self
+
+        camera = self._camera
+        binning = camera.softwareBinning
+        maxWidth, maxHeight = camera._maxWidth // binning, camera._maxHeight // binning
+
+        target = None
+        if self._baselineFrames > 0:
+            camera.setROI(maxWidth // 8 * 8, maxHeight // 2 * 2)
+            with camera.stream(2, VideoStream.BLOCK, self._waitms) as stream:
+                # Frames queued while the capture starts come in a burst,
+                # they are read before timing the baseline
+                image = None
+                for index in range(self._warmupFrames + self._baselineFrames):
+                    if index == self._warmupFrames:
+                        start = time.perf_counter()
+                    frame = stream.read()
+                    if frame is not None:
+                        image = frame.image
+                self._baselineFps = self._baselineFrames / (time.perf_counter() - start)
+            if image is not None:
+                position = centroid(image, self._threshold, self._step)
+                if position is not None:
+                    startX, startY = camera.startPosition
+                    target = (startX + position[0], startY + position[1])
+
+        camera.setROI(self._width, self._height)
+        self._position = camera.startPosition
+        if target is not None:
+            self._target = target
+            self._moveTo(target[0] - self._width / 2, target[1] - self._height / 2)
+
+        self._stream = camera.stream(self._slots, self._policy, self._waitms, self._processor)
+        self._stream.start()
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+
+    def _moveTo(self, startX, startY):
+        camera = self._camera
+        binning = camera.softwareBinning
+        alignment = self._alignment
+        maxX = (camera._maxWidth  // binning - self._width ) // alignment * alignment
+        maxY = (camera._maxHeight // binning - self._height) // alignment * alignment
+        startX = min(max(int(round(startX / alignment)) * alignment, 0), maxX)
+        startY = min(max(int(round(startY / alignment)) * alignment, 0), maxY)
+        if (startX, startY) == self._position:
+            return False
+        camera.startPosition = self._position = (startX, startY)
+        self._movedAt = time.time()
+        self._moves  += 1
+        return True
+
+    def update(self, frame):
+        """
+        @brief Centroids a frame and moves the ROI if needed
+
+        @note Called by read for every frame, only needed when frames are
+              read from the underlying stream directly
+
+        @param frame Frame of the stream
+
+        @return True if the ROI was moved
+        """
+        if frame.timestamp <= self._movedAt:
+            return False
+        image = frame.image
+        position = centroid(image, self._threshold, self._step)
+        if position is None:
+            return False
+
+        # Processors may change the frame size, e.g. superpixel debayering
+        scale = self._width / image.shape[1]
+        offsetX = position[0] * scale - self._width  / 2
+        offsetY = position[1] * scale - self._height / 2
+        startX, startY = self._position
+        self._target = (startX + position[0] * scale, startY + position[1] * scale)
+        if max(abs(offsetX), abs(offsetY)) <= self._deadband:
+            return False
+
+        now = time.perf_counter()
+        if now - self._lastMove < self._minInterval:
+            self._limitedMoves += 1
+            return False
+        self._lastMove = now
+        return self._moveTo(startX + offsetX, startY + offsetY)
+
+    def read(self, timeout=None):
+        """
+        @brief Waits for the next frame and tracks the target on it, see
+               VideoStream.read
+        """
+        frame = self._stream.read(timeout)
+        if frame is not None:
+            self.update(frame)
+        return frame
+
+    @property
+    def target(self):
+        """
+        @brief Last position of the target in binned sensor pixels, None if
+               not found yet
+        """
+        return self._target
+
+    @property
+    def statistics(self):
+        """
+        @brief Snapshot of the tracking statistics
+
+        @return Dictionary with the VideoStream statistics, plus:
+                 - moves       : start position changes
+                 - limitedMoves: moves delayed by minInterval
+                 - baselineFps : full-frame frame rate, None if not measured
+                 - fpsGain     : frame rate ratio versus full-frame capture
+        """
+        statistics = self._stream.statistics if self._stream is not None else {"fps": 0.0}
+        statistics.update({
+            "moves"       : self._moves,
+            "limitedMoves": self._limitedMoves,
+            "baselineFps" : self._baselineFps,
+            "fpsGain"     : statistics["fps"] / self._baselineFps if self._baselineFps else None,
+        })
+        return statistics
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.stop()
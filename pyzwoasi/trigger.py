@@ -0,0 +1,285 @@
+import collections, threading, time
+
+import numpy as np
+
+from . import pyzwoasi
+from .pyzwoasi import ASICameraMode, ASIError, ASIErrorCode, ASITrigOutputPin
+
+# Modes started by sendSoftTrigger rather than by the trigger input
+_softModes = (ASICameraMode.ASI_MODE_TRIG_SOFT_EDGE, ASICameraMode.ASI_MODE_TRIG_SOFT_LEVEL)
+
+class TriggeredCapture:
+    """
+    @brief Frames of a trigger camera, one per trigger, collected into
+           preallocated buffers
+
+    @note The camera is armed once on start: trigger mode, output pin and
+          video capture are set up, then a thread reads every triggered
+          frame into the next buffer until all are filled. Nothing is
+          allocated per frame.
+
+          Trigger times are given by trigger() in the soft modes, or by
+          noteTrigger() from the strobe source in the hardware modes. Each
+          frame is matched to the latest trigger at least one exposure
+          before it, older unmatched triggers are counted as missed.
+
+          with camera.triggered(ASICameraMode.ASI_MODE_TRIG_RISE_EDGE, frames=500) as capture:
+              capture.wait()
+          images = capture.images
+    """
+    def __init__(self, camera, mode=ASICameraMode.ASI_MODE_TRIG_RISE_EDGE, frames=100, waitms=None,
+                 outputPin=ASITrigOutputPin.ASI_TRIG_OUTPUT_NONE, outputHigh=True, outputDelay_us=0, outputDuration_us=10):
+        """
+        @param camera            ZWOCamera of a trigger camera
+        @param mode              ASICameraMode trigger mode
+        @param frames            Number of frames collected
+        @param waitms            Timeout of each SDK call in milliseconds,
+                                 the capture thread keeps waiting after it
+        @param outputPin         ASITrigOutputPin signalling the exposures,
+                                 e.g. to fire a strobe
+        @param outputHigh        Output pin level while active
+        @param outputDelay_us    Delay between the trigger and the output
+        @param outputDuration_us Duration of the output signal
+        """
+        mode = ASICameraMode(mode)
+        if not camera._isTriggerCam:
+            raise ValueError("Camera does not support trigger modes.")
+        if mode in (ASICameraMode.ASI_MODE_NORMAL, ASICameraMode.ASI_MODE_END):
+            raise ValueError(f"Trigger mode expected, got {mode.name}.")
+        supportedModes = pyzwoasi.getCameraSupportMode(camera._cameraIndex).SupportedMode
+        if mode not in list(supportedModes):
+            raise ValueError(f"Trigger mode {mode.name} not supported by this camera.")
+
+        self._camera   = camera
+        self._cameraID = camera._cameraIndex
+        self._mode     = mode
+        self._waitms   = waitms
+        self._output   = (ASITrigOutputPin(outputPin), outputHigh, outputDelay_us, outputDuration_us)
+
+        frame = camera.emptyFrame()
+        self._buffers    = np.empty((frames,) + frame.shape, dtype=frame.dtype)
+        self._timestamps = np.zeros(frames, dtype=np.float64)
+        self._latencies  = np.full(frames, np.nan)
+
+        self._condition    = threading.Condition()
+        self._triggers     = collections.deque()
+        self._thread       = None
+        self._running      = False
+        self._error        = None
+        self._previousMode = None
+        self._resetStatistics()
+
+    def _resetStatistics(self):
+        self._count          = 0
+        self._triggerCount   = 0
+        self._missedTriggers = 0
+        self._timeouts       = 0
+        self._droppedFrames  = 0
+        self._armedAt        = None
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def running(self):
+        return self._running
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def images(self):
+        """
+        @brief Frames collected so far, as a view on the buffers
+        """
+        return self._buffers[:self._count]
+
+    @property
+    def timestamps(self):
+        """
+        @brief time.perf_counter() of each frame collected, when received
+        """
+        return self._timestamps[:self._count]
+
+    @property
+    def latencies(self):
+        """
+        @brief Trigger to frame latency of each frame collected in seconds,
+               NaN for frames without known trigger
+        """
+        return self._latencies[:self._count]
+
+    def start(self):
+        """
+        @brief Arms the camera: sets the trigger mode and output pin, starts
+               the video capture and the collecting thread
+        """
+        if self._running:
+            return self
+
+        with self._condition:
+            self._triggers.clear()
+            self._error = None
+            self._resetStatistics()
+
+        self._previousMode = pyzwoasi.getCameraMode(self._cameraID)
+        pyzwoasi.setCameraMode(self._cameraID, self._mode)
+        outputPin, outputHigh, outputDelay_us, outputDuration_us = self._output
+        if outputPin != ASITrigOutputPin.ASI_TRIG_OUTPUT_NONE:
+            pyzwoasi.setTriggerOutputIOConf(self._cameraID, outputPin, outputHigh, outputDelay_us, outputDuration_us)
+        pyzwoasi.startVideoCapture(self._cameraID)
+
+        self._armedAt = time.perf_counter()
+        self._running = True
+        self._thread  = threading.Thread(target=self._collectLoop, name=f"TriggeredCapture-{self._cameraID}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        @brief Disarms the camera and puts back its previous mode
+        """
+        if self._thread is None:
+            return
+        self._running = False
+        self._thread.join()
+        self._thread = None
+        try:
+            self._droppedFrames = pyzwoasi.getDroppedFrames(self._cameraID)
+        finally:
+            pyzwoasi.stopVideoCapture(self._cameraID)
+            pyzwoasi.setCameraMode(self._cameraID, self._previousMode)
+
+        # Triggers left without frame were missed
+        with self._condition:
+            self._missedTriggers += len(self._triggers)
+            self._triggers.clear()
+
+    def trigger(self):
+        """
+        @brief Starts one exposure in the soft trigger modes
+
+        @return time.perf_counter() of the trigger
+        """
+        if self._mode not in _softModes:
+            raise ValueError(f"Soft trigger needs a soft trigger mode, camera is in {self._mode.name}.")
+        now = self.noteTrigger()
+        pyzwoasi.sendSoftTrigger(self._cameraID, True)
+        if self._mode == ASICameraMode.ASI_MODE_TRIG_SOFT_LEVEL:
+            # The exposure lasts as long as the level
+            time.sleep(self._camera.exposure / 1e6)
+        pyzwoasi.sendSoftTrigger(self._cameraID, False)
+        return now
+
+    def noteTrigger(self, timestamp=None):
+        """
+        @brief Records the time of a trigger, to measure latency and missed
+               triggers
+
+        @param timestamp time.perf_counter() of the trigger, now if None
+
+        @return Recorded timestamp
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        with self._condition:
+            self._triggers.append(timestamp)
+            self._triggerCount += 1
+        return timestamp
+
+    def _match(self, received, exposure):
+        # Called with the lock held. Latency of the frame received at that
+        # time, NaN if its trigger is unknown
+        latency = np.nan
+        while self._triggers and self._triggers[0] <= received - exposure:
+            trigger = self._triggers.popleft()
+            if self._triggers and self._triggers[0] <= received - exposure:
+                self._missedTriggers += 1
+            else:
+                latency = received - trigger
+        return latency
+
+    def _collectLoop(self):
+        waitms = self._waitms
+        if waitms is None:
+            waitms = int(2 * self._camera.exposure / 1000 + 500)
+        exposure = self._camera.exposure / 1e6
+
+        try:
+            while self._running and self._count < self._buffers.shape[0]:
+                try:
+                    pyzwoasi.getVideoDataInto(self._cameraID, self._buffers[self._count], waitms)
+                except ASIError as e:
+                    if e.args[1] == ASIErrorCode.ASI_ERROR_TIMEOUT:
+                        self._timeouts += 1
+                        continue
+                    raise
+
+                received = time.perf_counter()
+                with self._condition:
+                    self._timestamps[self._count] = received
+                    self._latencies[self._count]  = self._match(received, exposure)
+                    self._count += 1
+                    self._condition.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        @brief Waits until every buffer is filled
+
+        @param timeout Maximum time to wait in seconds, None for infinite
+
+        @return True if every buffer is filled
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._count >= self._buffers.shape[0] or not self._running, timeout)
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            return self._count >= self._buffers.shape[0]
+
+    @property
+    def statistics(self):
+        """
+        @brief Snapshot of the capture statistics
+
+        @return Dictionary containing:
+                 - frames        : frames collected
+                 - triggers      : triggers recorded
+                 - missedTriggers: triggers without frame
+                 - droppedFrames : frames dropped by the SDK, read on stop
+                 - timeouts      : SDK calls which timed out
+                 - fps           : frames per second since armed
+                 - latency       : mean, min, max and p99 trigger to frame
+                                   latency in seconds, None without trigger
+        """
+        with self._condition:
+            latencies = self._latencies[:self._count]
+            latencies = latencies[~np.isnan(latencies)]
+            elapsed   = (self._timestamps[self._count - 1] - self._armedAt) if self._count and self._armedAt is not None else 0.0
+            return {
+                "frames"        : self._count,
+                "triggers"      : self._triggerCount,
+                "missedTriggers": self._missedTriggers,
+                "droppedFrames" : self._droppedFrames,
+                "timeouts"      : self._timeouts,
+                "fps"           : self._count / elapsed if elapsed > 0 else 0.0,
+                "latency"       : {
+                    "mean": float(latencies.mean()),
+                    "min" : float(latencies.min()),
+                    "max" : float(latencies.max()),
+                    "p99" : float(np.percentile(latencies, 99)),
+                } if latencies.size else None,
+            }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.stop()
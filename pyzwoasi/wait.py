@@ -0,0 +1,205 @@
+import abc, time
+
+from . import pyzwoasi
+from .pyzwoasi import ASIExposureStatus
+
+class WaitStrategy(abc.ABC):
+    """
+    @brief Base class of the exposure completion wait engines
+
+    @note Once the exposure time has elapsed, the camera still has to read
+          the sensor out. A strategy decides how long to sleep between two
+          status reads during that time. Subclasses only have to implement
+          delays(). Each iteration reads the status exactly once.
+
+          A camera stuck in ASI_EXP_WORKING (e.g. after a USB stall) is given
+          up on after a timeout, the wait then returns ASI_EXP_FAILED so that
+          the exposure is restarted or the error raised by the caller.
+    """
+
+    def __init__(self):
+        self.resetStatistics()
+
+    def resetStatistics(self):
+        self._exposures          = 0
+        self._statusCalls        = 0
+        self._pollingTime        = 0.0
+        self._lastReadoutLatency = None
+        self._readoutLatencySum  = 0.0
+        self._readoutCount       = 0
+        self._timeouts           = 0
+
+    @abc.abstractmethod
+    def delays(self):
+        """
+        @brief Sleep durations between two status reads, in seconds
+
+        @return Iterable of delays, consumed until the exposure is over
+        """
+
+    def record(self, statusCalls, pollingTime, status):
+        """
+        @brief Accounts for one finished wait
+
+        @param statusCalls Number of getExpStatus calls made
+        @param pollingTime Time spent polling after the exposure time, in seconds
+        @param status      Last exposure status read
+        """
+        self._exposures   += 1
+        self._statusCalls += statusCalls
+        self._pollingTime += pollingTime
+        if status == ASIExposureStatus.ASI_EXP_SUCCESS:
+            self._lastReadoutLatency = pollingTime
+            self._readoutLatencySum += pollingTime
+            self._readoutCount      += 1
+
+    @staticmethod
+    def defaultTimeout(exposureTime_us):
+        """
+        @brief Longest wait for an exposure before giving up on it, in
+               seconds: the exposure time plus max(10 s, 2 x exposure time)
+        """
+        exposure = exposureTime_us / 1_000_000
+        return exposure + max(10.0, 2 * exposure)
+
+    def polling(self, exposureTime_us, timeout=None):
+        """
+        @brief Schedule of one wait, shared by the blocking and the asyncio
+               waits
+
+        @note Generator yielding the time to sleep before each status read,
+              the status read being sent back into it. It returns the final
+              status, once recorded in the statistics.
+
+              polling = strategy.polling(exposureTime_us)
+              try:
+                  delay = next(polling)
+                  while True:
+                      time.sleep(delay)
+                      delay = polling.send(pyzwoasi.getExpStatus(cameraID))
+              except StopIteration as stop:
+                  status = stop.value
+
+        @param exposureTime_us Exposure time in microseconds
+        @param timeout         Time in seconds after which a working exposure
+                               is reported as ASI_EXP_FAILED, defaults to
+                               defaultTimeout(exposureTime_us)
+        """
+        if timeout is None:
+            timeout = self.defaultTimeout(exposureTime_us)
+        deadline = time.perf_counter() + timeout
+
+        status      = yield exposureTime_us / 1_000_000 # seconds
+        start       = time.perf_counter()
+        statusCalls = 1
+        for delay in self.delays():
+            if status != ASIExposureStatus.ASI_EXP_WORKING:
+                break
+            if time.perf_counter() + delay > deadline:
+                self._timeouts += 1
+                status = ASIExposureStatus.ASI_EXP_FAILED
+                break
+            status = yield delay
+            statusCalls += 1
+
+        self.record(statusCalls, time.perf_counter() - start, status)
+        return status
+
+    def wait(self, cameraID, exposureTime_us, timeout=None):
+        """
+        @brief Sleeps during the exposure then polls until it is over
+
+        @param cameraID        ID of the camera, exposure already started
+        @param exposureTime_us Exposure time in microseconds
+        @param timeout         See polling
+
+        @return Last exposure status read, ASI_EXP_SUCCESS when the picture
+                can be downloaded, ASI_EXP_FAILED on timeout
+        """
+        polling = self.polling(exposureTime_us, timeout)
+        try:
+            delay = next(polling)
+            while True:
+                time.sleep(delay)
+                delay = polling.send(pyzwoasi.getExpStatus(cameraID))
+        except StopIteration as stop:
+            return stop.value
+
+    @property
+    def statistics(self):
+        """
+        @brief Timing statistics of the waits done so far
+
+        @return Dictionary containing:
+                 - exposures          : number of waits
+                 - statusCalls        : total getExpStatus calls
+                 - statusCallsPerWait : mean getExpStatus calls per wait
+                 - pollingTime        : total time spent polling, in seconds
+                 - readoutLatency     : last readout latency, in seconds
+                 - meanReadoutLatency : mean readout latency, in seconds
+                 - timeouts           : waits given up on after their timeout
+        """
+        return {
+            "exposures"         : self._exposures,
+            "statusCalls"       : self._statusCalls,
+            "statusCallsPerWait": self._statusCalls / self._exposures if self._exposures else 0.0,
+            "pollingTime"       : self._pollingTime,
+            "readoutLatency"    : self._lastReadoutLatency,
+            "meanReadoutLatency": self._readoutLatencySum / self._readoutCount if self._readoutCount else None,
+            "timeouts"          : self._timeouts,
+        }
+
+class FixedIntervalWait(WaitStrategy):
+    """
+    @brief Polls the exposure status at a fixed interval
+    """
+
+    def __init__(self, interval=0.01):
+        """
+        @param interval Delay between two status reads, in seconds
+        """
+        super().__init__()
+        self.interval = interval
+
+    def delays(self):
+        while True:
+            yield self.interval
+
+class BackoffWait(WaitStrategy):
+    """
+    @brief Polls the exposure status with exponentially growing delays,
+           capped near the expected readout time
+
+    @note The readout time is learnt from the previous exposures, so that
+          the overshoot after the end of readout stays a small fraction of
+          the readout itself.
+    """
+
+    def __init__(self, initialDelay=0.0005, factor=2.0, maxDelay=0.1, readoutFraction=0.25):
+        """
+        @param initialDelay    First delay, in seconds
+        @param factor          Growth factor between two delays
+        @param maxDelay        Cap used until a readout has been measured, in seconds
+        @param readoutFraction Cap as a fraction of the expected readout time
+        """
+        super().__init__()
+        self.initialDelay    = initialDelay
+        self.factor          = factor
+        self.maxDelay        = maxDelay
+        self.readoutFraction = readoutFraction
+
+    @property
+    def expectedReadout(self):
+        return self._readoutLatencySum / self._readoutCount if self._readoutCount else None
+
+    def delays(self):
+        expectedReadout = self.expectedReadout
+        if expectedReadout is None:
+            cap = self.maxDelay
+        else:
+            cap = min(self.maxDelay, max(self.initialDelay, expectedReadout * self.readoutFraction))
+
+        delay = self.initialDelay
+        while True:
+            yield min(delay, cap)
+            delay *= self.factor
@@ -0,0 +1,4 @@
+import os, tempfile
+
+# Keeps the on-disk caches of the tested cameras out of the user cache
+os.environ.setdefault("PYZWOASI_CACHE", tempfile.mkdtemp(prefix="pyzwoasi-tests-"))
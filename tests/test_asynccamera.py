@@ -0,0 +1,89 @@
+import asyncio, time, unittest
+
+import pyzwoasi
+from pyzwoasi import metrics
+from pyzwoasi.pyzwoasi import ASIError, ASIExposureStatus
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestAsyncZWOCamera(unittest.TestCase):
+        def setUp(self):
+            self.simulated = [SimulatedCamera(width=64, height=48, fps=200.0), SimulatedCamera(width=64, height=48, fps=200.0)]
+            pyzwoasi.setBackend(SimulatedLibrary(*self.simulated))
+            self.addCleanup(pyzwoasi.setBackend, None)
+
+        def test_importIsLazy(self):
+            self.assertIs(pyzwoasi.AsyncZWOCamera, pyzwoasi.asynccamera.AsyncZWOCamera)
+            with self.assertRaises(AttributeError):
+                pyzwoasi.AsyncCamera
+
+        def test_camerasExposeTogether(self):
+            async def run():
+                cameras = await asyncio.gather(pyzwoasi.AsyncZWOCamera.open(0), pyzwoasi.AsyncZWOCamera.open(1))
+                try:
+                    start  = time.perf_counter()
+                    images = await asyncio.gather(*(camera.ashot(exposureTime_us=200_000) for camera in cameras))
+                    return images, time.perf_counter() - start
+                finally:
+                    await asyncio.gather(*(camera.close() for camera in cameras))
+
+            images, elapsed = asyncio.run(run())
+            self.assertEqual([image.shape for image in images], [(48, 64), (48, 64)])
+            self.assertGreaterEqual(elapsed, 0.2)
+            self.assertLess(elapsed, 0.35) # Not one after the other
+
+        def test_shotSharesCameraSteps(self):
+            registry = metrics.enable()
+            self.addCleanup(metrics.disable)
+            async def run():
+                async with await pyzwoasi.AsyncZWOCamera.open(0) as camera:
+                    # One restart allowed, then the failure is raised
+                    self.simulated[0].inject(expFailures=1)
+                    image = await camera.ashot(exposureTime_us=1000, maxFailedRuns=1)
+                    self.simulated[0].inject(expFailures=2)
+                    with self.assertRaises(ASIError):
+                        await camera.ashot(exposureTime_us=1000, maxFailedRuns=1)
+                    return image, camera.camera.waitStrategy.statistics
+            image, statistics = asyncio.run(run())
+            self.assertEqual(image.shape, (48, 64))
+            self.assertEqual(statistics["exposures"], 4)
+
+            operations = {entry["operation"]: entry["duration"]["count"] for entry in registry.snapshot()["operations"]}
+            self.assertEqual(operations["exposure"], 1)
+            self.assertEqual(operations["download"], 1)
+
+        def test_cancelledShotStopsExposure(self):
+            async def run():
+                async with await pyzwoasi.AsyncZWOCamera.open(0) as camera:
+                    task = asyncio.ensure_future(camera.ashot(exposureTime_us=2_000_000))
+                    await asyncio.sleep(0.1)
+                    self.assertEqual(self.simulated[0].expStatus, ASIExposureStatus.ASI_EXP_WORKING)
+                    task.cancel()
+                    with self.assertRaises(asyncio.CancelledError):
+                        await task
+                    self.assertEqual(self.simulated[0].expStatus, ASIExposureStatus.ASI_EXP_IDLE)
+            asyncio.run(run())
+
+        def test_leavingFramesStopsStream(self):
+            async def run():
+                async with await pyzwoasi.AsyncZWOCamera.open(0) as camera:
+                    await camera.call(setattr, camera.camera, "exposure", 1000)
+                    sequences = []
+                    async for frame in camera.aframes(slots=2):
+                        self.assertTrue(self.simulated[0].capturing)
+                        # Slow consumer, the BLOCK policy keeps every frame
+                        await asyncio.sleep(0.02)
+                        sequences.append(frame.sequence)
+                        if len(sequences) == 5:
+                            break
+
+                    # The generator is closed once left, stopping the capture
+                    for _ in range(100):
+                        if not self.simulated[0].capturing:
+                            break
+                        await asyncio.sleep(0.01)
+                    self.assertFalse(self.simulated[0].capturing)
+                    return sequences
+            self.assertEqual(asyncio.run(run()), list(range(5)))
+
+if __name__ == '__main__':
+    unittest.main()
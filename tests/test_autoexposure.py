@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.autoexposure import brightness, histogram
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestAutoExposure(unittest.TestCase):
+        def setUp(self):
+            # Uniformly lit scene of 100 full scale per second
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=160, height=120, fps=500.0, isColorCam=False,
+                                                                  planet=(80, 60, 1000, 100.0))))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.exposure = 1000
+            self.camera.gain     = 0
+
+        def test_histogramBrightness(self):
+            image = np.full((30, 40), 0x8000, dtype=np.uint16)
+            image[:10] = 0
+            counts = histogram(image)
+            self.assertEqual(counts.sum(), 10 * 14)
+            self.assertEqual((counts[0], counts[128]), (4 * 14, 6 * 14))
+            self.assertAlmostEqual(brightness(counts, percentile=90), 128.5 / 256)
+            self.assertAlmostEqual(brightness(histogram(np.full((4, 8), 255, dtype=np.uint8))), 255.5 / 256)
+            with self.assertRaises(ValueError):
+                histogram(np.zeros((4, 8), dtype=np.float32))
+
+        def test_convergesWithinLimits(self):
+            with self.camera.autoExposure(target=0.45, maxExposure_us=2000) as autoExposure:
+                for _ in range(40):
+                    autoExposure.read(timeout=2)
+                    if autoExposure.converged:
+                        break
+                statistics = autoExposure.statistics
+            self.assertTrue(statistics["converged"])
+            self.assertLessEqual(statistics["convergeFrames"], 5)
+            self.assertLess(abs(statistics["brightness"] - 0.45), 0.045)
+
+            # Exposure is raised to its limit before the gain
+            self.assertEqual(self.camera.exposure, 2000)
+            self.assertEqual(self.camera.gain, statistics["gain"])
+            self.assertGreater(statistics["gain"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import tempfile, unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.calibration import CalibrationLibrary, Calibrator, cameraState
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.pyzwoasi import ASIImageType
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+def state(**changes):
+    values = {"exposure": 1000, "gain": 100, "temperature": -10.0, "binning": 1, "roi": [8, 4, 0, 0], "imageType": int(ASIImageType.ASI_IMG_RAW16)}
+    values.update(changes)
+    return values
+
+class TestCalibration(unittest.TestCase):
+        def setUp(self):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.directory = directory.name
+            self.library = CalibrationLibrary(self.directory)
+
+        def test_findMatchesSettings(self):
+            self.library.add(CalibrationLibrary.DARK, np.full((4, 8), 100), state(temperature=-5.0))
+            closest = self.library.add(CalibrationLibrary.DARK, np.full((4, 8), 110), state(temperature=-9.0))
+            self.library.add(CalibrationLibrary.DARK, np.full((4, 8), 120), state(exposure=2000))
+
+            self.assertEqual(self.library.find(CalibrationLibrary.DARK, state())["file"], closest["file"])
+            self.assertIsNone(self.library.find(CalibrationLibrary.DARK, state(gain=200)))
+            self.assertIsNone(self.library.find(CalibrationLibrary.DARK, state(roi=[8, 4, 8, 0])))
+            self.assertIsNone(self.library.find(CalibrationLibrary.DARK, state(temperature=10.0)))
+
+            # Index and masters are read back from the directory
+            reopened = CalibrationLibrary(self.directory)
+            entry = reopened.find(CalibrationLibrary.DARK, state())
+            master = reopened.load(entry)
+            self.assertIsInstance(master, np.memmap)
+            np.testing.assert_array_equal(master, 110)
+
+        def test_calibratorAppliesDarkAndFlat(self):
+            dark = np.full((4, 8), 100, dtype=np.float32)
+            flat = np.ones((4, 8), dtype=np.float32)
+            flat[:, :4] = 0.5
+            frame = np.full((4, 8), 300, dtype=np.uint16)
+
+            calibrator = Calibrator(dark, flat)
+            calibrated = calibrator(frame, ASIImageType.ASI_IMG_RAW16)
+            self.assertEqual(calibrated.dtype, np.uint16)
+            np.testing.assert_array_equal(calibrated[:, :4], 400)
+            np.testing.assert_array_equal(calibrated[:, 4:], 200)
+            self.assertIs(calibrator(frame), calibrated) # Reused buffer
+
+            clipped = Calibrator(np.full((4, 8), 500, dtype=np.float32))(frame)
+            np.testing.assert_array_equal(clipped, 0)
+            self.assertEqual(Calibrator(dark, keepType=False)(frame).dtype, np.float32)
+
+        def test_buildFromCamera(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=64, height=48, fps=500.0)))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            with ZWOCamera(0) as camera:
+                camera.setROI(64, 48, 1, ASIImageType.ASI_IMG_RAW16)
+                camera.exposure = 1000
+                entry = self.library.build(camera, CalibrationLibrary.DARK, frames=4, video=True)
+                self.assertEqual(entry["roi"], cameraState(camera)["roi"])
+
+                # The temperature is read through the camera control table
+                getCalls = camera.controlStatistics["getCalls"]
+                self.assertEqual(cameraState(camera)["temperature"], camera._lastControlValues["Temperature"] / 10)
+                self.assertEqual(camera.controlStatistics["getCalls"], getCalls + 1)
+
+                calibrator = camera.calibrator(self.library, keepType=False)
+                image = camera.shot(processor=calibrator)
+            self.assertEqual(image.shape, (48, 64))
+            self.assertLess(abs(float(np.median(image))), 2000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi import metrics
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.pyzwoasi import ASIError, ASIErrorCode, ASIImageType
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestROICache(unittest.TestCase):
+        def setUp(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=320, height=240)))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+
+            self.registry = metrics.enable()
+            self.addCleanup(metrics.disable)
+
+        def roiFormatCalls(self):
+            return sum(entry["calls"] for entry in self.registry.snapshot()["calls"] if entry["function"] == "ASIGetROIFormat")
+
+        def test_settersUpdateGeometryWithoutReads(self):
+            camera = self.camera
+            camera.setROI(160, 120, 1, ASIImageType.ASI_IMG_RAW16)
+            self.assertEqual((camera.frameShape, camera.frameDtype, camera.bufferSize), ((120, 160), np.uint16, 160 * 120 * 2))
+
+            camera.imageType = ASIImageType.ASI_IMG_RGB24
+            self.assertEqual((camera.frameShape, camera.frameDtype, camera.bufferSize), ((120, 160, 3), np.uint8, 160 * 120 * 3))
+
+            camera.softwareBinning = 2
+            self.assertEqual(camera.roi, (80, 60, 2, ASIImageType.ASI_IMG_RGB24))
+            self.assertEqual((camera.frameShape, camera.bufferSize), ((60, 80, 3), 80 * 60 * 3))
+            self.assertEqual(camera.emptyFrame().shape, (60, 80, 3))
+            self.assertEqual(self.roiFormatCalls(), 0)
+
+        def test_consistencyCheckAndRefresh(self):
+            camera = self.camera
+            pyzwoasi.setROIFormat(0, 160, 120, 1, ASIImageType.ASI_IMG_RAW8)
+            self.assertEqual(camera.roi[:2], (320, 240)) # Stale, but not checked
+
+            camera.checkConsistency = True
+            with self.assertRaises(ValueError):
+                camera.roi
+            self.assertEqual(self.roiFormatCalls(), 1)
+
+            camera.refresh()
+            self.assertEqual(camera.roi, (160, 120, 1, ASIImageType.ASI_IMG_RAW8))
+            self.assertEqual(camera.frameShape, (120, 160))
+
+class FailingLibrary(SimulatedLibrary):
+    """
+    Simulator whose control writes fail while failWrites is set.
+    """
+    failWrites = False
+
+    def ASISetControlValue(self, cameraID, controlType, value, auto):
+        if self.failWrites:
+            return ASIErrorCode.ASI_ERROR_GENERAL_ERROR
+        return super().ASISetControlValue(cameraID, controlType, value, auto)
+
+class TestControls(unittest.TestCase):
+        def setUp(self):
+            self.simulated = SimulatedCamera(width=320, height=240)
+            self.library   = FailingLibrary(self.simulated)
+            pyzwoasi.setBackend(self.library)
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.resetControlStatistics()
+
+        def test_unchangedWritesAreSkipped(self):
+            camera = self.camera
+            camera.setControls({"Gain": 100, "BandWidth": 80})
+            camera.setControls({"Gain": 100, "BandWidth": 90})
+            statistics = camera.controlStatistics
+            self.assertEqual((statistics["setCalls"], statistics["skippedWrites"]), (3, 1))
+
+            camera.setControls({"Gain": 100}, force=True)
+            self.assertEqual(camera.controlStatistics["setCalls"], 4)
+            self.assertEqual(camera.getControls(["Gain", "BandWidth"]), {"Gain": 100, "BandWidth": 90})
+            self.assertEqual(camera.controlStatistics["getCalls"], 2)
+
+        def test_failedWriteForgetsValues(self):
+            camera = self.camera
+            camera.setControls({"Gain": 100, "BandWidth": 80})
+            self.library.failWrites = True
+            with self.assertRaises(ASIError):
+                camera.setControls({"Gain": 200, "BandWidth": 90})
+            self.assertNotIn("Gain", camera._lastControlValues)
+            self.assertNotIn("BandWidth", camera._lastControlValues)
+
+            # Values are unknown, the next write is not skipped
+            self.library.failWrites = False
+            camera.setControls({"Gain": 100})
+            self.assertEqual(camera.controlStatistics["skippedWrites"], 0)
+
+        def test_readOnlyControlIsRejected(self):
+            self.assertFalse(self.camera._controls["Temperature"].isWritable)
+            with self.assertRaises(ValueError) as context:
+                self.camera.setControls({"Gain": 100, "Temperature": 250})
+            self.assertIn("not writable", str(context.exception))
+            self.assertEqual(self.camera.controlStatistics["setCalls"], 0)
+
+        def test_snapshotInPlace(self):
+            camera = self.camera
+            camera.setControls({"Gain": 150})
+            table = np.zeros(3, dtype=camera.snapshotDtype)
+            record = table[1]
+            self.assertIs(camera.snapshot(out=record), record)
+            self.assertEqual(table[1]["Gain"], 150)
+            self.assertEqual(table[1]["Exposure"], camera.exposure)
+            self.assertGreater(table[1]["timestamp"], 0)
+            self.assertEqual(table[0]["timestamp"], 0)
+            self.assertEqual(camera.snapshot()["Gain"], 150)
+
+        def test_unknownControl(self):
+            with self.assertRaises(ValueError):
+                self.camera.getControls(["Humidity"])
+            with self.assertRaises(ValueError):
+                self.camera.setControls({"Humidity": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading, time, unittest
+
+import pyzwoasi
+from pyzwoasi.cameraarray import CameraArray
+from pyzwoasi.pyzwoasi import ASICameraMode, ASIError, ASIErrorCode
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class RecordingLibrary(SimulatedLibrary):
+    """
+    Simulator with a slow initCamera, recording the threads opening the
+    cameras and the camera modes set. The video capture of the cameras in
+    failVideoCapture cannot be started.
+    """
+    def __init__(self, *cameras):
+        super().__init__(*cameras)
+        self.initThreads      = set()
+        self.modes            = []
+        self.failVideoCapture = set()
+
+    def ASIInitCamera(self, cameraID):
+        self.initThreads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        return super().ASIInitCamera(cameraID)
+
+    def ASISetCameraMode(self, cameraID, mode):
+        self.modes.append((cameraID, mode))
+        return super().ASISetCameraMode(cameraID, mode)
+
+    def ASIStartVideoCapture(self, cameraID):
+        if cameraID in self.failVideoCapture:
+            return ASIErrorCode.ASI_ERROR_CAMERA_REMOVED
+        return super().ASIStartVideoCapture(cameraID)
+
+class TestCameraArray(unittest.TestCase):
+        def setUp(self):
+            self.simulated = [SimulatedCamera(width=64, height=48, fps=500.0, isTriggerCam=(index == 2)) for index in range(3)]
+            self.library   = RecordingLibrary(*self.simulated)
+            pyzwoasi.setBackend(self.library)
+            self.addCleanup(pyzwoasi.setBackend, None)
+
+        def test_parallelOpenAndShot(self):
+            start = time.perf_counter()
+            with CameraArray() as cameras:
+                elapsed = time.perf_counter() - start
+                self.assertEqual(len(cameras), 3)
+                self.assertEqual(len(self.library.initThreads), 3)
+                self.assertLess(elapsed, 0.25) # Not 3 x 100 ms
+
+                images = cameras.shot(exposureTime_us=10_000)
+                self.assertEqual([image.shape for image in images], [(48, 64)] * 3)
+
+                capture = cameras.lastCapture
+                self.assertEqual(len(capture["startOffsets"]), 3)
+                self.assertEqual(min(capture["startOffsets"]), 0.0)
+                self.assertAlmostEqual(capture["skew"], max(capture["startOffsets"]))
+                self.assertLess(capture["skew"], 0.01)
+                self.assertTrue(all(duration >= 0.01 for duration in capture["durations"]))
+                self.assertEqual(capture["bytes"], 3 * 48 * 64)
+                self.assertEqual(cameras.statistics["captures"], 1)
+
+        def test_bandwidthBudget(self):
+            with CameraArray([0, 1], bandwidthBudget=150) as cameras:
+                self.assertEqual(cameras.statistics["bandwidth"], {0: 75, 1: 75})
+                self.assertEqual([camera.bandwidth for camera in cameras], [75, 75])
+
+                # Shares under the BandWidth minimum of 40 are raised to it
+                self.assertEqual(cameras.setBandwidthBudget(60), {0: 40, 1: 40})
+
+        def test_softTriggerRestoresMode(self):
+            self.simulated[2].cameraMode = ASICameraMode.ASI_MODE_TRIG_RISE_EDGE
+            with CameraArray(useSoftTrigger=True) as cameras:
+                self.assertEqual(self.simulated[2].cameraMode, ASICameraMode.ASI_MODE_TRIG_SOFT_EDGE)
+                images = cameras.shot(exposureTime_us=5_000)
+                self.assertEqual([image.shape for image in images], [(48, 64)] * 3)
+
+            # Only the trigger camera is switched, and put back before closing
+            self.assertEqual(self.library.modes, [(2, ASICameraMode.ASI_MODE_TRIG_SOFT_EDGE), (2, ASICameraMode.ASI_MODE_TRIG_RISE_EDGE)])
+
+        def test_softTriggerFailureReleasesCameras(self):
+            with CameraArray(useSoftTrigger=True) as cameras:
+                # The other cameras are waiting for the trigger camera, which
+                # fails before reaching them
+                self.library.failVideoCapture.add(2)
+                with self.assertRaises(ASIError) as context:
+                    cameras.shot(exposureTime_us=5_000)
+                self.assertEqual(context.exception.args[1], ASIErrorCode.ASI_ERROR_CAMERA_REMOVED)
+
+                self.library.failVideoCapture.clear()
+                images = cameras.shot(exposureTime_us=5_000)
+                self.assertEqual([image.shape for image in images], [(48, 64)] * 3)
+
+if __name__ == '__main__':
+    unittest.main()
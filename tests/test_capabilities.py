@@ -0,0 +1,65 @@
+import tempfile, unittest
+
+import pyzwoasi
+from pyzwoasi import metrics
+from pyzwoasi.cache import JSONCache
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.capabilities import CapabilityCache
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestCapabilityCache(unittest.TestCase):
+        def setUp(self):
+            self.simulated = SimulatedCamera(width=320, height=240)
+            pyzwoasi.setBackend(SimulatedLibrary(self.simulated))
+            self.addCleanup(pyzwoasi.setBackend, None)
+
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.cache = CapabilityCache(JSONCache("capabilities.json", directory.name))
+
+            self.registry = metrics.enable()
+            self.addCleanup(metrics.disable)
+
+        def controlCapsCalls(self):
+            return sum(entry["calls"] for entry in self.registry.snapshot()["calls"] if entry["function"] == "ASIGetControlCaps")
+
+        def test_knownCameraSkipsEnumeration(self):
+            with ZWOCamera(0, capabilityCache=self.cache) as camera:
+                self.assertFalse(camera._capabilitiesCached)
+                controls = camera.controls
+            self.assertEqual(self.controlCapsCalls(), len(self.simulated.controls))
+
+            self.registry.reset()
+            with ZWOCamera(0, capabilityCache=self.cache) as camera:
+                self.assertTrue(camera._capabilitiesCached)
+                self.assertEqual(camera.controls, controls)
+                self.assertIn("Gain", camera.getControls(["Gain"]))
+            self.assertEqual(self.controlCapsCalls(), 0)
+
+            self.registry.reset()
+            with ZWOCamera(0, useCache=False) as camera:
+                self.assertFalse(camera._capabilitiesCached)
+            self.assertEqual(self.controlCapsCalls(), len(self.simulated.controls))
+
+        def test_staleEntryIsValidatedLazily(self):
+            with ZWOCamera(0, capabilityCache=self.cache) as camera:
+                key = camera._capabilityKey
+            self.cache.set(key, self.cache.get(key)[:1]) # As if controls were added since
+
+            with ZWOCamera(0, capabilityCache=self.cache) as camera:
+                self.assertNotIn("Exposure", camera.controls)
+                self.assertIn("Exposure", camera.getControls(["Exposure"]))
+                self.assertFalse(camera._capabilitiesCached)
+            self.assertEqual(len(self.cache.get(key)), len(self.simulated.controls))
+
+        def test_keyDependsOnSerialAndSDK(self):
+            pyzwoasi.openCamera(0)
+            try:
+                key = CapabilityCache.key(0, "ZWO ASI Simulator")
+            finally:
+                pyzwoasi.closeCamera(0)
+            self.assertIn(self.simulated.serialNumber.hex().upper(), key)
+            self.assertIn(pyzwoasi.getSDKVersion(), key)
+
+if __name__ == '__main__':
+    unittest.main()
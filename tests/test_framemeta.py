@@ -0,0 +1,83 @@
+import threading, unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.framemeta import FrameMetaTable, frameMetaDtype
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestFrameMeta(unittest.TestCase):
+        def setUp(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=64, height=48, fps=200.0, isColorCam=False)))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.exposure = 1000
+            self.camera.gain     = 50
+
+        def test_tableGrowsColumnWise(self):
+            self.assertEqual(frameMetaDtype.itemsize, 42)
+            table = FrameMetaTable(capacity=2)
+            for sequence in range(5):
+                table.append(self.camera.frameMeta(sequence, 100.0 + sequence))
+            self.assertEqual((len(table), table.capacity), (5, 8))
+            self.assertEqual(table.nbytes, 8 * frameMetaDtype.itemsize)
+
+            meta = table[-1]
+            self.assertEqual((meta.sequence, meta.exposure, meta.gain, meta.width, meta.height, meta.binning), (4, 1000, 50, 64, 48, 1))
+            self.assertTrue(np.isnan(meta.temperature))
+            columns = table.columns()
+            np.testing.assert_array_equal(columns["hostTime"], 100.0 + np.arange(5))
+            self.assertEqual(table.records.dtype, frameMetaDtype)
+
+        def test_filledFromCachedState(self):
+            self.camera.getControls(["Temperature"])
+            self.camera.resetControlStatistics()
+            table = FrameMetaTable()
+            with self.camera.stream(meta=table) as stream:
+                for _ in range(5):
+                    self.assertIsNotNone(stream.read(timeout=1))
+            frames = list(self.camera.runSequence([(2000, 10), (3000, 20)], meta=table))
+
+            # No control is read per frame
+            self.assertEqual(self.camera.controlStatistics["getCalls"], 0)
+            columns = table.columns()
+            self.assertGreaterEqual(len(table), 7)
+            np.testing.assert_array_equal(columns["sequence"][-2:], [frame.index for frame in frames])
+            np.testing.assert_array_equal(columns["exposure"][-2:], [2000, 3000])
+            np.testing.assert_array_equal(columns["gain"][-2:], [10, 20])
+            np.testing.assert_allclose(columns["temperature"], 25.0)
+
+        def test_streamReadsControlsOnConsumerSide(self):
+            threads = []
+            getControls = self.camera.getControls
+            def recordingGetControls(controlNames=None):
+                threads.append(threading.current_thread())
+                return getControls(controlNames)
+            self.camera.getControls = recordingGetControls
+
+            table  = FrameMetaTable()
+            stream = self.camera.stream(slots=2, policy="block", meta=table)
+            stream._temperatureInterval = 0.0 # Every read polls the temperature
+            with stream:
+                for _ in range(3):
+                    self.assertIsNotNone(stream.read(timeout=1))
+                self.camera.exposure = 2000
+                for _ in range(6):
+                    self.assertIsNotNone(stream.read(timeout=1))
+
+            self.assertGreater(len(threads), 0)
+            self.assertTrue(all(thread is threading.current_thread() for thread in threads))
+
+            # Frames requested before the change keep the previous exposure
+            columns   = table.columns()
+            exposures = columns["exposure"].tolist()
+            self.assertEqual(exposures[0], 1000)
+            self.assertEqual(exposures[-1], 2000)
+            self.assertEqual(exposures, sorted(exposures))
+            self.assertEqual(exposures.count(2000), len(exposures) - exposures.index(2000))
+            self.assertFalse(np.isnan(columns["temperature"][-1]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import tempfile, unittest
+
+import pyzwoasi
+from pyzwoasi.cache import JSONCache
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.governor import FrameRateGovernor, measureFrameRate
+from pyzwoasi.pyzwoasi import ASIImageType
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestGovernor(unittest.TestCase):
+        def setUp(self):
+            # 640x480 RAW16 frames over a 40 MB/s link: about 32 fps at the
+            # default BandWidth of 50%, 65 fps at full BandWidth
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=640, height=480, fps=400.0, isColorCam=False, usbRate=40e6)))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.setROI(640, 480, 1, ASIImageType.ASI_IMG_RAW16)
+            self.camera.exposure = 100
+
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.cache = JSONCache("framerate.json", directory.name)
+
+        def test_measureFrameRate(self):
+            measure = measureFrameRate(self.camera, frames=10)
+            self.assertGreater(measure["fps"], 25)
+            self.assertLess(measure["fps"], 45)
+            self.assertEqual(measure["timeouts"], 0)
+
+        def test_measureFrameRateNeedsFrames(self):
+            with self.assertRaises(ValueError):
+                measureFrameRate(self.camera, frames=0)
+
+        def test_optimizeReachesTargetAndCaches(self):
+            governor = FrameRateGovernor(self.camera, self.cache)
+            result = governor.optimize(200, {"frames": 10})
+            self.assertTrue(result["met"])
+            self.assertFalse(result["cached"])
+            self.assertGreaterEqual(result["fps"], 200)
+            self.assertGreater(len(result["trials"]), 1)
+
+            # Least loss first: full bandwidth before smaller ROIs
+            self.assertEqual(result["trials"][1]["BandWidth"], 100)
+            self.assertEqual(self.camera.roi[:2], (result["settings"]["width"], result["settings"]["height"]))
+
+            self.camera.setROI(640, 480, 1, ASIImageType.ASI_IMG_RAW16)
+            cached = governor.optimize(200, {"frames": 10})
+            self.assertTrue(cached["cached"])
+            self.assertEqual(cached["settings"], result["settings"])
+            self.assertEqual(self.camera.roi[:2], (result["settings"]["width"], result["settings"]["height"]))
+
+        def test_unreachableTargetKeepsFastest(self):
+            result = FrameRateGovernor(self.camera, cache=False).optimize(100000, {"frames": 5, "imageTypes": [ASIImageType.ASI_IMG_RAW16], "minWidth": 320, "minHeight": 240})
+            self.assertFalse(result["met"])
+            self.assertEqual(result["fps"], max(trial["fps"] for trial in result["trials"]))
+
+if __name__ == '__main__':
+    unittest.main()
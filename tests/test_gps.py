@@ -0,0 +1,101 @@
+import os, tempfile, time, unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.gps import GPSTable, gpsDtype, gpsTimes
+from pyzwoasi.pyzwoasi import ASIError, ASIErrorCode
+from pyzwoasi.recording import _toTicks
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestGPS(unittest.TestCase):
+        def setUp(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=64, height=48, fps=200.0, gps=(45.5, -73.25, 120.0, 9),
+                                                                  gpsOffset=0.5, gpsDrift=1e-3)))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.exposure = 1000
+
+        def test_gpsTimes(self):
+            records = np.zeros(2, dtype=gpsDtype)
+            dateTime = records["DateTime"]
+            for field, value in zip(("Year", "Month", "Day", "Hour", "Minute", "Second", "Msecond", "Usecond"), (2024, 3, 15, 12, 30, 5, 250, 5)):
+                dateTime[field][0] = value
+            times = gpsTimes(records)
+            self.assertAlmostEqual(times[0], 1710505805.2500005, places=6)
+            self.assertTrue(np.isnan(times[1]))
+
+        def test_streamFillsTable(self):
+            table = GPSTable(8)
+            with self.camera.stream(gps=table) as stream:
+                for _ in range(12):
+                    self.assertIsNotNone(stream.read(timeout=1))
+                sequence = stream.read(timeout=1).sequence
+            self.assertEqual(len(table), 8)
+            self.assertGreaterEqual(table.overwritten, 5)
+
+            columns = table.columns()
+            self.assertTrue(np.all(np.diff(columns["sequence"]) == 1))
+            np.testing.assert_array_equal(columns["latitude"], 45.5)
+            np.testing.assert_array_equal(columns["altitude"], 120.0)
+            np.testing.assert_array_equal(columns["satellites"], 9)
+            self.assertLess(abs(time.time() - columns["gpsTime"][-1] - 0.5), 0.5)
+            self.assertEqual(table.find(sequence)["Latitude"], 45.5)
+            self.assertIsNone(table.find(-5))
+
+            drift = table.drift()
+            self.assertEqual(drift["frames"], 8)
+            self.assertGreater(drift["min"], 0.5)
+            self.assertLess(drift["max"], 0.6)
+
+        def test_recordingUsesGPSTime(self):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            path  = os.path.join(directory.name, "capture.ser")
+            table = GPSTable(64)
+            recorder = self.camera.record(path, frames=10, gps=table)
+            self.assertEqual(recorder.statistics["gpsFrames"], 10)
+
+            with open(path, "rb") as file:
+                ticks = np.frombuffer(file.read()[-10 * 8:], dtype="<i8")
+            gpsTime = table.columns()["gpsTime"][:10]
+            np.testing.assert_array_equal(ticks, _toTicks(gpsTime))
+            self.assertAlmostEqual(table.gpsTime(3), gpsTime[3])
+            self.assertTrue(np.isnan(table.gpsTime(1000)))
+
+            # Frames without GPS time keep their host time, 0.5 s ahead here
+            class NoFixTable(GPSTable):
+                def gpsTime(self, sequence):
+                    return float("nan") if sequence < 4 else super().gpsTime(sequence)
+            table = NoFixTable(64)
+            recorder = self.camera.record(path, frames=10, gps=table)
+            self.assertEqual(recorder.statistics["gpsFrames"], 6)
+            with open(path, "rb") as file:
+                ticks = np.frombuffer(file.read()[-10 * 8:], dtype="<i8")
+            offsets = (ticks - _toTicks(table.columns()["gpsTime"][:10])) / 1e7
+            self.assertTrue(np.all(offsets[:4] > 0.4))
+            np.testing.assert_array_equal(offsets[4:], 0)
+
+        def test_snapshotAndLines(self):
+            pyzwoasi.startExposure(0, False)
+            while pyzwoasi.getExpStatus(0) == pyzwoasi.ASIExposureStatus.ASI_EXP_WORKING:
+                time.sleep(0.001)
+            gpsData = pyzwoasi.getDataAfterExpGPSInto(0, self.camera.emptyFrame())
+            self.assertEqual(gpsData.SatelliteNum, 9)
+            startLine, endLine = pyzwoasi.gpsGetData(0)
+            self.assertEqual((startLine.DateTime.Second, startLine.DateTime.Msecond, startLine.DateTime.Usecond),
+                             (gpsData.DateTime.Second, gpsData.DateTime.Msecond, gpsData.DateTime.Usecond))
+            self.assertEqual(endLine.Altitude, 1200)
+
+        def test_notSupported(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=64, height=48)))
+            pyzwoasi.openCamera(0)
+            self.addCleanup(pyzwoasi.closeCamera, 0)
+            with self.assertRaises(ASIError) as context:
+                pyzwoasi.gpsGetData(0)
+            self.assertEqual(context.exception.args[1], ASIErrorCode.ASI_ERROR_GPS_NOT_SUPPORTED)
+
+if __name__ == '__main__':
+    unittest.main()
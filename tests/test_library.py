@@ -0,0 +1,51 @@
+import ctypes, os, unittest
+from unittest import mock
+
+from pyzwoasi import pyzwoasi
+
+class FakeDLL:
+    def __init__(self, path):
+        self.path = path
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        function = ctypes.CFUNCTYPE(ctypes.c_int)(lambda: 3)
+        setattr(self, name, function)
+        return function
+
+class TestLazyLibrary(unittest.TestCase):
+        def setUp(self):
+            self.library = pyzwoasi._Library()
+            self.loadedPaths = []
+            def loadLibrary(path):
+                self.loadedPaths.append(path)
+                return FakeDLL(path)
+            patcher = mock.patch.object(ctypes.cdll, "LoadLibrary", loadLibrary)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        def test_loadedOnFirstUse(self):
+            self.assertFalse(self.library.loaded)
+            with mock.patch.dict(os.environ, {pyzwoasi.libraryPathVariable: "/opt/sdk/libASICamera2.so"}):
+                with mock.patch.object(pyzwoasi, "lib", self.library):
+                    self.assertEqual(pyzwoasi.getNumOfConnectedCameras(), 3)
+            self.assertEqual(self.loadedPaths, ["/opt/sdk/libASICamera2.so"])
+
+        def test_prototypesAreSetOnFirstAccess(self):
+            function = self.library.ASIGetExpStatus
+            self.assertEqual(function.argtypes, [ctypes.c_int, ctypes.POINTER(ctypes.c_int)])
+            self.assertIs(self.library.ASIGetExpStatus, function)
+            self.assertEqual(len(self.loadedPaths), 1)
+
+        def test_explicitPathReplacesLibrary(self):
+            self.library.load("first.so")
+            first = self.library.ASIOpenCamera
+            self.library.load("second.so")
+            self.assertEqual(self.library.path, "second.so")
+            self.assertIsNot(self.library.ASIOpenCamera, first)
+            self.library.load()
+            self.assertEqual(self.loadedPaths, ["first.so", "second.so"])
+
+if __name__ == '__main__':
+    unittest.main()
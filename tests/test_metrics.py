@@ -0,0 +1,77 @@
+import unittest
+
+import pyzwoasi
+from pyzwoasi import metrics
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.metrics import Histogram
+from pyzwoasi.pyzwoasi import ASIError, ASIImageType
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestMetrics(unittest.TestCase):
+        def setUp(self):
+            self.simulated = SimulatedCamera(width=320, height=240, fps=200.0)
+            pyzwoasi.setBackend(SimulatedLibrary(self.simulated))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.registry = metrics.enable()
+            self.addCleanup(metrics.disable)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+
+        def calls(self, function):
+            return [entry for entry in self.registry.snapshot()["calls"] if entry["function"] == function]
+
+        def test_disabledCallsAreNotWrapped(self):
+            metrics.disable()
+            self.assertNotIn("instrumented", pyzwoasi.pyzwoasi.lib.ASIGetExpStatus.__qualname__)
+            before = self.registry.snapshot()
+            pyzwoasi.getExpStatus(0)
+            self.assertEqual(self.registry.snapshot(), before)
+
+        def test_shotIsRecorded(self):
+            self.camera.setROI(320, 240, 1, ASIImageType.ASI_IMG_RAW16)
+            self.camera.shot(exposureTime_us=1000)
+
+            download, = self.calls("ASIGetDataAfterExp")
+            self.assertEqual((download["camera"], download["calls"]), (0, 1))
+            self.assertEqual(download["bytes"], 320 * 240 * 2)
+            self.assertGreater(download["latency"]["sum"], 0)
+
+            operations = {entry["operation"] for entry in self.registry.snapshot()["operations"]}
+            self.assertTrue({"shot", "exposure", "download"} <= operations)
+
+        def test_errorsAndDroppedFrames(self):
+            self.simulated.inject(timeouts=1)
+            pyzwoasi.startVideoCapture(0)
+            try:
+                with self.assertRaises(ASIError):
+                    pyzwoasi.getVideoData(0, self.camera.bufferSize, 100)
+            finally:
+                pyzwoasi.stopVideoCapture(0)
+            video, = self.calls("ASIGetVideoData")
+            self.assertEqual(video["errors"], {"ASI_ERROR_TIMEOUT": 1})
+            self.assertEqual(video["bytes"], 0)
+
+            self.registry.observeDroppedFrames(0, 3)
+            self.registry.observeDroppedFrames(0, 5)
+            self.registry.observeDroppedFrames(0, 1) # Counter reset by the SDK
+            self.assertEqual(self.registry.snapshot()["droppedFrames"], {0: 6})
+
+        def test_prometheusText(self):
+            self.camera.shot(exposureTime_us=1000)
+            text = self.registry.toPrometheus()
+            self.assertIn('pyzwoasi_sdk_calls_total{function="ASIStartExposure",camera="0"} 1', text)
+            self.assertIn('pyzwoasi_sdk_call_duration_seconds_bucket{function="ASIStartExposure",camera="0",le="+Inf"} 1', text)
+            self.assertIn('pyzwoasi_operation_duration_seconds_count{operation="shot",camera="0"} 1', text)
+            self.assertIn("# TYPE pyzwoasi_sdk_call_duration_seconds histogram", text)
+
+        def test_histogramQuantile(self):
+            histogram = Histogram((1.0, 2.0, 4.0))
+            for value in (0.5, 1.5, 1.5, 3.0, 8.0):
+                histogram.observe(value)
+            self.assertEqual(histogram.counts, [1, 2, 1, 1])
+            self.assertEqual(histogram.quantile(0.5), 2.0)
+            self.assertEqual(histogram.quantile(1.0), float("inf"))
+            self.assertIsNone(Histogram().quantile(0.5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+
+from pyzwoasi.pyzwoasi import ASIBayerPattern, ASIImageType
+from pyzwoasi.processing import BitDepthConverter, ColorProcessor, Debayer, _bayerOffsets
+
+def mosaic(bayerPattern, red, green, blue, shape=(8, 12), dtype=np.uint8):
+    (redRow, redColumn), (blueRow, blueColumn) = _bayerOffsets[bayerPattern]
+    raw = np.full(shape, green, dtype=dtype)
+    raw[redRow ::2, redColumn ::2] = red
+    raw[blueRow::2, blueColumn::2] = blue
+    return raw
+
+class TestDebayer(unittest.TestCase):
+        def test_uniformColorIsRecovered(self):
+            for bayerPattern in ASIBayerPattern:
+                for dtype in (np.uint8, np.uint16):
+                    for mode in (Debayer.BILINEAR, Debayer.SUPERPIXEL):
+                        raw = mosaic(bayerPattern, 100, 150, 200, dtype=dtype)
+                        img = Debayer(bayerPattern, mode)(raw)
+                        self.assertEqual(img.dtype, dtype)
+                        self.assertEqual(img.shape, Debayer(bayerPattern, mode).outputShape(raw.shape))
+                        np.testing.assert_array_equal(img[..., 0], 100)
+                        np.testing.assert_array_equal(img[..., 1], 150)
+                        np.testing.assert_array_equal(img[..., 2], 200)
+
+        def test_bilinearIsExactOnGradients(self):
+            rows, columns = np.mgrid[0:16, 0:16]
+            scene = (4 * columns + 2 * rows).astype(np.uint16)
+            img = Debayer(ASIBayerPattern.ASI_BAYER_GB, Debayer.BILINEAR)(scene)
+            for channel in range(3):
+                np.testing.assert_array_equal(img[2:-2, 2:-2, channel], scene[2:-2, 2:-2])
+
+        def test_buffersAreReused(self):
+            debayer = Debayer(ASIBayerPattern.ASI_BAYER_RG, Debayer.BILINEAR, order="BGR")
+            raw = mosaic(ASIBayerPattern.ASI_BAYER_RG, 10, 20, 30)
+            first  = debayer(raw)
+            second = debayer(raw)
+            self.assertIs(first, second)
+            np.testing.assert_array_equal(first[..., 0], 30)
+
+            out = np.empty_like(first)
+            self.assertIs(debayer(raw, out), out)
+
+        def test_invalidFrames(self):
+            with self.assertRaises(ValueError):
+                Debayer(ASIBayerPattern.ASI_BAYER_RG)(np.zeros((3, 4), dtype=np.uint8))
+            with self.assertRaises(ValueError):
+                Debayer(ASIBayerPattern.ASI_BAYER_RG, mode="nearest")
+
+class TestColorProcessor(unittest.TestCase):
+        def test_everyImageType(self):
+            processor = ColorProcessor(True, ASIBayerPattern.ASI_BAYER_RG)
+            raw8 = mosaic(ASIBayerPattern.ASI_BAYER_RG, 1, 2, 3)
+            self.assertEqual(processor(raw8, ASIImageType.ASI_IMG_RAW8).shape, (8, 12, 3))
+            self.assertEqual(processor(raw8.astype(np.uint16), ASIImageType.ASI_IMG_RAW16).dtype, np.uint16)
+
+            y8 = np.zeros((8, 12), dtype=np.uint8)
+            self.assertIs(processor(y8, ASIImageType.ASI_IMG_Y8), y8)
+
+            bgr = np.zeros((8, 12, 3), dtype=np.uint8)
+            bgr[..., 0] = 7
+            rgb = processor(bgr, ASIImageType.ASI_IMG_RGB24)
+            np.testing.assert_array_equal(rgb[..., 2], 7)
+
+        def test_monoCameraIsUntouched(self):
+            processor = ColorProcessor(False, ASIBayerPattern.ASI_BAYER_RG)
+            raw = np.zeros((8, 12), dtype=np.uint16)
+            self.assertIs(processor(raw, ASIImageType.ASI_IMG_RAW16), raw)
+
+class TestBitDepthConverter(unittest.TestCase):
+        def test_nativeAndPreview(self):
+            # 12 bits values as aligned by the SDK
+            values = np.array([[0, 1, 2048, 4095]], dtype=np.uint16)
+            raw    = values << 4
+
+            native = BitDepthConverter(12, BitDepthConverter.NATIVE, inPlace=False)
+            first  = native(raw, ASIImageType.ASI_IMG_RAW16)
+            np.testing.assert_array_equal(first, values)
+            self.assertIs(native(raw, ASIImageType.ASI_IMG_RAW16), first)
+            inPlace = raw.copy()
+            self.assertIs(BitDepthConverter(12, BitDepthConverter.NATIVE)(inPlace, ASIImageType.ASI_IMG_RAW16), inPlace)
+            np.testing.assert_array_equal(inPlace, values)
+
+            preview = BitDepthConverter(12)(raw, ASIImageType.ASI_IMG_RAW16)
+            self.assertEqual(preview.dtype, np.uint8)
+            np.testing.assert_array_equal(preview, [[0, 0, 128, 255]])
+            stretched = BitDepthConverter(12, black=2048, white=3072)(raw, ASIImageType.ASI_IMG_RAW16)
+            np.testing.assert_array_equal(stretched, [[0, 0, 0, 255]])
+
+            raw8 = np.zeros((2, 8), dtype=np.uint8)
+            self.assertIs(BitDepthConverter(12)(raw8, ASIImageType.ASI_IMG_RAW8), raw8)
+            self.assertIs(BitDepthConverter(12, BitDepthConverter.KEEP)(raw, ASIImageType.ASI_IMG_RAW16), raw)
+            with self.assertRaises(ValueError):
+                BitDepthConverter(12, black=4095, white=100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
 from multiprocessing import Value
 import ctypes, os, tempfile, unittest
 
+import numpy as np
+
 from pyzwoasi.pyzwoasi import CameraInfo, ControlCaps, ID
-from pyzwoasi.pyzwoasi import cameraCheck, closeCamera, disableDarkSubtract, enableDarkSubtract, getCameraMode, getCameraProperty, getCameraPropertyByID, getControlCaps, getControlValue, getDroppedFrames, getID, getNumOfConnectedCameras, getNumOfControls, getProductIDs, getROIFormat, getSDKVersion, getSerialNumber, getStartPos, getVideoData, initCamera, openCamera, pulseGuideOn, pulseGuideOff, sendSoftTrigger, setCameraMode, setControlValue, setID, setROIFormat, setStartPos, startExposure, startVideoCapture, stopExposure, stopVideoCapture
+from pyzwoasi.pyzwoasi import cameraCheck, closeCamera, disableDarkSubtract, enableDarkSubtract, getCameraMode, getCameraProperty, getCameraPropertyByID, getControlCaps, getControlValue, getDroppedFrames, getID, getNumOfConnectedCameras, getNumOfControls, getProductIDs, getROIFormat, getSDKVersion, getSerialNumber, getStartPos, getVideoData, getVideoDataInto, initCamera, openCamera, pulseGuideOn, pulseGuideOff, sendSoftTrigger, setCameraMode, setControlValue, setID, setROIFormat, setStartPos, startExposure, startVideoCapture, stopExposure, stopVideoCapture
 
 class TestASICamera2(unittest.TestCase):
         def test_getNumOfConnectedCameras(self):
@@ -433,6 +435,44 @@ class TestASICamera2(unittest.TestCase):
                     stopVideoCapture(cameraInfo.CameraID)
                     closeCamera(cameraInfo.CameraID)
 
+        def test_getVideoDataInto(self):
+            numCameras = getNumOfConnectedCameras()
+            for i in range(numCameras):
+                cameraInfo = getCameraProperty(i)
+                try:
+                    openCamera(cameraInfo.CameraID)
+                    initCamera(cameraInfo.CameraID)
+                    startVideoCapture(cameraInfo.CameraID)
+
+                    width, height, binning, imgType = getROIFormat(cameraInfo.CameraID)
+                    buffer = np.zeros((height, width, 3), dtype=np.uint8) # Assuming RGB24 format for testing
+
+                    # Read-only or non contiguous buffers must be rejected before reaching the SDK
+                    with self.assertRaises(ValueError):
+                        getVideoDataInto(cameraInfo.CameraID, bytes(buffer.nbytes), 1)
+                    with self.assertRaises(ValueError):
+                        getVideoDataInto(cameraInfo.CameraID, buffer[:, ::2], 1)
+
+                    maxAttempts = 1000 # Avoiding endless loop
+                    for attempt in range(maxAttempts):
+                        try:
+                            # Multiple attempts are needed to get the video data
+                            result = getVideoDataInto(cameraInfo.CameraID, buffer, 1)
+                            self.assertIs(result, buffer)
+                            break # Exiting the loop if successful
+                        except ValueError as e:
+                            if attempt >= maxAttempts:
+                                self.fail(f"getVideoDataInto raised error after {maxAttempts} attempts: {e}")
+                            else:
+                                # Retrying
+                                continue
+
+                except ValueError as e:
+                    self.fail(f"getVideoDataInto raised error unexpectedly: {e}")
+                finally:
+                    stopVideoCapture(cameraInfo.CameraID)
+                    closeCamera(cameraInfo.CameraID)
+
         def test_startStopExposure(self):
             numCameras = getNumOfConnectedCameras()
             for i in range(numCameras):
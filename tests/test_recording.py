@@ -0,0 +1,120 @@
+import os, struct, tempfile, time, unittest
+from unittest import mock
+
+import numpy as np
+
+from pyzwoasi import pyzwoasi
+from pyzwoasi.pyzwoasi import ASIBayerPattern, ASIImageType
+from pyzwoasi.recording import FITSWriter, Recorder, SERWriter, _TimestampLog, _toTicks
+
+from .test_stream import FakeCamera, FakeLibrary
+
+class RecordingCamera(FakeCamera):
+    frameShape    = (4, 8)
+    _isColorCam   = True
+    _bayerPattern = ASIBayerPattern.ASI_BAYER_GR
+
+class TestWriters(unittest.TestCase):
+        def setUp(self):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.directory = directory.name
+
+        def test_serLayout(self):
+            path   = os.path.join(self.directory, "capture.ser")
+            frames = [np.full((6, 10), 1000 * i, dtype=np.uint16) for i in range(5)]
+            writer = SERWriter(path, (6, 10), ASIImageType.ASI_IMG_RAW16, True, ASIBayerPattern.ASI_BAYER_BG, chunkFrames=2)
+            for i, frame in enumerate(frames):
+                writer.write(frame, 1700000000.0 + i)
+            writer.close()
+
+            with open(path, "rb") as file:
+                data = file.read()
+            fileID, _, colorID, _, width, height, depth, numOfFrames = struct.unpack_from("<14s7i", data)
+            self.assertEqual((fileID, colorID, width, height, depth, numOfFrames), (b"LUCAM-RECORDER", 11, 10, 6, 16, 5))
+            self.assertEqual(len(data), 178 + 5 * 6 * 10 * 2 + 5 * 8)
+
+            cube = np.frombuffer(data, dtype="<u2", count=5 * 60, offset=178).reshape(5, 6, 10)
+            np.testing.assert_array_equal(cube, np.stack(frames))
+            ticks = np.frombuffer(data, dtype="<i8", offset=178 + cube.nbytes)
+            self.assertEqual(ticks[1] - ticks[0], 10_000_000)
+
+        def test_timestampsAreSpilled(self):
+            log = _TimestampLog(chunkSize=4)
+            timestamps = 1700000000.0 + np.arange(10) / 8
+            for timestamp in timestamps:
+                log.append(timestamp)
+            self.assertEqual((len(log), log.first, log._chunk.shape), (10, timestamps[0], (4,)))
+            np.testing.assert_array_equal(np.concatenate(list(log.chunks())), timestamps)
+            np.testing.assert_array_equal(np.diff(_toTicks(timestamps)), 1_250_000)
+            log.close()
+
+        def test_fitsLayout(self):
+            path   = os.path.join(self.directory, "capture.fits")
+            frame  = np.zeros((4, 6, 3), dtype=np.uint8)
+            frame[..., 0] = 30 # Blue, as given by the camera
+            writer = FITSWriter(path, (4, 6), ASIImageType.ASI_IMG_RGB24)
+            for i in range(3):
+                writer.write(frame, 1700000000.0 + i)
+            writer.close()
+
+            with open(path, "rb") as file:
+                data = file.read()
+            self.assertEqual(len(data) % 2880, 0)
+            header = data[:2880].decode("ascii")
+            self.assertTrue(header.startswith("SIMPLE  ="))
+            self.assertIn("NAXIS4  =                    3", header)
+
+            cube = np.frombuffer(data, dtype=np.uint8, count=3 * 3 * 24, offset=2880).reshape(3, 3, 4, 6)
+            np.testing.assert_array_equal(cube[:, 2], 30)
+            np.testing.assert_array_equal(cube[:, 0], 0)
+            self.assertIn("EXTNAME = 'TIMESTAMPS'", data[2 * 2880:].decode("ascii", "replace"))
+
+        def test_fits16BitsAreOffset(self):
+            path   = os.path.join(self.directory, "capture.fits")
+            writer = FITSWriter(path, (2, 2), ASIImageType.ASI_IMG_RAW16)
+            writer.write(np.array([[0, 1], [32768, 65535]], dtype=np.uint16), time.time())
+            writer.close()
+
+            with open(path, "rb") as file:
+                data = file.read()
+            np.testing.assert_array_equal(np.frombuffer(data, dtype=">i2", count=4, offset=2880), [-32768, -32767, 0, 32767])
+
+class TestRecorder(unittest.TestCase):
+        def setUp(self):
+            self.library = FakeLibrary()
+            patcher = mock.patch.object(pyzwoasi, "lib", self.library)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.path = os.path.join(directory.name, "capture.ser")
+
+        def test_invalidArguments(self):
+            with self.assertRaises(ValueError):
+                Recorder(RecordingCamera(), self.path)
+            with self.assertRaises(ValueError):
+                Recorder(RecordingCamera(), self.path, format="avi", frames=10)
+
+        def test_frameCount(self):
+            recorder = Recorder(RecordingCamera(), self.path, frames=100, slots=4).start()
+            recorder.join()
+            statistics = recorder.statistics
+            self.assertEqual(statistics["framesWritten"], 100)
+            self.assertEqual(statistics["bytesWritten"], 100 * 32)
+            self.assertFalse(self.library.capturing)
+
+            with open(self.path, "rb") as file:
+                data = file.read()
+            self.assertEqual(struct.unpack_from("<i", data, 38)[0], 100)
+            cube = np.frombuffer(data, dtype=np.uint8, count=100 * 32, offset=178).reshape(100, 4, 8)
+            np.testing.assert_array_equal(cube[:, 0, 0], np.arange(100) % 256)
+
+        def test_duration(self):
+            recorder = Recorder(RecordingCamera(), self.path, duration=0.1).start()
+            self.assertTrue(recorder.join(timeout=5))
+            self.assertGreater(recorder.statistics["framesWritten"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading, time, unittest
+
+import pyzwoasi
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+
+class TestSequence(unittest.TestCase):
+        def setUp(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=64, height=48, isColorCam=False)))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.gain = 0
+
+        def test_savesWhileExposing(self):
+            saved = []
+            def save(frame):
+                # Slower than the exposures, only hidden by the workers
+                time.sleep(0.03)
+                saved.append((frame.index, threading.current_thread().name))
+
+            plan = [(20_000, 0)] * 6
+            frames = list(self.camera.runSequence(plan, save=save, workers=3))
+
+            self.assertEqual([frame.index for frame in frames], list(range(6)))
+            self.assertEqual(sorted(index for index, _ in saved), list(range(6)))
+            self.assertTrue(all(name.startswith("SequenceRun") for _, name in saved))
+            self.assertEqual(frames[0].image.shape, (48, 64))
+
+        def test_reorderLimitsSettingChanges(self):
+            plan = [{"exposure": 1000, "gain": 10, "binning": 2}, {"exposure": 1000, "gain": 0},
+                    {"exposure": 2000, "gain": 10, "binning": 2}, {"exposure": 1000, "gain": 0, "binning": 1}]
+            run    = self.camera.runSequence(plan, reorder=True)
+            frames = list(run)
+            statistics = run.statistics
+
+            # Step 1 keeps the binning of step 0. Current format first, then
+            # the binned steps grouped by gain
+            self.assertEqual(run.order, [3, 1, 0, 2])
+            self.assertEqual([frame.index for frame in frames], [3, 1, 0, 2])
+            self.assertEqual(frames[-1].image.shape, (24, 32))
+            self.assertEqual(statistics["frames"], 4)
+            self.assertEqual(statistics["formatChanges"], 1)
+            self.assertAlmostEqual(statistics["shutterTime"], 0.005)
+            self.assertGreater(statistics["dutyCycle"], 0)
+            self.assertLessEqual(statistics["dutyCycle"], 1)
+
+        def test_runIsIteratedOnce(self):
+            run = self.camera.runSequence([(1000, 0), (2000, 0)])
+            self.assertEqual([frame.index for frame in run], [0, 1])
+            with self.assertRaises(RuntimeError):
+                list(run)
+            self.assertEqual(run.statistics["frames"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import time, unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.pyzwoasi import ASIBayerPattern, ASIControlType, ASIError, ASIErrorCode, ASIImageType
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.processing import BitDepthConverter
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+from pyzwoasi.stream import VideoStream
+
+class TestSimulator(unittest.TestCase):
+        def setUp(self):
+            self.simulated = SimulatedCamera(width=320, height=240, bitDepth=12, bayerPattern=ASIBayerPattern.ASI_BAYER_GB, fps=200.0)
+            pyzwoasi.setBackend(SimulatedLibrary(self.simulated))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+
+        def test_cameraProperties(self):
+            info = pyzwoasi.getCameraProperty(0)
+            self.assertEqual((info.MaxWidth, info.MaxHeight, info.BitDepth), (320, 240, 12))
+            self.assertEqual(info.BayerPattern, ASIBayerPattern.ASI_BAYER_GB)
+            self.assertEqual(pyzwoasi.getNumOfControls(0), len(self.simulated.controls))
+
+        def test_shotTimingAndBitDepth(self):
+            self.camera.setROI(320, 240, 1, ASIImageType.ASI_IMG_RAW16)
+            start = time.perf_counter()
+            img = self.camera.shot(exposureTime_us=20000)
+            elapsed = time.perf_counter() - start
+            self.assertGreaterEqual(elapsed, 0.02)
+            self.assertLess(elapsed, 0.5)
+            self.assertEqual(img.shape, (240, 320))
+            self.assertTrue(np.all(img % 16 == 0)) # 12 bits data in the upper bits
+
+        def test_bitDepthPerStream(self):
+            self.camera.setROI(320, 240, 1, ASIImageType.ASI_IMG_RAW16)
+            self.camera.exposure = 1000
+            native = self.camera.shot(depth=self.camera.bitDepthConverter(BitDepthConverter.NATIVE))
+            self.assertLessEqual(int(native.max()), 4095)
+
+            with self.camera.stream(slots=4, depth=self.camera.bitDepthConverter()) as stream:
+                first  = stream.read(timeout=1).image
+                second = stream.read(timeout=1).image
+            self.assertEqual((first.shape, first.dtype), ((240, 320), np.uint8))
+            self.assertIs(first, second) # Reused preview buffer
+
+        def test_exposureFailuresAreRetried(self):
+            self.simulated.inject(expFailures=2)
+            self.assertEqual(self.camera.shot(exposureTime_us=1000).shape, (240, 320))
+
+            self.simulated.inject(expFailures=10)
+            with self.assertRaises(ASIError):
+                self.camera.shot(exposureTime_us=1000)
+
+        def test_videoFrameRate(self):
+            self.camera.exposure = 1000
+            with self.camera.stream(slots=4, policy=VideoStream.BLOCK) as stream:
+                for _ in range(20):
+                    self.assertIsNotNone(stream.read(timeout=1))
+                statistics = stream.statistics
+            self.assertGreater(statistics["fps"], 100)
+            self.assertLess(statistics["fps"], 250)
+
+        def test_injectedTimeoutsAndDroppedFrames(self):
+            self.camera.exposure = 1000
+            self.simulated.inject(timeouts=2, droppedFrames=3)
+            with self.camera.stream(slots=4, policy=VideoStream.BLOCK, waitms=20) as stream:
+                for _ in range(10):
+                    self.assertIsNotNone(stream.read(timeout=1))
+            statistics = stream.statistics
+            self.assertEqual(statistics["timeouts"], 2)
+            self.assertGreaterEqual(statistics["droppedFrames"], 3)
+
+        def test_slowReaderDropsFrames(self):
+            self.camera.exposure = 1000
+            buffer = self.camera.emptyFrame()
+            pyzwoasi.startVideoCapture(0)
+            try:
+                pyzwoasi.getVideoDataInto(0, buffer, 100)
+                time.sleep(0.1) # About 20 frames, the SDK queue only holds 2
+                pyzwoasi.getVideoDataInto(0, buffer, 100)
+                self.assertGreater(pyzwoasi.getDroppedFrames(0), 10)
+            finally:
+                pyzwoasi.stopVideoCapture(0)
+
+        def test_invalidROI(self):
+            with self.assertRaises(ASIError) as context:
+                pyzwoasi.setROIFormat(0, 100, 240, 1, ASIImageType.ASI_IMG_RAW8)
+            self.assertEqual(context.exception.args[1], ASIErrorCode.ASI_ERROR_INVALID_SIZE)
+
+        def test_controlsUseControlType(self):
+            # Controls are not listed in control type order
+            control = self.camera.controls["BandWidth"]
+            self.assertEqual(control.controlType, ASIControlType.ASI_BANDWIDTHOVERLOAD)
+            self.assertEqual((control.minValue, control.maxValue, control.isWritable), (40, 100, True))
+            self.assertFalse(self.camera.controls["Temperature"].isWritable)
+
+            self.camera.bandwidth = 80
+            self.assertEqual(pyzwoasi.getControlValue(0, ASIControlType.ASI_BANDWIDTHOVERLOAD)[0], 80)
+            self.camera.setControls({"WB_R": 60, "Offset": 20})
+            self.assertEqual(pyzwoasi.getControlValue(0, ASIControlType.ASI_WB_R)[0], 60)
+            self.assertEqual(self.camera.getControls(["Offset", "BandWidth"]), {"Offset": 20, "BandWidth": 80})
+
+if __name__ == '__main__':
+    unittest.main()
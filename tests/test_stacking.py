@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.pyzwoasi import ASIImageType
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+from pyzwoasi.stacking import Stacker
+
+class TestStacker(unittest.TestCase):
+        def setUp(self):
+            rng = np.random.default_rng(0)
+            self.frames = rng.integers(0, 4096, size=(20, 6, 8), dtype=np.uint16)
+
+        def test_statisticsMatchNumPy(self):
+            stacker = Stacker((6, 8), np.uint16, dtype=np.float64)
+            for frame in self.frames:
+                stacker.add(frame)
+            np.testing.assert_allclose(stacker.sum, self.frames.sum(axis=0))
+            np.testing.assert_allclose(stacker.mean, self.frames.mean(axis=0))
+            np.testing.assert_allclose(stacker.variance, self.frames.var(axis=0, ddof=1))
+            np.testing.assert_array_equal(stacker.min, self.frames.min(axis=0))
+            np.testing.assert_array_equal(stacker.max, self.frames.max(axis=0))
+            self.assertEqual(stacker.statistics["frames"], 20)
+            self.assertGreater(stacker.statistics["memoryBytes"], 0)
+
+        def test_rgb24AndRaw8(self):
+            frames = self.frames.reshape(20, 4, 4, 3).astype(np.uint8)
+            stacker = Stacker((4, 4, 3), np.uint8)
+            for frame in frames:
+                stacker(frame, ASIImageType.ASI_IMG_RGB24)
+            np.testing.assert_allclose(stacker.mean, frames.mean(axis=0), rtol=1e-5)
+            self.assertEqual(stacker.mean.dtype, np.float32)
+
+        def test_sigmaClipRejectsOutliers(self):
+            frames = np.full((20, 6, 8), 1000, dtype=np.uint16) + (np.arange(20) % 3).astype(np.uint16)[:, None, None]
+            frames[12, 2, 3] = 60000 # Cosmic ray
+            stacker = Stacker((6, 8), np.uint16, sigmaClip=3.0)
+            for frame in frames:
+                stacker.add(frame)
+            self.assertLess(stacker.mean[2, 3], 1002)
+            self.assertEqual(stacker.counts[2, 3], 19)
+            self.assertEqual(stacker.statistics["rejectedPixels"], 1)
+            self.assertGreater(stacker.max[2, 3], 50000)
+
+        def test_sigmaClipKeepsQuantizationNoise(self):
+            # Constant first frames give a zero variance, the next samples
+            # one or two ADU away are still noise
+            values  = [10] * 5 + [11, 9, 11, 9, 12]
+            stacker = Stacker((2, 2), np.uint8, sigmaClip=3.0)
+            for value in values:
+                stacker.add(np.full((2, 2), value, dtype=np.uint8))
+            np.testing.assert_array_equal(stacker.counts, 10)
+            np.testing.assert_allclose(stacker.mean, np.mean(values), rtol=1e-6)
+            self.assertEqual(stacker.statistics["rejectedPixels"], 0)
+
+        def test_uint16SumIsExact(self):
+            stacker = Stacker((1, 1), np.uint16, dtype=np.float32, minMax=False)
+            for _ in range(300):
+                stacker.add(np.full((1, 1), 65535, dtype=np.uint16))
+            self.assertEqual(stacker.sum.dtype, np.float64)
+            self.assertEqual(stacker.sum[0, 0], 300 * 65535)
+            self.assertEqual(stacker.mean.dtype, np.float32)
+
+        def test_shapeMismatch(self):
+            with self.assertRaises(ValueError):
+                Stacker((6, 8)).add(np.zeros((8, 6), dtype=np.uint16))
+
+        def test_cameraStack(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=64, height=48, fps=500.0)))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            with ZWOCamera(0) as camera:
+                camera.setROI(64, 48, 1, ASIImageType.ASI_IMG_RAW16)
+                camera.exposure = 1000
+                stacker = camera.stack(10)
+            self.assertEqual(stacker.frames, 10)
+            self.assertEqual(stacker.mean.shape, (48, 64))
+            self.assertTrue(np.all(stacker.variance >= 0))
+
+if __name__ == '__main__':
+    unittest.main()
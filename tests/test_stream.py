@@ -0,0 +1,135 @@
+import ctypes, time, unittest
+from unittest import mock
+
+import numpy as np
+
+from pyzwoasi import pyzwoasi
+from pyzwoasi.pyzwoasi import ASIErrorCode
+from pyzwoasi.stream import VideoStream
+
+class FakeLibrary:
+    """
+    Stand-in for the ASICamera2 shared library, producing frames filled
+    with their own sequence number at a fixed rate.
+    """
+    def __init__(self, framePeriod=0.001, timeoutEvery=0):
+        self.framePeriod  = framePeriod
+        self.timeoutEvery = timeoutEvery
+        self.calls        = 0
+        self.frameNumber  = 0
+        self.capturing    = False
+
+    def ASIStartVideoCapture(self, cameraID):
+        self.capturing = True
+        return 0
+
+    def ASIStopVideoCapture(self, cameraID):
+        self.capturing = False
+        return 0
+
+    def ASIGetVideoData(self, cameraID, buffer, bufferSize, waitms):
+        self.calls += 1
+        time.sleep(self.framePeriod)
+        if self.timeoutEvery and self.calls % self.timeoutEvery == 0:
+            return ASIErrorCode.ASI_ERROR_TIMEOUT
+        ctypes.memset(buffer, self.frameNumber % 256, bufferSize)
+        self.frameNumber += 1
+        return 0
+
+    def ASIGetDroppedFrames(self, cameraID, droppedFrames):
+        droppedFrames._obj.value = 0
+        return 0
+
+class FakeCamera:
+    _cameraIndex = 0
+    exposure     = 1000
+    imageType    = 0
+
+    def emptyFrame(self):
+        return np.empty((4, 8), dtype=np.uint8)
+
+class TestVideoStream(unittest.TestCase):
+        def setUp(self):
+            self.library = FakeLibrary()
+            patcher = mock.patch.object(pyzwoasi, "lib", self.library)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        def test_invalidArguments(self):
+            with self.assertRaises(ValueError):
+                VideoStream(FakeCamera(), slots=1)
+            with self.assertRaises(ValueError):
+                VideoStream(FakeCamera(), policy="drop")
+
+        def test_framesAreViewsOnTheRing(self):
+            with VideoStream(FakeCamera(), slots=4, policy=VideoStream.BLOCK) as stream:
+                self.assertTrue(self.library.capturing)
+                frame = stream.read(timeout=1)
+                self.assertIsNotNone(frame)
+                self.assertEqual(frame.image.shape, (4, 8))
+                self.assertTrue(np.shares_memory(frame.image, stream._ring))
+                self.assertEqual(frame.image[0, 0], frame.sequence % 256)
+            self.assertFalse(self.library.capturing)
+
+        def test_blockPolicyKeepsEveryFrame(self):
+            sequences = []
+            with VideoStream(FakeCamera(), slots=2, policy=VideoStream.BLOCK) as stream:
+                for frame in stream:
+                    sequences.append(frame.sequence)
+                    time.sleep(0.002) # Slower consumer than producer
+                    if len(sequences) == 20:
+                        break
+                statistics = stream.statistics
+            self.assertEqual(sequences, list(range(20)))
+            self.assertEqual(statistics["framesOverwritten"], 0)
+
+        def test_overwritePolicyDropsOldestFrames(self):
+            with VideoStream(FakeCamera(), slots=3, policy=VideoStream.OVERWRITE) as stream:
+                time.sleep(0.05) # Nobody reads, the ring is filled then overwritten
+                frame = stream.read(timeout=1)
+                statistics = stream.statistics
+            self.assertGreater(statistics["framesOverwritten"], 0)
+            self.assertGreater(frame.sequence, 0)
+            self.assertGreater(statistics["fps"], 0)
+
+        def test_timeoutsAreCounted(self):
+            self.library.timeoutEvery = 3
+            with VideoStream(FakeCamera(), slots=4, policy=VideoStream.BLOCK) as stream:
+                for _ in range(10):
+                    self.assertIsNotNone(stream.read(timeout=1))
+                statistics = stream.statistics
+            self.assertGreater(statistics["timeouts"], 0)
+
+        def test_errorIsRaisedToConsumer(self):
+            self.library.ASIGetVideoData = lambda *args: ASIErrorCode.ASI_ERROR_CAMERA_REMOVED
+            stream = VideoStream(FakeCamera(), slots=2)
+            stream.start()
+            try:
+                with self.assertRaises(pyzwoasi.ASIError):
+                    stream.read(timeout=1)
+            finally:
+                stream.stop()
+
+        def test_restartAfterError(self):
+            failing = lambda *args: ASIErrorCode.ASI_ERROR_CAMERA_REMOVED
+            self.library.ASIGetVideoData = failing
+            stream = VideoStream(FakeCamera(), slots=2)
+            stream.start()
+            with self.assertRaises(pyzwoasi.ASIError):
+                stream.read(timeout=1)
+            self.assertTrue(self.library.capturing) # Not stopped by the dead thread
+
+            # The dead thread is joined and the capture stopped before restarting
+            stopCalls = []
+            stopVideoCapture = self.library.ASIStopVideoCapture
+            self.library.ASIStopVideoCapture = lambda cameraID: stopCalls.append(cameraID) or stopVideoCapture(cameraID)
+            del self.library.ASIGetVideoData
+            stream.start()
+            try:
+                self.assertEqual(stopCalls, [0])
+                self.assertIsNotNone(stream.read(timeout=1))
+            finally:
+                stream.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time, unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary
+from pyzwoasi.tracking import centroid
+
+class TestTracking(unittest.TestCase):
+        def setUp(self):
+            pyzwoasi.setBackend(SimulatedLibrary(SimulatedCamera(width=640, height=480, fps=100.0, isColorCam=False,
+                                                                  usbRate=float("inf"), planet=(400, 300, 10, 5000.0))))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.exposure = 100
+
+        def test_centroid(self):
+            image = np.full((60, 80), 100, dtype=np.uint16)
+            image[20:23, 50:53] = 1000
+            self.assertEqual(centroid(image), (51.0, 21.0))
+            self.assertIsNone(centroid(np.zeros((4, 8), dtype=np.uint8)))
+            x, y = centroid(np.repeat(image[..., np.newaxis], 3, axis=2).astype(np.uint8), step=2)
+            self.assertLess(abs(x - 51) + abs(y - 21), 2)
+
+        def test_startPosition(self):
+            self.camera.setROI(64, 48)
+            self.camera.startPosition = (10, 20)
+            self.assertEqual(self.camera.startPosition, (10, 20))
+            with self.assertRaises(ValueError):
+                self.camera.startPosition = (600, 0)
+
+        def test_trackerFollowsTarget(self):
+            with self.camera.track(64, 48, minInterval=0.0, baselineFrames=5) as tracker:
+                targetX, targetY = tracker.target
+                self.assertLessEqual(abs(targetX - 400) + abs(targetY - 300), 2)
+                startX, startY = self.camera.startPosition
+                self.assertLessEqual(abs(startX + 32 - targetX), 2)
+                self.assertLessEqual(abs(startY + 24 - targetY), 2)
+
+                # Moving the ROI away from the target brings it back
+                self.camera.startPosition = tracker._position = (startX + 10, startY)
+                tracker._movedAt = time.time()
+                for _ in range(10):
+                    tracker.read(timeout=1)
+                statistics = tracker.statistics
+            self.assertGreaterEqual(statistics["moves"], 1)
+            self.assertLessEqual(abs(self.camera.startPosition[0] - startX), 4)
+            self.assertGreater(statistics["fpsGain"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
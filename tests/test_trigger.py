@@ -0,0 +1,56 @@
+import time, unittest
+
+import numpy as np
+
+import pyzwoasi
+from pyzwoasi.camera import ZWOCamera
+from pyzwoasi.pyzwoasi import ASICameraMode, ASITrigOutputPin
+from pyzwoasi.simulator import SimulatedCamera, SimulatedLibrary, SimulatedTriggerSource
+
+class TestTriggeredCapture(unittest.TestCase):
+        def setUp(self):
+            self.simulated = SimulatedCamera(width=64, height=48, fps=1000.0, isTriggerCam=True, queueFrames=4)
+            pyzwoasi.setBackend(SimulatedLibrary(self.simulated))
+            self.addCleanup(pyzwoasi.setBackend, None)
+            self.camera = ZWOCamera(0)
+            self.addCleanup(self.camera.close)
+            self.camera.exposure = 2000
+
+        def test_externalTriggers(self):
+            capture = self.camera.triggered(frames=20, outputPin=ASITrigOutputPin.ASI_TRIG_OUTPUT_PINA, outputDuration_us=500)
+            with capture, SimulatedTriggerSource(self.simulated, rate=200, count=20, callback=capture.noteTrigger):
+                self.assertEqual(pyzwoasi.getCameraMode(0), ASICameraMode.ASI_MODE_TRIG_RISE_EDGE)
+                self.assertEqual(pyzwoasi.getTriggerOutputIOConf(0, ASITrigOutputPin.ASI_TRIG_OUTPUT_PINA), (True, 0, 500))
+                self.assertTrue(capture.wait(timeout=2))
+            self.assertEqual(pyzwoasi.getCameraMode(0), ASICameraMode.ASI_MODE_NORMAL)
+
+            statistics = capture.statistics
+            self.assertEqual((statistics["frames"], statistics["triggers"], statistics["missedTriggers"]), (20, 20, 0))
+            self.assertGreaterEqual(statistics["latency"]["min"], 0.002)
+            self.assertLess(statistics["latency"]["mean"], 0.02)
+            self.assertEqual(capture.images.shape, (20, 48, 64))
+            self.assertFalse(np.isnan(capture.latencies).any())
+
+        def test_triggersDuringExposureAreMissed(self):
+            # Edges every 5 ms on 12 ms exposures: about 2 in 3 are missed
+            self.camera.exposure = 12000
+            capture = self.camera.triggered(frames=5)
+            with capture, SimulatedTriggerSource(self.simulated, rate=200, callback=capture.noteTrigger):
+                self.assertTrue(capture.wait(timeout=2))
+            statistics = capture.statistics
+            self.assertGreaterEqual(statistics["missedTriggers"], statistics["frames"])
+            self.assertEqual(statistics["missedTriggers"], statistics["triggers"] - statistics["frames"])
+            self.assertLess(statistics["latency"]["max"], 0.012 + 0.005)
+
+        def test_softTrigger(self):
+            with self.camera.triggered(ASICameraMode.ASI_MODE_TRIG_SOFT_EDGE, frames=3) as capture:
+                for _ in range(3):
+                    capture.trigger()
+                    time.sleep(0.005) # Triggers during an exposure are missed
+                self.assertTrue(capture.wait(timeout=1))
+            self.assertEqual(capture.statistics["missedTriggers"], 0)
+            with self.assertRaises(ValueError):
+                self.camera.triggered(frames=1).trigger() # Hardware mode
+
+if __name__ == '__main__':
+    unittest.main()
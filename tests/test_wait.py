@@ -0,0 +1,74 @@
+import itertools, unittest
+from unittest import mock
+
+from pyzwoasi import pyzwoasi
+from pyzwoasi.pyzwoasi import ASIExposureStatus
+from pyzwoasi.wait import BackoffWait, FixedIntervalWait, WaitStrategy
+
+class FakeLibrary:
+    """
+    Stand-in for the ASICamera2 shared library, reporting a working
+    exposure for a given number of status reads.
+    """
+    def __init__(self, workingReads, finalStatus=ASIExposureStatus.ASI_EXP_SUCCESS):
+        self.workingReads = workingReads
+        self.finalStatus  = finalStatus
+        self.statusCalls  = 0
+
+    def ASIGetExpStatus(self, cameraID, expStatus):
+        self.statusCalls += 1
+        if self.statusCalls <= self.workingReads:
+            expStatus._obj.value = ASIExposureStatus.ASI_EXP_WORKING
+        else:
+            expStatus._obj.value = self.finalStatus
+        return 0
+
+class TestWaitStrategy(unittest.TestCase):
+        def test_singleStatusReadPerIteration(self):
+            library = FakeLibrary(workingReads=5)
+            strategy = FixedIntervalWait(interval=0)
+            with mock.patch.object(pyzwoasi, "lib", library):
+                status = strategy.wait(0, 0)
+            self.assertEqual(status, ASIExposureStatus.ASI_EXP_SUCCESS)
+            self.assertEqual(library.statusCalls, 6)
+            self.assertEqual(strategy.statistics["statusCalls"], 6)
+            self.assertEqual(strategy.statistics["exposures"], 1)
+            self.assertIsNotNone(strategy.statistics["readoutLatency"])
+
+        def test_failedExposureIsReturned(self):
+            library = FakeLibrary(workingReads=0, finalStatus=ASIExposureStatus.ASI_EXP_FAILED)
+            strategy = BackoffWait()
+            with mock.patch.object(pyzwoasi, "lib", library):
+                status = strategy.wait(0, 0)
+            self.assertEqual(status, ASIExposureStatus.ASI_EXP_FAILED)
+            self.assertIsNone(strategy.statistics["readoutLatency"])
+
+        def test_stuckExposureTimesOut(self):
+            library = FakeLibrary(workingReads=10**9)
+            strategy = FixedIntervalWait(interval=0.01)
+            with mock.patch.object(pyzwoasi, "lib", library):
+                status = strategy.wait(0, 0, timeout=0.05)
+            self.assertEqual(status, ASIExposureStatus.ASI_EXP_FAILED)
+            self.assertLess(library.statusCalls, 10)
+            self.assertEqual(strategy.statistics["timeouts"], 1)
+            self.assertAlmostEqual(WaitStrategy.defaultTimeout(1_000_000), 11.0)
+            self.assertAlmostEqual(WaitStrategy.defaultTimeout(60_000_000), 180.0)
+
+        def test_backoffGrowsUpToCap(self):
+            strategy = BackoffWait(initialDelay=0.001, factor=2, maxDelay=0.01)
+            delays = list(itertools.islice(strategy.delays(), 6))
+            self.assertEqual(delays, [0.001, 0.002, 0.004, 0.008, 0.01, 0.01])
+
+        def test_backoffCapFollowsReadout(self):
+            strategy = BackoffWait(initialDelay=0.001, factor=2, maxDelay=0.1, readoutFraction=0.25)
+            strategy.record(3, 0.016, ASIExposureStatus.ASI_EXP_SUCCESS)
+            self.assertAlmostEqual(max(itertools.islice(strategy.delays(), 20)), 0.004)
+
+        def test_delaysMustBeImplemented(self):
+            class NoDelays(WaitStrategy):
+                pass
+            with self.assertRaises(TypeError):
+                NoDelays()
+
+if __name__ == '__main__':
+    unittest.main()